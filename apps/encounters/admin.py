@@ -1,12 +1,48 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 
-from .models import Encounter, QualityMetric, SOAPNote, Transcript
+from .instrumentation import STAGES
+from .models import (
+    Encounter,
+    EncounterBatch,
+    QualityMetric,
+    QualityRollup,
+    SOAPNote,
+    Transcript,
+    Utterance,
+    WebhookEndpoint,
+    WebhookEvent,
+)
+from .pagination import EstimatedCountPaginator
+from .services.rollup import chart_series
+
+# queue_wait_ms followed by wall / CPU / peak RSS for every pipeline stage
+_TIMING_FIELDS = ["queue_wait_ms"] + [
+    f"{stage}_{suffix}" for stage in STAGES for suffix in ("wall_ms", "cpu_ms", "peak_rss_mb")
+]
 
 
 class TranscriptInline(admin.StackedInline):
     model = Transcript
     readonly_fields = ["raw_text", "redacted_text", "created_at"]
     extra = 0
+    show_change_link = True
+
+
+class UtteranceInline(admin.TabularInline):
+    model = Utterance
+    fields = ["index", "speaker", "start_ms", "end_ms", "confidence", "raw_text", "redacted_text"]
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(Transcript)
+class TranscriptAdmin(admin.ModelAdmin):
+    list_display = ["encounter", "created_at"]
+    list_select_related = ["encounter"]
+    readonly_fields = ["encounter", "raw_text", "redacted_text", "created_at"]
+    inlines = [UtteranceInline]
 
 
 class SOAPNoteInline(admin.StackedInline):
@@ -21,23 +57,80 @@ class QualityMetricInline(admin.StackedInline):
         "transcript_confidence", "transcript_word_count",
         "soap_sections_complete", "groq_prompt_tokens",
         "groq_completion_tokens", "groq_model", "created_at",
+        *_TIMING_FIELDS,
     ]
     extra = 0
     verbose_name = "Quality Metric (internal)"
 
 
+def _reprocess_action(stage):
+    """Build an admin action that rewinds the checkpoint and requeues the pipeline."""
+
+    def action(modeladmin, request, queryset):
+        from .scheduling import enqueue_encounter
+
+        queued = 0
+        for encounter in queryset:
+            try:
+                encounter.rewind_to(stage)
+            except ValueError as exc:
+                modeladmin.message_user(request, f"{encounter.id}: {exc}", messages.WARNING)
+                continue
+            encounter.save(update_fields=[
+                "last_completed_stage", "status", "error_message", "attempt_count", "stage_errors", "updated_at",
+            ])
+            enqueue_encounter(encounter)
+            queued += 1
+        if queued:
+            modeladmin.message_user(request, f"Requeued {queued} encounter(s) from {stage}.")
+
+    action.__name__ = f"reprocess_from_{stage}"
+    action.short_description = f"Reprocess from {Encounter.Stage(stage).label.lower()}"
+    return action
+
+
 @admin.register(Encounter)
 class EncounterAdmin(admin.ModelAdmin):
-    list_display = ["id", "user", "status", "original_filename", "created_at"]
-    list_filter = ["status", "created_at"]
+    list_display = [
+        "id", "user", "status", "source", "queue_priority", "last_completed_stage",
+        "attempt_count", "original_filename", "created_at",
+    ]
+    list_filter = ["status", "source", "last_completed_stage", "audio_status"]
+    # Both columns carry pg_trgm indexes (migrations 0019 and users 0002)
     search_fields = ["user__email", "original_filename"]
-    readonly_fields = ["id", "created_at", "updated_at"]
+    date_hierarchy = "created_at"
+    list_select_related = ["user"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ["batch", "duplicate_of"]
+    readonly_fields = [
+        "id", "created_at", "updated_at", "audio_sha256",
+        "last_completed_stage", "attempt_count", "stage_errors", "queue_priority",
+        "audio_status", "audio_retention_at",
+    ]
     inlines = [TranscriptInline, SOAPNoteInline, QualityMetricInline]
+    actions = [_reprocess_action(stage) for stage in Encounter.Stage.values]
+
+
+@admin.register(EncounterBatch)
+class EncounterBatchAdmin(admin.ModelAdmin):
+    list_display = ["id", "user", "label", "total", "progress", "created_at"]
+    list_select_related = ["user"]
+    search_fields = ["user__email", "label"]
+    readonly_fields = ["id", "user", "total", "created_at"]
+
+    def progress(self, obj):
+        counts = obj.status_counts()
+        return (
+            f"{counts[Encounter.Status.COMPLETED]} done · "
+            f"{counts[Encounter.Status.FAILED]} failed / {obj.total}"
+        )
 
 
 @admin.register(SOAPNote)
 class SOAPNoteAdmin(admin.ModelAdmin):
     list_display = ["encounter", "created_at"]
+    list_select_related = ["encounter"]
     readonly_fields = ["created_at"]
 
 
@@ -46,15 +139,30 @@ class QualityMetricAdmin(admin.ModelAdmin):
     list_display = [
         "encounter", "confidence_pct", "transcript_word_count",
         "soap_completeness_pct", "groq_prompt_tokens",
-        "groq_completion_tokens", "groq_model", "created_at",
+        "groq_completion_tokens", "groq_model", "stage_timings",
+        "slowest_stage", "created_at",
     ]
     readonly_fields = [
         "encounter", "transcript_confidence", "transcript_word_count",
         "soap_sections_complete", "groq_prompt_tokens",
         "groq_completion_tokens", "groq_model", "created_at",
+        *_TIMING_FIELDS,
+    ]
+    fieldsets = [
+        (None, {"fields": ["encounter", "created_at"]}),
+        ("Transcription", {"fields": ["transcript_confidence", "transcript_word_count"]}),
+        ("SOAP generation", {"fields": [
+            "soap_sections_complete", "groq_prompt_tokens",
+            "groq_completion_tokens", "groq_model",
+        ]}),
+        ("Stage timings", {"fields": _TIMING_FIELDS}),
     ]
-    list_filter = ["groq_model", "created_at"]
+    list_filter = ["groq_model"]
     search_fields = ["encounter__user__email"]
+    date_hierarchy = "created_at"
+    list_select_related = ["encounter"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def confidence_pct(self, obj):
         return obj.confidence_pct
@@ -64,5 +172,93 @@ class QualityMetricAdmin(admin.ModelAdmin):
         return obj.soap_completeness_pct
     soap_completeness_pct.short_description = "SOAP Completeness"
 
+    def stage_timings(self, obj):
+        parts = [
+            ("Q", obj.queue_wait_ms),
+            ("T", obj.transcription_wall_ms),
+            ("R", obj.redaction_wall_ms),
+            ("S", obj.soap_wall_ms),
+            ("PDF", obj.pdf_wall_ms),
+        ]
+        return " · ".join(f"{label} {ms / 1000:.1f}s" for label, ms in parts if ms is not None) or "N/A"
+    stage_timings.short_description = "Stage Wall Time"
+
+    def slowest_stage(self, obj):
+        return obj.slowest_stage
+    slowest_stage.short_description = "Slowest Stage"
+
     def has_add_permission(self, request):
         return False  # metrics are system-generated only
+
+
+@admin.register(QualityRollup)
+class QualityRollupAdmin(admin.ModelAdmin):
+    """Daily trends; the chart follows the changelist filters."""
+
+    change_list_template = "admin/encounters/qualityrollup/change_list.html"
+    list_display = [
+        "day", "groq_model", "encounter_count", "confidence_pct",
+        "avg_sections_complete", "total_prompt_tokens", "total_completion_tokens",
+        "avg_queue_wait_ms", "avg_transcription_ms", "avg_redaction_ms", "avg_soap_ms",
+    ]
+    list_filter = ["groq_model"]
+    date_hierarchy = "day"
+
+    def confidence_pct(self, obj):
+        if obj.avg_confidence is None:
+            return "N/A"
+        return f"{obj.avg_confidence * 100:.1f}%"
+    confidence_pct.short_description = "Avg Confidence"
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context=extra_context)
+        changelist = getattr(response, "context_data", {}).get("cl")
+        if changelist is not None:  # absent on redirects / permission errors
+            response.context_data["chart"] = chart_series(changelist.queryset[:366])
+        return response
+
+    def has_add_permission(self, request):
+        return False  # rollups are system-generated only
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+def _redeliver(modeladmin, request, queryset):
+    from .services.webhooks import schedule_deliveries
+
+    updated = queryset.exclude(status=WebhookEvent.Status.DELIVERED).update(
+        status=WebhookEvent.Status.PENDING, attempts=0, next_attempt_at=timezone.now(),
+    )
+    schedule_deliveries(set(queryset.values_list("endpoint_id", flat=True)))
+    modeladmin.message_user(request, f"Requeued {updated} event(s) for delivery.")
+
+
+_redeliver.short_description = "Retry delivery"
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ["url", "user", "is_active", "created_at"]
+    list_select_related = ["user"]
+    list_filter = ["is_active"]
+    search_fields = ["user__email", "url"]
+    readonly_fields = ["id", "secret", "created_at"]
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ["id", "endpoint", "type", "status", "attempts", "next_attempt_at", "delivered_at"]
+    list_filter = ["status", "type"]
+    search_fields = ["endpoint__url", "endpoint__user__email"]
+    list_select_related = ["endpoint"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = [
+        "id", "endpoint", "type", "payload", "attempts", "delivery_id",
+        "last_error", "created_at", "delivered_at",
+    ]
+    actions = [_redeliver]
+
+    def has_add_permission(self, request):
+        return False  # events are recorded by the pipeline only
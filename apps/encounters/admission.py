@@ -0,0 +1,188 @@
+"""
+Admission control for uploads (POST /api/encounters/, /live/ and /batches/).
+
+Without it every upload is queued at once, so under a surge the Celery
+backlog and everyone's turnaround grow without bound. An upload is checked
+against two limits before it is stored:
+
+  • ADMISSION_MAX_IN_FLIGHT_PER_USER — the user's unfinished encounters
+  • ADMISSION_MAX_QUEUE_DEPTH — pipeline runs waiting to start (Celery queue
+    depth, or waiting encounters in the database for PIPELINE_RUNNER=async
+    or when the broker cannot be read). Live recordings are exempt: they
+    are scheduled ahead of the whole backlog anyway.
+
+Over a limit the upload is either refused with 429 and a Retry-After
+(ADMISSION_OVERFLOW=reject) or stored as deferred (=defer): it is not
+queued, and the admit_deferred_uploads beat task queues deferred uploads,
+oldest first, as capacity frees up. A bulk import is admitted, deferred or
+refused as a whole, on the same check as a single upload.
+
+Waits are estimated from the drain rate — pipeline runs started (QualityMetric
+rows, created when a first attempt starts) over
+ADMISSION_THROUGHPUT_WINDOW_SECONDS, never less than
+ADMISSION_FALLBACK_THROUGHPUT_PER_MINUTE.
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from apps.monitoring.metrics import UPLOAD_ADMISSION
+from apps.monitoring.queues import queue_depth
+
+from .models import Encounter, QualityMetric
+from .scheduling import LOWEST_PRIORITY, enqueue_encounter, next_priority
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_ACTIONS = ("reject", "defer")
+PIPELINE_QUEUE = "celery"  # process_encounter is not routed to another queue
+
+_IN_FLIGHT = [Encounter.Status.PENDING, Encounter.Status.TRANSCRIBED, Encounter.Status.REDACTED]
+
+_DETAILS = {
+    "user": "You already have the maximum number of consultations being processed.",
+    "queue": "The processing queue is full.",
+}
+
+
+@dataclass(frozen=True)
+class Admission:
+    outcome: str  # admitted / deferred / rejected
+    reason: str = ""  # user / queue when not admitted
+    retry_after: int = 0  # seconds until the limit is expected to clear
+
+    @property
+    def detail(self) -> str:
+        return _DETAILS.get(self.reason, "")
+
+
+def _overflow_action() -> str:
+    action = settings.ADMISSION_OVERFLOW
+    if action not in OVERFLOW_ACTIONS:
+        raise ImproperlyConfigured(
+            f"Unknown ADMISSION_OVERFLOW '{action}'. Choose one of: {', '.join(OVERFLOW_ACTIONS)}."
+        )
+    return action
+
+
+# ── Load signals ──────────────────────────────────────────────────────────────
+
+
+def _waiting():
+    """Queued encounters whose first pipeline run has not started."""
+    return Encounter.objects.filter(
+        status=Encounter.Status.PENDING, attempt_count=0, deferred_at__isnull=True,
+    )
+
+
+def waiting_runs() -> int:
+    """Pipeline runs waiting to start: the broker's queue depth, else the database's view."""
+    if settings.PIPELINE_RUNNER == "celery":
+        depth = queue_depth(PIPELINE_QUEUE)
+        if depth is not None:
+            return depth
+    return _waiting().count()
+
+
+def in_flight(user) -> int:
+    """The user's admitted encounters that have not finished yet."""
+    return Encounter.objects.filter(user=user, status__in=_IN_FLIGHT, deferred_at__isnull=True).count()
+
+
+def throughput() -> float:
+    """Pipeline runs started per second recently (floored by the fallback rate)."""
+    window = settings.ADMISSION_THROUGHPUT_WINDOW_SECONDS
+    started = QualityMetric.objects.filter(created_at__gte=timezone.now() - timedelta(seconds=window)).count()
+    return max(started / window, settings.ADMISSION_FALLBACK_THROUGHPUT_PER_MINUTE / 60)
+
+
+def estimated_wait(user, source: str = Encounter.Source.UPLOAD) -> int:
+    """
+    Seconds until a new encounter from this user would be picked up: the
+    waiting runs at its priority or more urgent, at the current drain rate.
+    """
+    ahead = _waiting().filter(queue_priority__lte=next_priority(user, source)).count()
+    return math.ceil(ahead / throughput())
+
+
+# ── Decisions ─────────────────────────────────────────────────────────────────
+
+
+def check_upload(user, source: str) -> Admission:
+    """Whether a new upload or bulk import may be queued now (no side effects)."""
+    action = _overflow_action()
+    over = None
+    limit = settings.ADMISSION_MAX_IN_FLIGHT_PER_USER
+    if limit and (count := in_flight(user)) >= limit:
+        over = ("user", count - limit + 1)
+    limit = settings.ADMISSION_MAX_QUEUE_DEPTH
+    if over is None and limit and source != Encounter.Source.LIVE and (depth := waiting_runs()) >= limit:
+        over = ("queue", depth - limit + 1)
+    if over is None:
+        return Admission("admitted")
+
+    reason, excess = over
+    retry_after = min(math.ceil(excess / throughput()), settings.ADMISSION_RETRY_AFTER_MAX_SECONDS)
+    return Admission("deferred" if action == "defer" else "rejected", reason, max(retry_after, 1))
+
+
+def admit_upload(user, source: str) -> Admission:
+    """check_upload(), counted on the upload admission metric."""
+    admission = check_upload(user, source)
+    UPLOAD_ADMISSION.labels(outcome=admission.outcome, reason=admission.reason).inc()
+    if admission.outcome != "admitted":
+        logger.info(f"Upload by user {user.id} {admission.outcome} ({admission.reason} limit), "
+                    f"retry after {admission.retry_after} s.")
+    return admission
+
+
+def defer(encounter: Encounter):
+    """Hold a stored upload back until admit_deferred() queues it."""
+    Encounter.objects.filter(id=encounter.id).update(
+        deferred_at=timezone.now(), queue_priority=LOWEST_PRIORITY,
+    )
+
+
+def admit_deferred() -> int:
+    """
+    Queue deferred uploads, oldest first, while both limits allow.
+    Returns how many were queued.
+    """
+    room = None
+    if settings.ADMISSION_MAX_QUEUE_DEPTH:
+        room = settings.ADMISSION_MAX_QUEUE_DEPTH - waiting_runs()
+        if room <= 0:
+            return 0
+    user_limit = settings.ADMISSION_MAX_IN_FLIGHT_PER_USER
+    per_user: dict = {}
+    admitted = 0
+
+    deferred = (
+        Encounter.objects.filter(status=Encounter.Status.PENDING, deferred_at__isnull=False)
+        .order_by("deferred_at")
+        .only("id", "user_id", "source", "created_at")
+    )
+    for encounter in deferred.iterator(chunk_size=200):
+        if user_limit:
+            if encounter.user_id not in per_user:
+                per_user[encounter.user_id] = in_flight(encounter.user_id)
+            if per_user[encounter.user_id] >= user_limit:
+                continue
+        # Conditional, so two beat runs never queue the same upload twice
+        if not Encounter.objects.filter(id=encounter.id, deferred_at__isnull=False).update(deferred_at=None):
+            continue
+        enqueue_encounter(encounter)
+        per_user[encounter.user_id] = per_user.get(encounter.user_id, 0) + 1
+        admitted += 1
+        if room is not None and admitted >= room:
+            break
+
+    if admitted:
+        logger.info(f"Admitted {admitted} deferred upload(s).")
+    return admitted
@@ -1,9 +1,37 @@
 from django.urls import path
 
-from .views import EncounterCreateAPIView, EncounterPDFAPIView, EncounterStatusAPIView
+from .views import (
+    BulkUploadAPIView,
+    EncounterBatchAPIView,
+    EncounterCreateAPIView,
+    EncounterExportAPIView,
+    EncounterPDFAPIView,
+    EncounterSearchAPIView,
+    EncounterStatusAPIView,
+    EncounterUtterancesAPIView,
+    EncounterWordsAPIView,
+    LiveEncounterCreateAPIView,
+    UploadURLAPIView,
+    WebhookEndpointDetailAPIView,
+    WebhookEndpointListAPIView,
+)
 
 urlpatterns = [
     path("encounters/", EncounterCreateAPIView.as_view(), name="api-encounter-create"),
+    path("encounters/live/", LiveEncounterCreateAPIView.as_view(), name="api-encounter-live"),
+    path("encounters/search/", EncounterSearchAPIView.as_view(), name="api-encounter-search"),
+    path("encounters/export/", EncounterExportAPIView.as_view(), name="api-encounter-export"),
     path("encounters/<uuid:pk>/", EncounterStatusAPIView.as_view(), name="api-encounter-status"),
     path("encounters/<uuid:pk>/pdf/", EncounterPDFAPIView.as_view(), name="api-encounter-pdf"),
+    path(
+        "encounters/<uuid:pk>/utterances/",
+        EncounterUtterancesAPIView.as_view(),
+        name="api-encounter-utterances",
+    ),
+    path("encounters/<uuid:pk>/words/", EncounterWordsAPIView.as_view(), name="api-encounter-words"),
+    path("encounters/batches/", BulkUploadAPIView.as_view(), name="api-batch-create"),
+    path("encounters/batches/upload-urls/", UploadURLAPIView.as_view(), name="api-batch-upload-urls"),
+    path("encounters/batches/<uuid:pk>/", EncounterBatchAPIView.as_view(), name="api-batch-status"),
+    path("webhooks/", WebhookEndpointListAPIView.as_view(), name="api-webhook-list"),
+    path("webhooks/<uuid:pk>/", WebhookEndpointDetailAPIView.as_view(), name="api-webhook-detail"),
 ]
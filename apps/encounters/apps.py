@@ -5,3 +5,6 @@ class EncountersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.encounters"
     verbose_name = "Encounters"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,234 @@
+"""
+asyncio pipeline runner — many encounters per process.
+
+Transcription and SOAP generation are almost entirely waiting on AssemblyAI
+and Groq, yet under Celery prefork each in-flight encounter holds a whole
+~200 MB process. This runner drives up to PIPELINE_ASYNC_CONCURRENCY
+encounters from one event loop instead:
+
+  • transcription and SOAP calls go through one shared httpx.AsyncClient
+    (AssemblyAI REST API, AsyncGroq); Groq calls are further capped by
+    PIPELINE_ASYNC_SOAP_CONCURRENCY to stay inside rate limits
+  • CPU-bound Presidio redaction runs in a small thread pool
+    (PIPELINE_REDACTION_THREADS) so it never blocks the loop
+  • ORM calls run through sync_to_async on Django's shared sync thread
+
+Work is claimed straight from the database rather than from the broker:
+an encounter is leased (lease_owner / lease_expires_at) with a conditional
+UPDATE, so several runners can share the table and a crashed runner's work
+is picked up again once its lease expires. Claims follow the fair-share
+queue_priority assigned by apps.encounters.scheduling. Stages, checkpoints,
+retries (MAX_ATTEMPTS, 60 s apart) and metrics are the same as the Celery
+task — the bookkeeping helpers live in apps.encounters.tasks.
+
+Note that <stage>_cpu_ms is process-wide, so under this runner it includes
+CPU spent on other encounters while the stage was awaiting.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import tasks
+from .instrumentation import measure_stage
+from .models import Encounter
+from .services.redaction import redact_utterances
+from .services.soap import agenerate_soap_note
+from .services.transcription import atranscribe_audio
+
+logger = logging.getLogger(__name__)
+
+Stage = Encounter.Stage
+
+RETRY_DELAY_SECONDS = 60
+
+_IN_PROGRESS = [Encounter.Status.PENDING, Encounter.Status.TRANSCRIBED, Encounter.Status.REDACTED]
+
+
+def _runnable() -> Q:
+    # Deferred uploads wait for admission control (apps/encounters/admission.py)
+    return Q(status__in=_IN_PROGRESS, deferred_at__isnull=True) | Q(
+        status=Encounter.Status.FAILED, attempt_count__lt=tasks.MAX_ATTEMPTS,
+    )
+
+
+def _unleased(now) -> Q:
+    return Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now)
+
+
+def claim_encounters(owner: str, limit: int, only_ids=None) -> list[Encounter]:
+    """
+    Lease up to `limit` runnable encounters, most urgent first.
+    Each claim is a conditional UPDATE, so concurrent runners never share one.
+    """
+    close_old_connections()
+    now = timezone.now()
+    candidates = Encounter.objects.filter(_runnable(), _unleased(now))
+    if only_ids is not None:
+        candidates = candidates.filter(id__in=only_ids)
+    candidates = candidates.order_by(
+        F("queue_priority").asc(nulls_last=True), "created_at",
+    ).values_list("id", flat=True)[: limit * 2]
+
+    expires = now + timedelta(seconds=settings.PIPELINE_LEASE_SECONDS)
+    claimed = []
+    for encounter_id in candidates:
+        won = Encounter.objects.filter(_runnable(), _unleased(now), id=encounter_id).update(
+            lease_owner=owner, lease_expires_at=expires,
+        )
+        if won:
+            claimed.append(encounter_id)
+            if len(claimed) == limit:
+                break
+    return list(Encounter.objects.filter(id__in=claimed))
+
+
+def _renew_lease(encounter: Encounter):
+    Encounter.objects.filter(id=encounter.id, lease_owner=encounter.lease_owner).update(
+        lease_expires_at=timezone.now() + timedelta(seconds=settings.PIPELINE_LEASE_SECONDS),
+    )
+
+
+def _release_lease(encounter: Encounter):
+    Encounter.objects.filter(id=encounter.id, lease_owner=encounter.lease_owner).update(
+        lease_owner="", lease_expires_at=None,
+    )
+
+
+def _checkpointed(save):
+    """Wrap a tasks.save_* helper so the lease is renewed with the checkpoint."""
+
+    def run(encounter, *args):
+        save(encounter, *args)
+        _renew_lease(encounter)
+
+    return sync_to_async(run)
+
+
+_begin_attempt = sync_to_async(tasks.begin_attempt)
+_clone_from_duplicate = sync_to_async(tasks.clone_from_duplicate)
+_save_transcription = _checkpointed(tasks.save_transcription)
+_save_redaction = _checkpointed(tasks.save_redaction)
+_save_soap = _checkpointed(tasks.save_soap)
+_redaction_input = sync_to_async(tasks.redaction_input)
+_soap_input = sync_to_async(tasks.soap_input)
+_record_failure = sync_to_async(tasks.record_failure)
+_release = sync_to_async(_release_lease)
+_claim = sync_to_async(claim_encounters)
+
+
+class AsyncPipelineRunner:
+    """Claims encounters from the database and runs them concurrently."""
+
+    def __init__(self, concurrency=None, soap_concurrency=None, redaction_threads=None,
+                 poll_interval=2.0, only_ids=None):
+        self.concurrency = concurrency or settings.PIPELINE_ASYNC_CONCURRENCY
+        self.soap_concurrency = soap_concurrency or settings.PIPELINE_ASYNC_SOAP_CONCURRENCY
+        self.redaction_threads = redaction_threads or settings.PIPELINE_REDACTION_THREADS
+        self.poll_interval = poll_interval
+        self.only_ids = only_ids
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        """Stop claiming new work; in-flight encounters are finished first."""
+        self._stopping.set()
+
+    async def run(self, drain: bool = False):
+        """
+        Process encounters until stop() is called, or — with drain=True —
+        until nothing is left to claim and every in-flight encounter is done.
+        """
+        self._soap_slots = asyncio.Semaphore(self.soap_concurrency)
+        self._redaction_pool = ThreadPoolExecutor(
+            max_workers=self.redaction_threads, thread_name_prefix="redaction",
+        )
+        limits = httpx.Limits(max_connections=self.concurrency + self.soap_concurrency)
+        in_flight: set[asyncio.Task] = set()
+        try:
+            async with httpx.AsyncClient(timeout=httpx.Timeout(120.0), limits=limits) as http:
+                self._http = http
+                while not self._stopping.is_set():
+                    free = self.concurrency - len(in_flight)
+                    claimed = await _claim(self.owner, free, self.only_ids) if free else []
+                    for encounter in claimed:
+                        task = asyncio.create_task(self._process(encounter))
+                        in_flight.add(task)
+                        task.add_done_callback(in_flight.discard)
+
+                    if drain and not claimed and not in_flight:
+                        break
+                    if in_flight and (not free or not claimed):
+                        # Wake up as soon as a slot frees, at the latest after one poll
+                        await asyncio.wait(
+                            in_flight, timeout=self.poll_interval,
+                            return_when=asyncio.FIRST_COMPLETED,
+                        )
+                    elif not claimed:
+                        await self._sleep(self.poll_interval)
+
+                if in_flight:
+                    logger.info(f"Waiting for {len(in_flight)} in-flight encounter(s)…")
+                    await asyncio.gather(*in_flight, return_exceptions=True)
+        finally:
+            self._redaction_pool.shutdown(wait=True)
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _process(self, encounter: Encounter):
+        encounter_id = encounter.id
+        metrics = await _begin_attempt(encounter)
+        stage = None
+        try:
+            if await _clone_from_duplicate(encounter, metrics):
+                await _release(encounter)
+                return
+
+            if encounter.needs_stage(Stage.TRANSCRIPTION):
+                stage = Stage.TRANSCRIPTION
+                logger.info(f"[{encounter_id}] Starting transcription…")
+                with measure_stage(metrics, "transcription"):
+                    result = await atranscribe_audio(encounter, self._http)
+                await _save_transcription(encounter, result, metrics)
+
+            if encounter.needs_stage(Stage.REDACTION):
+                stage = Stage.REDACTION
+                texts = await _redaction_input(encounter)
+                with measure_stage(metrics, "redaction"):
+                    redacted_texts = await asyncio.get_running_loop().run_in_executor(
+                        self._redaction_pool, redact_utterances, texts,
+                    )
+                await _save_redaction(encounter, redacted_texts, metrics)
+
+            if encounter.needs_stage(Stage.SOAP):
+                stage = Stage.SOAP
+                redacted_text = await _soap_input(encounter)
+                async with self._soap_slots:
+                    with measure_stage(metrics, "soap"):
+                        result = await agenerate_soap_note(redacted_text, self._http)
+                await _save_soap(encounter, result, metrics)
+
+        except Exception as exc:
+            # The lease now holds the encounter back until the retry is due;
+            # claim_encounters stops picking it up after MAX_ATTEMPTS.
+            await _record_failure(
+                encounter, stage, exc,
+                lease_owner="",
+                lease_expires_at=timezone.now() + timedelta(seconds=RETRY_DELAY_SECONDS),
+            )
+        else:
+            await _release(encounter)
@@ -0,0 +1,43 @@
+"""
+Lightweight per-stage resource measurement for the processing pipeline.
+
+measure_stage() records, for the wrapped block:
+  <stage>_wall_ms      wall-clock time
+  <stage>_cpu_ms       CPU time consumed by this process (user + system)
+  <stage>_peak_rss_mb  process peak RSS (high-water mark) once the stage ends
+
+ru_maxrss never goes down, so a stage's peak_rss_mb is the largest footprint
+the worker has reached so far — a jump between stages shows which one grew it.
+Wall time is also observed on the Prometheus stage latency histogram.
+"""
+
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+from apps.monitoring.metrics import STAGE_LATENCY
+
+# Pipeline stages with persisted timings, in execution order
+STAGES = ("transcription", "redaction", "soap", "pdf")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (ru_maxrss is bytes on macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+@contextmanager
+def measure_stage(metrics: dict, stage: str):
+    """Store wall / CPU / peak RSS for the block into metrics under <stage>_* keys."""
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        wall_seconds = time.perf_counter() - wall_start
+        STAGE_LATENCY.labels(stage=stage).observe(wall_seconds)
+        metrics[f"{stage}_wall_ms"] = wall_seconds * 1000
+        metrics[f"{stage}_cpu_ms"] = (time.process_time() - cpu_start) * 1000
+        metrics[f"{stage}_peak_rss_mb"] = peak_rss_mb()
@@ -0,0 +1,26 @@
+"""
+Run the audio retention policy once, outside Celery beat.
+
+    python manage.py apply_audio_retention --dry-run
+
+See apps/encounters/services/retention.py for the policy settings.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.encounters.services.retention import apply_audio_retention
+
+
+class Command(BaseCommand):
+    help = "Archive or delete encounter audio past its retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only count the encounters that are due.")
+
+    def handle(self, *args, **options):
+        counts = apply_audio_retention(dry_run=options["dry_run"])
+        if not counts:
+            self.stdout.write("Nothing to do.")
+        for key, count in sorted(counts.items()):
+            self.stdout.write(f"  {key:<24}{count:>8}")
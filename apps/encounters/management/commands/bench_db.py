@@ -0,0 +1,187 @@
+"""
+Per-request latency with and without database connection reuse.
+
+Seeds one encounter, then for every DB_CONNECTION_MODE (off, persistent,
+pool) boots a fresh interpreter that sends --requests polls of
+GET /api/encounters/<id>/?transcript=false through the real WSGI handler —
+JWT auth, middleware, request_started / request_finished and therefore
+Django's connection handling exactly as under gunicorn:
+
+    DATABASE_URL=postgresql://… python manage.py bench_db --requests 300
+
+Against a remote PostgreSQL the "off" column carries a TCP + TLS handshake
+and authentication per request. "pool" is skipped unless the database is
+PostgreSQL and psycopg_pool is installed. Latency percentiles and the
+number of connections each mode opened are printed and written as JSON.
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+
+from apps.encounters.models import Encounter
+
+from ._stats import git_revision, summarize
+
+BENCH_USER_EMAIL = "bench@vitalnote.local"
+MODES = ("off", "persistent", "pool")
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-request latency for each DB_CONNECTION_MODE (off / persistent / pool)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per mode.")
+        parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per mode first.")
+        parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes to compare.")
+        parser.add_argument("--output", default="", help="JSON results path (default: bench_results/…).")
+        # Internal: run one mode's requests in this (fresh) process
+        parser.add_argument("--probe", default="", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["probe"]:
+            return self._probe(options)
+
+        modes = [mode.strip() for mode in options["modes"].split(",") if mode.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown or not modes or options["requests"] < 1:
+            raise CommandError(f"--modes takes a comma-separated subset of {', '.join(MODES)}.")
+
+        user, _ = get_user_model().objects.get_or_create(email=BENCH_USER_EMAIL)
+        encounter = Encounter.objects.create(
+            user=user,
+            audio_file=ContentFile(b"RIFF0000WAVE", name="bench.wav"),
+            original_filename="bench-db.wav",
+        )
+        try:
+            results = {
+                "revision": git_revision(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "params": {"requests": options["requests"], "warmup": options["warmup"]},
+                "vendor": connection.vendor,
+                "modes": {},
+            }
+            for mode in modes:
+                skipped = self._pool_unavailable() if mode == "pool" else ""
+                if skipped:
+                    self.stdout.write(f"Skipping pool: {skipped}")
+                    results["modes"][mode] = {"skipped": skipped}
+                    continue
+                self.stdout.write(f"Running {options['requests']} requests with DB_CONNECTION_MODE={mode}…")
+                results["modes"][mode] = self._run_mode(mode, encounter, options)
+        finally:
+            encounter.audio_file.delete(save=False)
+            encounter.delete()
+
+        self._report(results)
+        output = Path(options["output"] or (
+            f"bench_results/bench_db_{datetime.now():%Y%m%d_%H%M%S}.json"
+        ))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    @staticmethod
+    def _pool_unavailable() -> str:
+        if connection.vendor != "postgresql":
+            return f"needs PostgreSQL, this database is {connection.vendor}"
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            return "psycopg_pool is not installed (pip install 'psycopg[pool]')"
+        return ""
+
+    def _run_mode(self, mode: str, encounter: Encounter, options) -> dict:
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE),
+            "DB_CONNECTION_MODE": mode,
+            "PROCESS_TYPE": "web",
+        }
+        proc = subprocess.run(
+            [
+                sys.executable, "manage.py", "bench_db", "--probe", str(encounter.id),
+                "--requests", str(options["requests"]), "--warmup", str(options["warmup"]),
+            ],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if proc.returncode:
+            raise CommandError(f"DB_CONNECTION_MODE={mode} run failed:\n{proc.stderr[-2000:]}")
+        probe = json.loads(proc.stdout.strip().splitlines()[-1])
+        return {"latency_ms": summarize(probe["latency_ms"]), "connections_opened": probe["connections"]}
+
+    def _probe(self, options):
+        """Child process: send the requests through WSGIHandler and print the samples as JSON."""
+        from django.core.handlers.wsgi import WSGIHandler
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        encounter = Encounter.objects.select_related("user").get(id=options["probe"])
+        path = reverse("api-encounter-status", args=[encounter.id])
+        host = next(
+            (h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost",
+        )
+        token = str(AccessToken.for_user(encounter.user))
+        connection.close()  # start the measured loop without the lookup's connection
+
+        connections = []
+        connection_created.connect(lambda sender, **kwargs: connections.append(1), weak=False)
+        handler = WSGIHandler()
+
+        def request() -> float:
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": path,
+                "QUERY_STRING": "transcript=false",
+                "SERVER_NAME": host,
+                "SERVER_PORT": "443",
+                "SERVER_PROTOCOL": "HTTP/1.1",
+                "HTTP_HOST": host,
+                "HTTP_AUTHORIZATION": f"Bearer {token}",
+                "HTTP_X_FORWARDED_PROTO": "https",
+                "wsgi.url_scheme": "https",
+                "wsgi.input": io.BytesIO(b""),
+                "wsgi.errors": sys.stderr,
+            }
+            statuses = []
+            start = time.perf_counter()
+            response = handler(environ, lambda status, headers: statuses.append(status))
+            b"".join(response)
+            response.close()  # request_finished → close_old_connections()
+            elapsed = (time.perf_counter() - start) * 1000
+            if not statuses[0].startswith("200"):
+                raise CommandError(f"GET {path} returned {statuses[0]}")
+            return elapsed
+
+        for _ in range(options["warmup"]):
+            request()
+        connections.clear()
+        latency = [request() for _ in range(options["requests"])]
+        self.stdout.write(json.dumps({"latency_ms": latency, "connections": len(connections)}))
+
+    def _report(self, results: dict):
+        self.stdout.write(
+            f"\n{'mode':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'connects':>10}"
+        )
+        for mode, result in results["modes"].items():
+            if "skipped" in result:
+                self.stdout.write(f"{mode:<12}  skipped — {result['skipped']}")
+                continue
+            stats = result["latency_ms"]
+            self.stdout.write(
+                f"{mode:<12}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}"
+                f"{stats['mean']:>10.2f}{result['connections_opened']:>10}"
+            )
@@ -0,0 +1,217 @@
+"""
+End-to-end pipeline benchmark with stubbed providers.
+
+Creates N synthetic encounters and drives process_encounter in-process with
+the fake transcription and SOAP backends (configurable latency). Presidio
+redaction and WeasyPrint PDF rendering run for real, so CPU-bound stages are
+measured as they behave in production.
+
+    python manage.py bench_pipeline --count 50 --lengths 150,1500,6000 \\
+        --transcription-latency 2 --soap-latency 1.5
+
+With --runner async the encounters are driven by the asyncio runner instead
+(--concurrency at once, all with the first --lengths value), which shows the
+throughput-per-GB difference against one-at-a-time Celery execution.
+
+Stage latencies are read back from the timings that process_encounter and
+the PDF service persist on QualityMetric. Results (per-stage p50/p95/p99,
+throughput, peak RSS) are printed and written as JSON so runs can be compared
+across commits. Throughput is per worker process — multiply by the Celery
+concurrency for a whole worker.
+"""
+
+import asyncio
+import json
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from apps.encounters import tasks
+from apps.encounters.async_runner import AsyncPipelineRunner
+from apps.encounters.instrumentation import STAGES
+from apps.encounters.models import Encounter, QualityMetric
+from apps.encounters.services.pdf import generate_pdf_bytes
+
+from ._stats import git_revision, peak_rss_mb, summarize
+
+BENCH_USER_EMAIL = "bench@vitalnote.local"
+
+
+class Command(BaseCommand):
+    help = "Benchmark process_encounter end-to-end with fake transcription / LLM backends."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=20, help="Number of synthetic encounters.")
+        parser.add_argument(
+            "--lengths", default="150,1500,6000",
+            help="Comma-separated transcript lengths in words, cycled across encounters.",
+        )
+        parser.add_argument(
+            "--transcription-latency", type=float, default=0.0,
+            help="Seconds the fake transcription backend sleeps per encounter.",
+        )
+        parser.add_argument(
+            "--soap-latency", type=float, default=0.0,
+            help="Seconds the fake SOAP backend sleeps per encounter.",
+        )
+        parser.add_argument(
+            "--runner", choices=["celery", "async"], default="celery",
+            help="Run process_encounter in-process one at a time, or the asyncio runner.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=32,
+            help="Encounters in flight with --runner async.",
+        )
+        parser.add_argument("--no-pdf", action="store_true", help="Skip the PDF render stage.")
+        parser.add_argument("--output", default="", help="JSON results path (default: bench_results/…).")
+        parser.add_argument("--keep", action="store_true", help="Keep the synthetic encounters afterwards.")
+
+    def handle(self, *args, **options):
+        try:
+            lengths = [int(n) for n in options["lengths"].split(",") if n.strip()]
+        except ValueError:
+            raise CommandError("--lengths must be a comma-separated list of integers.")
+        if not lengths or options["count"] < 1:
+            raise CommandError("Need at least one encounter and one transcript length.")
+
+        user, _ = get_user_model().objects.get_or_create(email=BENCH_USER_EMAIL)
+        encounters = [
+            Encounter.objects.create(
+                user=user,
+                audio_file=ContentFile(b"RIFF0000WAVE", name="bench.wav"),
+                original_filename=f"bench-{i:04d}.wav",
+            )
+            for i in range(options["count"])
+        ]
+
+        samples: dict[str, list[float]] = defaultdict(list)
+        cpu_samples: dict[str, list[float]] = defaultdict(list)
+        by_length: dict[int, list[float]] = defaultdict(list)
+        failures = 0
+
+        self.stdout.write(f"Running {len(encounters)} encounters, lengths={lengths}…")
+        run_start = time.perf_counter()
+        with override_settings(
+            TRANSCRIPTION_BACKEND="fake",
+            SOAP_BACKEND="fake",
+            FAKE_TRANSCRIPTION_LATENCY=options["transcription_latency"],
+            FAKE_SOAP_LATENCY=options["soap_latency"],
+        ):
+            if options["runner"] == "async":
+                failures = self._run_async(encounters, lengths[0], options, samples, cpu_samples, by_length)
+            else:
+                for i, encounter in enumerate(encounters):
+                    words = lengths[i % len(lengths)]
+                    start = time.perf_counter()
+                    try:
+                        with override_settings(FAKE_TRANSCRIPTION_WORDS=words):
+                            tasks.process_encounter(str(encounter.id))
+                        if not options["no_pdf"]:
+                            generate_pdf_bytes(Encounter.objects.get(id=encounter.id))
+                    except Exception as exc:
+                        failures += 1
+                        self.stderr.write(f"  [{encounter.id}] failed: {exc}")
+                        continue
+                    elapsed = (time.perf_counter() - start) * 1000
+                    samples["total"].append(elapsed)
+                    by_length[words].append(elapsed)
+                    self._collect_stages(encounter, samples, cpu_samples)
+        wall_seconds = time.perf_counter() - run_start
+
+        completed = len(samples["total"])
+        results = {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "params": {
+                "count": options["count"],
+                "lengths": lengths,
+                "transcription_latency_s": options["transcription_latency"],
+                "soap_latency_s": options["soap_latency"],
+                "pdf": not options["no_pdf"],
+                "runner": options["runner"],
+                "concurrency": options["concurrency"] if options["runner"] == "async" else 1,
+            },
+            "completed": completed,
+            "failed": failures,
+            "wall_seconds": wall_seconds,
+            "encounters_per_minute": completed / wall_seconds * 60 if wall_seconds else None,
+            "peak_rss_mb": peak_rss_mb(),
+            "encounters_per_minute_per_gb": (
+                completed / wall_seconds * 60 / (peak_rss_mb() / 1024) if wall_seconds else None
+            ),
+            "stages_ms": {stage: summarize(values) for stage, values in samples.items()},
+            "stages_cpu_ms": {stage: summarize(values) for stage, values in cpu_samples.items()},
+            "total_ms_by_length": {str(n): summarize(v) for n, v in sorted(by_length.items())},
+        }
+
+        if not options["keep"]:
+            for encounter in encounters:
+                encounter.audio_file.delete(save=False)
+            Encounter.objects.filter(id__in=[e.id for e in encounters]).delete()
+
+        self._report(results)
+        output = Path(options["output"] or (
+            f"bench_results/bench_pipeline_{datetime.now():%Y%m%d_%H%M%S}.json"
+        ))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    @staticmethod
+    def _collect_stages(encounter, samples, cpu_samples) -> float:
+        """Add the encounter's stage timings to the samples; returns their wall-time sum."""
+        metric = QualityMetric.objects.get(encounter_id=encounter.id)
+        total = 0.0
+        for stage in STAGES:
+            wall_ms = getattr(metric, f"{stage}_wall_ms")
+            if wall_ms is not None:
+                samples[stage].append(wall_ms)
+                cpu_samples[stage].append(getattr(metric, f"{stage}_cpu_ms"))
+                total += wall_ms
+        return total
+
+    def _run_async(self, encounters, words, options, samples, cpu_samples, by_length) -> int:
+        """Drive all encounters through AsyncPipelineRunner; returns the failure count."""
+        runner = AsyncPipelineRunner(
+            concurrency=options["concurrency"],
+            poll_interval=0.05,
+            only_ids=[e.id for e in encounters],
+        )
+        with override_settings(FAKE_TRANSCRIPTION_WORDS=words):
+            asyncio.run(runner.run(drain=True))
+
+        failures = 0
+        for encounter in Encounter.objects.filter(id__in=[e.id for e in encounters]):
+            if encounter.status != Encounter.Status.COMPLETED:
+                failures += 1
+                self.stderr.write(f"  [{encounter.id}] failed: {encounter.error_message}")
+                continue
+            if not options["no_pdf"]:
+                generate_pdf_bytes(encounter)
+            # Per-encounter total = sum of its stage wall times (stages overlap across encounters)
+            total = self._collect_stages(encounter, samples, cpu_samples)
+            samples["total"].append(total)
+            by_length[words].append(total)
+        return failures
+
+    def _report(self, results: dict):
+        self.stdout.write(
+            f"\n{results['completed']} completed, {results['failed']} failed in "
+            f"{results['wall_seconds']:.1f}s — "
+            f"{results['encounters_per_minute'] or 0:.1f} encounters/min, "
+            f"peak RSS {results['peak_rss_mb']:.0f} MB\n"
+        )
+        self.stdout.write(f"{'stage':<15}{'n':>6}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+        for stage, stats in results["stages_ms"].items():
+            if not stats["count"]:
+                continue
+            self.stdout.write(
+                f"{stage:<15}{stats['count']:>6}"
+                f"{stats['p50']:>12.1f}{stats['p95']:>12.1f}{stats['p99']:>12.1f}"
+            )
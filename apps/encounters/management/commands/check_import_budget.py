@@ -0,0 +1,109 @@
+"""
+Import-time budget for the web tier.
+
+Boots config.wsgi and loads the URLconf (everything a gunicorn worker
+imports before its first response) in fresh interpreters, and fails if
+
+  • the fastest of --runs boots exceeds IMPORT_BUDGET_MS, or
+  • a provider SDK that the web tier never calls got imported
+    (they are deferred to first use in the services).
+
+    python manage.py check_import_budget --runs 5
+
+Exit status is non-zero on failure, so CI can run it as a test. The
+heaviest top-level imports of the last run are listed to show what to
+defer next.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Imported lazily by apps/encounters/services/* — must not load at boot
+PROVIDER_MODULES = (
+    "assemblyai",
+    "groq",
+    "boto3",
+    "botocore",
+    "presidio_analyzer",
+    "presidio_anonymizer",
+    "spacy",
+    "faster_whisper",
+    "weasyprint",
+    "numpy",
+)
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import config.wsgi
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({"ms": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+# "import time: self [us] | cumulative | imported package"
+_IMPORTTIME = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)")
+
+
+class Command(BaseCommand):
+    help = "Fail if booting config.wsgi exceeds the import-time budget or imports provider SDKs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to boot; the fastest counts.")
+        parser.add_argument("--budget-ms", type=float, default=None,
+                            help="Override IMPORT_BUDGET_MS.")
+        parser.add_argument("--top", type=int, default=15, help="Heaviest top-level imports to list.")
+
+    def handle(self, *args, **options):
+        budget = options["budget_ms"] or settings.IMPORT_BUDGET_MS
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get(
+            "DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE,
+        )}
+
+        timings = []
+        for _ in range(max(options["runs"], 1)):
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", _PROBE],
+                capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+            )
+            if proc.returncode:
+                raise CommandError(f"Booting config.wsgi failed:\n{proc.stderr[-2000:]}")
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            timings.append(result["ms"])
+
+        self._report_top_imports(proc.stderr, options["top"])
+        best = min(timings)
+        self.stdout.write(
+            f"\nconfig.wsgi + URLconf boot: best {best:.0f} ms of {len(timings)} "
+            f"(all: {', '.join(f'{ms:.0f}' for ms in timings)}), budget {budget:.0f} ms"
+        )
+
+        loaded = sorted(
+            name for name in PROVIDER_MODULES if name in result["modules"]
+        )
+        problems = []
+        if loaded:
+            problems.append(f"provider SDKs imported at boot: {', '.join(loaded)}")
+        if best > budget:
+            problems.append(f"boot took {best:.0f} ms, over the {budget:.0f} ms budget")
+        if problems:
+            raise CommandError("Import budget exceeded — " + "; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Import budget OK."))
+
+    def _report_top_imports(self, importtime_log: str, top: int):
+        # Top-level imports are the ones indented by a single space
+        rows = [
+            (int(cumulative), name)
+            for cumulative, indent, name in _IMPORTTIME.findall(importtime_log)
+            if len(indent) == 1
+        ]
+        self.stdout.write(f"{'module':<45}{'cumulative ms':>15}")
+        for cumulative, name in sorted(rows, reverse=True)[:top]:
+            self.stdout.write(f"{name:<45}{cumulative / 1000:>15.1f}")
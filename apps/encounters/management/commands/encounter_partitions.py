@@ -0,0 +1,74 @@
+"""
+Inspect and maintain the monthly encounter partitions (PostgreSQL).
+
+    python manage.py encounter_partitions                    # premake + list
+    python manage.py encounter_partitions --convert          # partition existing tables
+    python manage.py encounter_partitions --detach-before 2025-01
+    python manage.py encounter_partitions --drop-detached    # after pg_dump of the archives
+
+See apps/encounters/services/partitions.py.
+"""
+
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.encounters.services.partitions import (
+    PARTITIONED_TABLES,
+    attached_partitions,
+    convert_tables,
+    detach_partitions,
+    detached_partitions,
+    drop_detached,
+    ensure_partitions,
+    is_partitioned,
+)
+
+
+class Command(BaseCommand):
+    help = "Create, list, detach or drop monthly encounter partitions on PostgreSQL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convert", action="store_true",
+                            help="Partition the encounter tables, copying existing rows.")
+        parser.add_argument("--months-ahead", type=int, default=None,
+                            help="Months of partitions to create ahead (default: ENCOUNTER_PARTITION_PREMAKE_MONTHS).")
+        parser.add_argument("--detach-before", default="",
+                            help="YYYY-MM; detach every partition for an earlier month.")
+        parser.add_argument("--drop-detached", action="store_true",
+                            help="DROP archive tables left by earlier detaches.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning needs PostgreSQL.")
+
+        with transaction.atomic():
+            if options["convert"]:
+                converted = convert_tables()
+                self.stdout.write(f"Converted: {', '.join(converted) or 'nothing (already partitioned)'}")
+            if not is_partitioned():
+                raise CommandError("The encounter tables are not partitioned; run with --convert first.")
+
+            created = ensure_partitions(months_ahead=options["months_ahead"])
+            if created:
+                self.stdout.write(f"Created {len(created)} partitions.")
+            if options["detach_before"]:
+                try:
+                    before = datetime.strptime(options["detach_before"], "%Y-%m").replace(tzinfo=timezone.utc)
+                except ValueError:
+                    raise CommandError(f"Invalid --detach-before month: {options['detach_before']}")
+                detached = detach_partitions(before)
+                self.stdout.write(f"Detached {len(detached)} partitions (kept as archive tables).")
+            if options["drop_detached"]:
+                dropped = drop_detached()
+                self.stdout.write(f"Dropped {len(dropped)} archive tables.")
+
+        with connection.cursor() as cursor:
+            for table in PARTITIONED_TABLES:
+                partitions = attached_partitions(cursor, table)
+                self.stdout.write(f"  {table:<28}{len(partitions):>4} partitions  "
+                                  f"{partitions[0]} … {partitions[-1]}")
+            archives = detached_partitions(cursor)
+        if archives:
+            self.stdout.write(f"Archive tables: {', '.join(archives)}")
@@ -0,0 +1,256 @@
+"""
+HTTP load test for the web tier, modelling clinician behaviour.
+
+Each virtual clinician logs in with a session, then loops until the run ends:
+  • upload a recording (POST /api/encounters/, multipart)
+  • poll GET /api/encounters/<id>/ every --poll-interval seconds until
+    COMPLETED / FAILED, then download the PDF
+  • browse the dashboard and open past encounters in between
+
+Run it against a local server that uses the stub providers, e.g.
+
+    export DJANGO_SETTINGS_MODULE=config.settings.development
+    export TRANSCRIPTION_BACKEND=fake SOAP_BACKEND=fake FAKE_TRANSCRIPTION_LATENCY=5
+    gunicorn config.wsgi:application --workers 2 --bind 127.0.0.1:8000 &
+    celery -A config worker --concurrency=2 &
+    python manage.py loadtest --users 10 --duration 120
+
+The command seeds its users through the ORM, so it must point at the same
+database as the server. Per-endpoint latency percentiles, error rates and
+DB queries per request (from the X-DB-Queries header, see
+apps.monitoring.middleware.QueryCountMiddleware) are printed and written as JSON.
+"""
+
+import io
+import json
+import random
+import threading
+import time
+import wave
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from ._stats import git_revision, summarize
+
+LOADTEST_PASSWORD = "loadtest-password"
+
+
+def _silent_wav(seconds: float = 1.0, rate: int = 16000) -> bytes:
+    """A tiny valid WAV file to upload — the stub backends never decode it."""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buf.getvalue()
+
+
+class _Recorder:
+    """Thread-safe collection of (endpoint, latency, status, db queries) samples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency_ms: dict[str, list[float]] = defaultdict(list)
+        self.queries: dict[str, list[int]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.turnaround_s: list[float] = []
+
+    def record(self, endpoint: str, elapsed_ms: float, response):
+        with self._lock:
+            self.latency_ms[endpoint].append(elapsed_ms)
+            if response is None or response.status_code >= 400:
+                self.errors[endpoint] += 1
+            if response is not None and "X-DB-Queries" in response.headers:
+                self.queries[endpoint].append(int(response.headers["X-DB-Queries"]))
+
+    def record_turnaround(self, seconds: float):
+        with self._lock:
+            self.turnaround_s.append(seconds)
+
+
+class _Clinician(threading.Thread):
+    """One virtual user driving the upload → poll → PDF and browsing flows."""
+
+    def __init__(self, base_url, email, options, recorder, deadline, audio):
+        super().__init__(daemon=True)
+        self.base_url = base_url.rstrip("/")
+        self.email = email
+        self.options = options
+        self.recorder = recorder
+        self.deadline = deadline
+        self.audio = audio
+        self.session = requests.Session()
+        self.encounter_ids: list[str] = []
+
+    def _request(self, endpoint, method, path, **kwargs):
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=60, **kwargs)
+        except requests.RequestException:
+            pass
+        self.recorder.record(endpoint, (time.perf_counter() - start) * 1000, response)
+        return response
+
+    def _csrf_headers(self):
+        return {"X-CSRFToken": self.session.cookies.get("csrftoken", "")}
+
+    def login(self) -> bool:
+        self._request("login_page", "GET", "/login/")
+        response = self._request(
+            "login", "POST", "/login/",
+            data={
+                "email": self.email,
+                "password": LOADTEST_PASSWORD,
+                "csrfmiddlewaretoken": self.session.cookies.get("csrftoken", ""),
+            },
+            headers={"Referer": self.base_url + "/login/"},
+            allow_redirects=False,
+        )
+        return response is not None and response.status_code == 302
+
+    def upload_and_wait(self):
+        response = self._request(
+            "upload", "POST", "/api/encounters/",
+            files={"audio_file": ("consultation.wav", self.audio, "audio/wav")},
+            data={"patient_name": "Load Test", "patient_age": "42"},
+            headers=self._csrf_headers(),
+        )
+        if response is None or response.status_code != 201:
+            return
+        encounter_id = response.json()["id"]
+        self.encounter_ids.append(encounter_id)
+        started = time.monotonic()
+
+        while time.monotonic() < self.deadline:
+            time.sleep(self.options["poll_interval"])
+            poll = self._request("status_poll", "GET", f"/api/encounters/{encounter_id}/")
+            if poll is None or poll.status_code != 200:
+                continue
+            status = poll.json().get("status")
+            if status in ("COMPLETED", "FAILED"):
+                self.recorder.record_turnaround(time.monotonic() - started)
+                if status == "COMPLETED":
+                    self._request("pdf", "GET", f"/api/encounters/{encounter_id}/pdf/")
+                return
+
+    def browse(self):
+        self._request("dashboard", "GET", "/dashboard/")
+        if random.random() < 0.3:
+            self._request("dashboard", "GET", "/dashboard/?page=2")
+        if self.encounter_ids:
+            encounter_id = random.choice(self.encounter_ids)
+            self._request("encounter_page", "GET", f"/encounters/{encounter_id}/")
+
+    def run(self):
+        if not self.login():
+            return
+        while time.monotonic() < self.deadline:
+            if random.random() < self.options["upload_ratio"]:
+                self.upload_and_wait()
+            else:
+                self.browse()
+            time.sleep(random.uniform(0, self.options["think_time"] * 2))
+
+
+class Command(BaseCommand):
+    help = "Load-test upload, polling, dashboard and PDF endpoints against a running server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--users", type=int, default=5, help="Concurrent virtual clinicians.")
+        parser.add_argument("--duration", type=float, default=60, help="Run length in seconds.")
+        parser.add_argument("--poll-interval", type=float, default=3.0, help="Status poll period (s).")
+        parser.add_argument("--think-time", type=float, default=2.0, help="Mean pause between actions (s).")
+        parser.add_argument(
+            "--upload-ratio", type=float, default=0.3,
+            help="Probability that an action is an upload rather than browsing.",
+        )
+        parser.add_argument("--seed", type=int, default=None, help="Random seed for a repeatable mix.")
+        parser.add_argument("--output", default="", help="JSON results path (default: bench_results/…).")
+
+    def handle(self, *args, **options):
+        if options["seed"] is not None:
+            random.seed(options["seed"])
+
+        User = get_user_model()
+        emails = [f"loadtest-{n}@vitalnote.local" for n in range(options["users"])]
+        for email in emails:
+            user, _ = User.objects.get_or_create(email=email)
+            user.set_password(LOADTEST_PASSWORD)
+            user.save(update_fields=["password"])
+
+        recorder = _Recorder()
+        audio = _silent_wav()
+        deadline = time.monotonic() + options["duration"]
+        clinicians = [
+            _Clinician(options["base_url"], email, options, recorder, deadline, audio)
+            for email in emails
+        ]
+
+        self.stdout.write(
+            f"Running {len(clinicians)} clinicians against {options['base_url']} "
+            f"for {options['duration']:.0f}s…"
+        )
+        start = time.monotonic()
+        for clinician in clinicians:
+            clinician.start()
+        for clinician in clinicians:
+            # Upload polling may overrun the deadline by one poll interval
+            clinician.join(timeout=options["duration"] + options["poll_interval"] + 60)
+        wall_seconds = time.monotonic() - start
+
+        endpoints = {}
+        for endpoint, samples in sorted(recorder.latency_ms.items()):
+            queries = recorder.queries.get(endpoint, [])
+            endpoints[endpoint] = {
+                "latency_ms": summarize(samples),
+                "requests_per_second": len(samples) / wall_seconds,
+                "error_rate": recorder.errors[endpoint] / len(samples),
+                "db_queries_mean": sum(queries) / len(queries) if queries else None,
+                "db_queries_max": max(queries) if queries else None,
+            }
+        results = {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "params": {k: options[k] for k in (
+                "base_url", "users", "duration", "poll_interval", "think_time", "upload_ratio", "seed",
+            )},
+            "wall_seconds": wall_seconds,
+            "endpoints": endpoints,
+            "turnaround_s": summarize(recorder.turnaround_s),
+        }
+
+        self._report(results)
+        output = Path(options["output"] or (
+            f"bench_results/loadtest_{datetime.now():%Y%m%d_%H%M%S}.json"
+        ))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    def _report(self, results: dict):
+        self.stdout.write(
+            f"\n{'endpoint':<16}{'n':>7}{'err %':>8}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'queries':>9}"
+        )
+        for endpoint, stats in results["endpoints"].items():
+            latency = stats["latency_ms"]
+            queries = stats["db_queries_mean"]
+            self.stdout.write(
+                f"{endpoint:<16}{latency['count']:>7}{stats['error_rate'] * 100:>8.1f}"
+                f"{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}"
+                f"{queries if queries is None else round(queries, 1)!s:>9}"
+            )
+        turnaround = results["turnaround_s"]
+        if turnaround["count"]:
+            self.stdout.write(
+                f"\nUpload → terminal status: p50 {turnaround['p50']:.1f}s, "
+                f"p95 {turnaround['p95']:.1f}s over {turnaround['count']} encounters"
+            )
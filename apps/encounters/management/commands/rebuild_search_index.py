@@ -0,0 +1,34 @@
+"""
+(Re)build the full-text search index from existing SOAP notes and transcripts.
+
+    python manage.py rebuild_search_index [--user-email doctor@example.com]
+
+New notes are indexed as they are written; run this once after migrating,
+and again after changing SEARCH_TEXT_CONFIG.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.encounters.models import Encounter
+from apps.encounters.services.search import index_encounter
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SOAP note / transcript search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user-email", default="", help="Only reindex this user's encounters.")
+
+    def handle(self, *args, **options):
+        qs = Encounter.objects.filter(Q(soap_note__isnull=False) | Q(transcript__isnull=False))
+        if options["user_email"]:
+            qs = qs.filter(user__email=options["user_email"])
+
+        count = 0
+        for encounter_id in qs.values_list("id", flat=True).iterator(chunk_size=500):
+            index_encounter(encounter_id)
+            count += 1
+            if count % 500 == 0:
+                self.stdout.write(f"  {count} encounters indexed…")
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} encounters."))
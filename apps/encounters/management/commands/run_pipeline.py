@@ -0,0 +1,57 @@
+"""
+Run the asyncio pipeline runner (PIPELINE_RUNNER=async).
+
+    PIPELINE_RUNNER=async python manage.py run_pipeline --concurrency 48
+
+One process multiplexes many encounters; run several for more redaction
+CPU. SIGINT / SIGTERM stop claiming new work and let in-flight encounters
+finish. See apps/encounters/async_runner.py.
+"""
+
+import asyncio
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.encounters.async_runner import AsyncPipelineRunner
+
+
+class Command(BaseCommand):
+    help = "Process encounters with the asyncio runner instead of Celery workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=None,
+                            help="Encounters in flight (default: PIPELINE_ASYNC_CONCURRENCY).")
+        parser.add_argument("--soap-concurrency", type=int, default=None,
+                            help="Concurrent Groq calls (default: PIPELINE_ASYNC_SOAP_CONCURRENCY).")
+        parser.add_argument("--redaction-threads", type=int, default=None,
+                            help="Redaction thread pool size (default: PIPELINE_REDACTION_THREADS).")
+        parser.add_argument("--poll-interval", type=float, default=2.0,
+                            help="Seconds between database polls when idle.")
+        parser.add_argument("--drain", action="store_true",
+                            help="Exit once no work is left instead of polling forever.")
+
+    def handle(self, *args, **options):
+        if settings.PIPELINE_RUNNER != "async":
+            raise CommandError(
+                "PIPELINE_RUNNER is not 'async' — uploads are still queued to Celery, "
+                "so this runner would process the same encounters as the workers."
+            )
+        runner = AsyncPipelineRunner(
+            concurrency=options["concurrency"],
+            soap_concurrency=options["soap_concurrency"],
+            redaction_threads=options["redaction_threads"],
+            poll_interval=options["poll_interval"],
+        )
+        self.stdout.write(
+            f"Async pipeline runner {runner.owner}: {runner.concurrency} encounters in flight, "
+            f"{runner.soap_concurrency} Groq calls, {runner.redaction_threads} redaction thread(s)."
+        )
+        asyncio.run(self._run(runner, options["drain"]))
+
+    async def _run(self, runner, drain):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, runner.stop)
+        await runner.run(drain=drain)
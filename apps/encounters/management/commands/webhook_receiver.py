@@ -0,0 +1,70 @@
+"""
+Local webhook receiver for trying out and testing outbound webhooks.
+
+    python manage.py webhook_receiver --port 8765 --secret <endpoint secret>
+
+Register http://localhost:8765/ as an endpoint (WEBHOOK_ALLOW_HTTP and
+WEBHOOK_ALLOW_PRIVATE_HOSTS are on when DEBUG is) and every delivery is printed with its signature check. --fail-rate
+answers a share of deliveries with 503 to exercise retries and backoff.
+"""
+
+import json
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from apps.encounters.services.webhooks import SIGNATURE_HEADER, TIMESTAMP_HEADER, verify_signature
+
+
+class Command(BaseCommand):
+    help = "Run a local HTTP server that receives and verifies VitalNote webhooks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--secret", default="", help="Endpoint secret; signatures are checked when given.")
+        parser.add_argument(
+            "--fail-rate", type=float, default=0.0,
+            help="Share of deliveries (0–1) answered with 503 to test retries.",
+        )
+
+    def handle(self, *args, **options):
+        command = self
+        secret, fail_rate = options["secret"], options["fail_rate"]
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if secret and not verify_signature(
+                    secret, self.headers.get(TIMESTAMP_HEADER), body, self.headers.get(SIGNATURE_HEADER),
+                ):
+                    command.stdout.write(command.style.ERROR("Rejected delivery: bad signature"))
+                    return self._reply(401)
+                if random.random() < fail_rate:
+                    command.stdout.write(command.style.WARNING("Simulated failure → 503"))
+                    return self._reply(503)
+
+                delivery = json.loads(body)
+                command.stdout.write(
+                    command.style.SUCCESS(f"Delivery {delivery['delivery_id']}: {len(delivery['events'])} event(s)")
+                )
+                for event in delivery["events"]:
+                    data = event["data"]
+                    command.stdout.write(f"  {event['type']:<20} {data['encounter_id']}  {data['error_code']}")
+                self._reply(204)
+
+            def _reply(self, code):
+                self.send_response(code)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass  # one line per delivery from do_POST is enough
+
+        server = ThreadingHTTPServer(("127.0.0.1", options["port"]), Handler)
+        self.stdout.write(f"Receiving webhooks on http://127.0.0.1:{options['port']}/ (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
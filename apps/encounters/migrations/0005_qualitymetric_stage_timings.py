@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0004_add_patient_name_age'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='pdf_cpu_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='pdf_peak_rss_mb',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='pdf_wall_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='queue_wait_ms',
+            field=models.FloatField(blank=True, help_text='Time from upload until a worker started the pipeline.', null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='redaction_cpu_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='redaction_peak_rss_mb',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='redaction_wall_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='soap_cpu_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='soap_peak_rss_mb',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='soap_wall_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='transcription_cpu_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='transcription_peak_rss_mb',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='qualitymetric',
+            name='transcription_wall_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
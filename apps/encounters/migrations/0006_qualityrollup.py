@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0005_qualitymetric_stage_timings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='qualitymetric',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='QualityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('groq_model', models.CharField(blank=True, default='', max_length=100)),
+                ('encounter_count', models.IntegerField(default=0)),
+                ('avg_confidence', models.FloatField(blank=True, null=True)),
+                ('avg_word_count', models.FloatField(blank=True, null=True)),
+                ('avg_sections_complete', models.FloatField(blank=True, null=True)),
+                ('total_prompt_tokens', models.BigIntegerField(default=0)),
+                ('total_completion_tokens', models.BigIntegerField(default=0)),
+                ('avg_queue_wait_ms', models.FloatField(blank=True, null=True)),
+                ('avg_transcription_ms', models.FloatField(blank=True, null=True)),
+                ('avg_redaction_ms', models.FloatField(blank=True, null=True)),
+                ('avg_soap_ms', models.FloatField(blank=True, null=True)),
+                ('max_transcription_ms', models.FloatField(blank=True, null=True)),
+                ('max_redaction_ms', models.FloatField(blank=True, null=True)),
+                ('max_soap_ms', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Quality Rollup',
+                'verbose_name_plural': 'Quality Rollups',
+                'ordering': ['-day', 'groq_model'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'groq_model'), name='unique_rollup_day_model')],
+            },
+        ),
+    ]
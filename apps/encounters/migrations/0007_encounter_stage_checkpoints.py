@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:26
+
+from django.db import migrations, models
+
+
+def backfill_checkpoints(apps, schema_editor):
+    """Derive last_completed_stage from status, or from saved outputs for FAILED rows."""
+    Encounter = apps.get_model("encounters", "Encounter")
+    by_status = {"TRANSCRIBED": "transcription", "REDACTED": "redaction", "COMPLETED": "soap"}
+    for status, stage in by_status.items():
+        Encounter.objects.filter(status=status).update(last_completed_stage=stage, attempt_count=1)
+
+    failed = Encounter.objects.filter(status="FAILED")
+    failed.update(attempt_count=1)
+    failed.filter(transcript__isnull=False).update(last_completed_stage="transcription")
+    failed.filter(transcript__isnull=False).exclude(transcript__redacted_text="").update(
+        last_completed_stage="redaction"
+    )
+    failed.filter(soap_note__isnull=False).update(last_completed_stage="soap")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0006_qualityrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encounter',
+            name='attempt_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of times the pipeline has started for this encounter.'),
+        ),
+        migrations.AddField(
+            model_name='encounter',
+            name='last_completed_stage',
+            field=models.CharField(blank=True, choices=[('transcription', 'Transcription'), ('redaction', 'Redaction'), ('soap', 'SOAP generation')], default='', help_text='Furthest pipeline stage whose output has been saved.', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='encounter',
+            name='stage_errors',
+            field=models.JSONField(blank=True, default=dict, help_text='Last error per stage, cleared when the stage succeeds.'),
+        ),
+        migrations.RunPython(backfill_checkpoints, migrations.RunPython.noop),
+    ]
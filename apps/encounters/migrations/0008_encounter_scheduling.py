@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0007_encounter_stage_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encounter',
+            name='queue_priority',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Broker priority the pipeline was enqueued with (0 = most urgent).', null=True),
+        ),
+        migrations.AddField(
+            model_name='encounter',
+            name='source',
+            field=models.CharField(choices=[('live', 'Recorded live'), ('upload', 'Uploaded file')], default='upload', help_text='Live browser recordings are scheduled ahead of file uploads.', max_length=10),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0009_encounter_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encounter',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='encounter',
+            name='lease_owner',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0010_encounter_lease'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encounter',
+            name='audio_sha256',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the audio bytes, used to skip reprocessing identical uploads.', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='encounter',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='Completed encounter with identical audio whose outputs were cloned.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='encounters.encounter'),
+        ),
+        migrations.AddIndex(
+            model_name='encounter',
+            index=models.Index(fields=['user', 'audio_sha256'], name='encounter_user_sha256_idx'),
+        ),
+    ]
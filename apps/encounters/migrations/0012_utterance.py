@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _split_turn(line):
+    speaker, sep, text = line.partition(": ")
+    if sep and speaker in ("DOCTOR", "PATIENT"):
+        return speaker, text
+    return "", line
+
+
+def backfill_utterances(apps, schema_editor):
+    """Split existing labelled transcripts into utterances (no timings or confidence)."""
+    Transcript = apps.get_model("encounters", "Transcript")
+    Utterance = apps.get_model("encounters", "Utterance")
+    batch = []
+    for transcript in Transcript.objects.only("id", "raw_text", "redacted_text").iterator(chunk_size=200):
+        raw_lines = [line for line in transcript.raw_text.split("\n") if line.strip()]
+        redacted_lines = [line for line in transcript.redacted_text.split("\n") if line.strip()]
+        if len(redacted_lines) != len(raw_lines):
+            redacted_lines = [""] * len(raw_lines)  # cannot be aligned line by line
+        for index, (raw, redacted) in enumerate(zip(raw_lines, redacted_lines)):
+            speaker, raw_text = _split_turn(raw)
+            batch.append(Utterance(
+                transcript_id=transcript.id,
+                index=index,
+                speaker=speaker,
+                raw_text=raw_text,
+                redacted_text=_split_turn(redacted)[1] if redacted else "",
+            ))
+        if len(batch) >= 1000:
+            Utterance.objects.bulk_create(batch)
+            batch = []
+    Utterance.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0011_encounter_audio_sha256'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Utterance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(help_text='Position within the transcript, from 0.')),
+                ('speaker', models.CharField(blank=True, default='', max_length=20)),
+                ('start_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('end_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('raw_text', models.TextField()),
+                ('redacted_text', models.TextField(blank=True, default='')),
+                ('confidence', models.FloatField(blank=True, null=True)),
+                ('transcript', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='utterances', to='encounters.transcript')),
+            ],
+            options={
+                'ordering': ['transcript', 'index'],
+                'constraints': [models.UniqueConstraint(fields=('transcript', 'index'), name='utterance_transcript_index_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_utterances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0012_utterance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcript',
+            name='word_timings',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
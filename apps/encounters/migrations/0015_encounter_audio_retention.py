@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0014_search_document'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encounter',
+            name='audio_retention_at',
+            field=models.DateTimeField(blank=True, help_text='When the retention policy archived or deleted the audio.', null=True),
+        ),
+        migrations.AddField(
+            model_name='encounter',
+            name='audio_status',
+            field=models.CharField(choices=[('stored', 'Stored'), ('archived', 'Archived'), ('deleted', 'Deleted')], default='stored', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='encounter',
+            index=models.Index(fields=['audio_status', 'status', 'updated_at'], name='encounter_retention_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0015_encounter_audio_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encounter',
+            name='deferred_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Accepted over the admission limits; not queued until there is capacity.', null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0016_encounter_deferred_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='encounter',
+            index=models.Index(fields=['status', 'updated_at'], name='encounter_status_updated_idx'),
+        ),
+    ]
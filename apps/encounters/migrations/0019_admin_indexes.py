@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_trigram_index(apps, schema_editor):
+    """
+    Admin search runs icontains, i.e. UPPER(col::text) LIKE UPPER('%term%');
+    a pg_trgm GIN index on the same expression serves it. PostgreSQL only;
+    the extension is created by users 0002.
+    """
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX encounter_filename_trgm_idx ON encounters_encounter "
+            "USING gin ((UPPER(original_filename::text)) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS encounter_filename_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0018_webhooks'),
+        ('users', '0002_email_trigram_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.AddIndex(
+            model_name='encounter',
+            index=models.Index(fields=['user', '-created_at'], name='encounter_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='encounter',
+            index=models.Index(fields=['status', '-created_at'], name='encounter_status_created_idx'),
+        ),
+    ]
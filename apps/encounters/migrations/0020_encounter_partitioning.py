@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:20
+
+from django.conf import settings
+from django.db import migrations
+
+
+def partition_tables(apps, schema_editor):
+    """
+    Opt-in (ENCOUNTER_PARTITIONING) and PostgreSQL only: convert the encounter
+    tables to monthly partitions and create ENCOUNTER_PARTITION_PREMAKE_MONTHS
+    of partitions ahead. See apps/encounters/services/partitions.py.
+    """
+    if not settings.ENCOUNTER_PARTITIONING or schema_editor.connection.vendor != "postgresql":
+        return
+    from apps.encounters.services.partitions import convert_tables
+
+    convert_tables(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0019_admin_indexes'),
+    ]
+
+    operations = [
+        # Not reversible in place: unpartitioning means copying the data back out
+        migrations.RunPython(partition_tables, migrations.RunPython.noop),
+    ]
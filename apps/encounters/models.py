@@ -1,7 +1,10 @@
+import secrets
 import uuid
 
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 
 
 def audio_upload_path(instance, filename):
@@ -9,10 +12,45 @@ def audio_upload_path(instance, filename):
     return f"audio/{instance.user.id}/{uuid.uuid4()}/{filename}"
 
 
+class EncounterBatch(models.Model):
+    """
+    A group of encounters imported together through the bulk upload API.
+    Progress is derived from the member encounters' statuses.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="encounter_batches",
+    )
+    label = models.CharField(max_length=200, blank=True, default="")
+    total = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name_plural = "Encounter batches"
+
+    def __str__(self):
+        return f"Batch {self.id} ({self.total} encounters)"
+
+    def status_counts(self) -> dict[str, int]:
+        """Number of member encounters per status, in a single query."""
+        rows = self.encounters.values("status").annotate(n=models.Count("id")).order_by()
+        counts = {status: 0 for status in Encounter.Status.values}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+
 class Encounter(models.Model):
     """
     Top-level record for a single doctor-patient consultation.
     Tracks the processing pipeline from PENDING → COMPLETED (or FAILED).
+
+    Stage checkpoints survive failures: last_completed_stage records the
+    furthest stage whose output is saved, so a retry or a manual reprocess
+    resumes right after it instead of paying for transcription again.
     """
 
     class Status(models.TextChoices):
@@ -22,6 +60,30 @@ class Encounter(models.Model):
         COMPLETED = "COMPLETED", "Completed"
         FAILED = "FAILED", "Failed"
 
+    class Source(models.TextChoices):
+        LIVE = "live", "Recorded live"
+        UPLOAD = "upload", "Uploaded file"
+        BULK = "bulk", "Bulk import"
+
+    class AudioStatus(models.TextChoices):
+        STORED = "stored", "Stored"
+        ARCHIVED = "archived", "Archived"  # moved under AUDIO_ARCHIVE_PREFIX
+        DELETED = "deleted", "Deleted"
+
+    class Stage(models.TextChoices):
+        # Declared in pipeline order
+        TRANSCRIPTION = "transcription", "Transcription"
+        REDACTION = "redaction", "Redaction"
+        SOAP = "soap", "SOAP generation"
+
+    # Status an encounter is in once the given stage (or none) has completed
+    STATUS_AFTER_STAGE = {
+        "": Status.PENDING,
+        Stage.TRANSCRIPTION: Status.TRANSCRIBED,
+        Stage.REDACTION: Status.REDACTED,
+        Stage.SOAP: Status.COMPLETED,
+    }
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -36,24 +98,127 @@ class Encounter(models.Model):
     )
     audio_file = models.FileField(upload_to=audio_upload_path)
     original_filename = models.CharField(max_length=255)
+    audio_sha256 = models.CharField(
+        max_length=64, blank=True, default="",
+        help_text="SHA-256 of the audio bytes, used to skip reprocessing identical uploads.",
+    )
+    duplicate_of = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name="duplicates",
+        help_text="Completed encounter with identical audio whose outputs were cloned.",
+    )
     patient_name = models.CharField(max_length=200, blank=True, default="")
     patient_age = models.PositiveSmallIntegerField(null=True, blank=True)
     error_message = models.TextField(blank=True, default="")
+
+    # ── Scheduling ────────────────────────────────────────────────────────────
+    source = models.CharField(
+        max_length=10, choices=Source.choices, default=Source.UPLOAD,
+        help_text="Live browser recordings are scheduled ahead of file uploads.",
+    )
+    queue_priority = models.PositiveSmallIntegerField(
+        null=True, blank=True,
+        help_text="Broker priority the pipeline was enqueued with (0 = most urgent).",
+    )
+    # Claimed by an asyncio runner (PIPELINE_RUNNER=async) until lease_expires_at;
+    # after a failure the lease doubles as the retry delay.
+    lease_owner = models.CharField(max_length=100, blank=True, default="")
+    lease_expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    deferred_at = models.DateTimeField(
+        null=True, blank=True, db_index=True,
+        help_text="Accepted over the admission limits; not queued until there is capacity.",
+    )
+    batch = models.ForeignKey(
+        EncounterBatch,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name="encounters",
+    )
+
+    # ── Audio retention ───────────────────────────────────────────────────────
+    # Set by the retention task (services/retention.py) once the audio is moved or deleted
+    audio_status = models.CharField(
+        max_length=10, choices=AudioStatus.choices, default=AudioStatus.STORED,
+    )
+    audio_retention_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the retention policy archived or deleted the audio.",
+    )
+
+    # ── Pipeline checkpoints ──────────────────────────────────────────────────
+    last_completed_stage = models.CharField(
+        max_length=20, choices=Stage.choices, blank=True, default="",
+        help_text="Furthest pipeline stage whose output has been saved.",
+    )
+    attempt_count = models.PositiveIntegerField(
+        default=0, help_text="Number of times the pipeline has started for this encounter.",
+    )
+    stage_errors = models.JSONField(
+        default=dict, blank=True, help_text="Last error per stage, cleared when the stage succeeds.",
+    )
+
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Duplicate lookups are per user
+            models.Index(fields=["user", "audio_sha256"], name="encounter_user_sha256_idx"),
+            # Retention candidates: stored audio of finished encounters, oldest first
+            models.Index(fields=["audio_status", "status", "updated_at"], name="encounter_retention_idx"),
+            # Incremental export: completed encounters by high-water mark
+            models.Index(fields=["status", "updated_at"], name="encounter_status_updated_idx"),
+            # Dashboard and admin changelists: newest first, per user or per status
+            models.Index(fields=["user", "-created_at"], name="encounter_user_created_idx"),
+            models.Index(fields=["status", "-created_at"], name="encounter_status_created_idx"),
+        ]
 
     def __str__(self):
         return f"Encounter {self.id} [{self.status}]"
 
+    def needs_stage(self, stage: str) -> bool:
+        """True if the stage comes after the last completed checkpoint."""
+        stages = self.Stage.values
+        done = stages.index(self.last_completed_stage) if self.last_completed_stage else -1
+        return stages.index(stage) > done
+
+    def resume_status(self) -> str:
+        """Status matching the last checkpoint (undoes FAILED before a retry)."""
+        return self.STATUS_AFTER_STAGE[self.last_completed_stage]
+
+    def rewind_to(self, stage: str):
+        """
+        Move the checkpoint back so the pipeline reruns from `stage` onwards,
+        with a fresh attempt budget. Raises ValueError if an earlier stage has
+        not completed yet.
+        """
+        stages = self.Stage.values
+        index = stages.index(stage)
+        if stage == self.Stage.TRANSCRIPTION and self.audio_status == self.AudioStatus.DELETED:
+            raise ValueError("Cannot reprocess from transcription: the audio was deleted by the retention policy.")
+        if index and self.needs_stage(stages[index - 1]):
+            raise ValueError(f"Cannot reprocess from {stage}: {stages[index - 1]} has not completed yet.")
+        self.last_completed_stage = stages[index - 1] if index else ""
+        self.status = self.resume_status()
+        self.error_message = ""
+        self.attempt_count = 0
+        self.stage_errors = {}
+
 
 class Transcript(models.Model):
     """
     Raw and PII-redacted transcript for an Encounter.
     raw_text contains DOCTOR:/PATIENT: speaker labels from AssemblyAI.
     redacted_text has all PII replaced with placeholder tags by Presidio.
+
+    The speaker turns themselves are stored as Utterance rows; raw_text and
+    redacted_text are derived from them on write and kept for compatibility
+    (PDF rendering, SOAP input, existing API clients).
+
+    word_timings holds per-word offsets and confidence as one packed blob
+    (see services/word_timings.py) — defer it on queries that don't need it.
     """
 
     encounter = models.OneToOneField(
@@ -63,12 +228,40 @@ class Transcript(models.Model):
     )
     raw_text = models.TextField()
     redacted_text = models.TextField(blank=True, default="")
+    word_timings = models.BinaryField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Transcript → {self.encounter.id}"
 
 
+class Utterance(models.Model):
+    """One speaker turn of a Transcript, in spoken order."""
+
+    transcript = models.ForeignKey(
+        Transcript,
+        on_delete=models.CASCADE,
+        related_name="utterances",
+    )
+    index = models.PositiveIntegerField(help_text="Position within the transcript, from 0.")
+    speaker = models.CharField(max_length=20, blank=True, default="")  # DOCTOR / PATIENT / "" if unknown
+    start_ms = models.PositiveIntegerField(null=True, blank=True)
+    end_ms = models.PositiveIntegerField(null=True, blank=True)
+    raw_text = models.TextField()
+    redacted_text = models.TextField(blank=True, default="")
+    confidence = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["transcript", "index"]
+        constraints = [
+            # Also the index behind keyset pagination (transcript, index > n)
+            models.UniqueConstraint(fields=["transcript", "index"], name="utterance_transcript_index_uniq"),
+        ]
+
+    def __str__(self):
+        return f"Utterance {self.index} → {self.transcript_id}"
+
+
 class SOAPNote(models.Model):
     """
     Structured SOAP note generated by Groq (Llama 3.3 70B)
@@ -90,6 +283,35 @@ class SOAPNote(models.Model):
         return f"SOAP Note → {self.encounter.id}"
 
 
+class SearchDocument(models.Model):
+    """
+    Full-text search entry for an Encounter: the SOAP note (weight A) and the
+    PII-redacted transcript (weight B) — never the raw transcript. Maintained
+    by apps.encounters.signals whenever a SOAPNote or Transcript is saved.
+
+    On PostgreSQL `vector` is a GIN-indexed tsvector. On SQLite the text goes
+    to the encounters_search_fts FTS5 table instead and `vector` stays null.
+    """
+
+    encounter = models.OneToOneField(
+        Encounter,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    # Denormalised so a search never joins Encounter to scope by owner
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document → {self.encounter_id}"
+
+
 class QualityMetric(models.Model):
     """
     Internal accuracy metrics for each processed encounter.
@@ -105,6 +327,11 @@ class QualityMetric(models.Model):
       - groq_prompt_tokens: tokens sent to Groq
       - groq_completion_tokens: tokens returned by Groq
       - groq_model: model name used for generation
+
+    Stage timings (see apps.encounters.instrumentation):
+      - queue_wait_ms: upload → first pipeline attempt picked up by a worker
+      - <stage>_wall_ms / _cpu_ms / _peak_rss_mb for transcription, redaction,
+        soap and pdf (pdf is the first render, on download)
     """
 
     _NOT_DOCUMENTED = "Not documented in this consultation."
@@ -134,7 +361,25 @@ class QualityMetric(models.Model):
     groq_completion_tokens = models.IntegerField(null=True, blank=True)
     groq_model = models.CharField(max_length=100, blank=True, default="")
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # ── Stage timings ─────────────────────────────────────────────────────────
+    queue_wait_ms = models.FloatField(
+        null=True, blank=True,
+        help_text="Time from upload until a worker started the pipeline.",
+    )
+    transcription_wall_ms = models.FloatField(null=True, blank=True)
+    transcription_cpu_ms = models.FloatField(null=True, blank=True)
+    transcription_peak_rss_mb = models.FloatField(null=True, blank=True)
+    redaction_wall_ms = models.FloatField(null=True, blank=True)
+    redaction_cpu_ms = models.FloatField(null=True, blank=True)
+    redaction_peak_rss_mb = models.FloatField(null=True, blank=True)
+    soap_wall_ms = models.FloatField(null=True, blank=True)
+    soap_cpu_ms = models.FloatField(null=True, blank=True)
+    soap_peak_rss_mb = models.FloatField(null=True, blank=True)
+    pdf_wall_ms = models.FloatField(null=True, blank=True)
+    pdf_cpu_ms = models.FloatField(null=True, blank=True)
+    pdf_peak_rss_mb = models.FloatField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
         verbose_name = "Quality Metric"
@@ -154,3 +399,129 @@ class QualityMetric(models.Model):
         if self.soap_sections_complete is not None:
             return f"{self.soap_sections_complete}/4 sections"
         return "N/A"
+
+    @property
+    def slowest_stage(self):
+        timings = {
+            "queue": self.queue_wait_ms,
+            "transcription": self.transcription_wall_ms,
+            "redaction": self.redaction_wall_ms,
+            "soap": self.soap_wall_ms,
+        }
+        timings = {stage: ms for stage, ms in timings.items() if ms is not None}
+        if not timings:
+            return "N/A"
+        stage = max(timings, key=timings.get)
+        return f"{stage} ({timings[stage] / 1000:.1f}s)"
+
+
+class QualityRollup(models.Model):
+    """
+    Daily aggregate of QualityMetric rows per SOAP model, maintained
+    incrementally by the rollup_quality_metrics periodic task so trend views
+    never scan the per-encounter table. Admin-only.
+    """
+
+    day = models.DateField()
+    groq_model = models.CharField(max_length=100, blank=True, default="")
+    encounter_count = models.IntegerField(default=0)
+
+    avg_confidence = models.FloatField(null=True, blank=True)
+    avg_word_count = models.FloatField(null=True, blank=True)
+    avg_sections_complete = models.FloatField(null=True, blank=True)
+    total_prompt_tokens = models.BigIntegerField(default=0)
+    total_completion_tokens = models.BigIntegerField(default=0)
+
+    avg_queue_wait_ms = models.FloatField(null=True, blank=True)
+    avg_transcription_ms = models.FloatField(null=True, blank=True)
+    avg_redaction_ms = models.FloatField(null=True, blank=True)
+    avg_soap_ms = models.FloatField(null=True, blank=True)
+    max_transcription_ms = models.FloatField(null=True, blank=True)
+    max_redaction_ms = models.FloatField(null=True, blank=True)
+    max_soap_ms = models.FloatField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-day", "groq_model"]
+        constraints = [
+            models.UniqueConstraint(fields=["day", "groq_model"], name="unique_rollup_day_model"),
+        ]
+        verbose_name = "Quality Rollup"
+        verbose_name_plural = "Quality Rollups"
+
+    def __str__(self):
+        return f"QualityRollup {self.day} [{self.groq_model or 'unknown'}]"
+
+
+# ── Webhooks ──────────────────────────────────────────────────────────────────
+
+
+def _webhook_secret() -> str:
+    return secrets.token_hex(32)
+
+
+class WebhookEndpoint(models.Model):
+    """
+    A URL of the user's that is notified when their encounters reach
+    COMPLETED or FAILED. Deliveries are signed with `secret` (HMAC-SHA256,
+    see services/webhooks.py) and carry ids only — never note content.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="webhook_endpoints",
+    )
+    url = models.URLField(max_length=500)
+    description = models.CharField(max_length=200, blank=True, default="")
+    secret = models.CharField(max_length=64, default=_webhook_secret, editable=False)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Webhook {self.url}"
+
+
+class WebhookEvent(models.Model):
+    """
+    Outbox row: one notification for one endpoint, written when the encounter
+    finishes and sent — batched with the endpoint's other due events — by
+    the deliver_webhooks task on the "webhooks" queue.
+    """
+
+    class Type(models.TextChoices):
+        COMPLETED = "encounter.completed", "Encounter completed"
+        FAILED = "encounter.failed", "Encounter failed"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        DELIVERED = "delivered", "Delivered"
+        FAILED = "failed", "Failed"  # gave up after WEBHOOK_MAX_ATTEMPTS
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    endpoint = models.ForeignKey(WebhookEndpoint, on_delete=models.CASCADE, related_name="events")
+    type = models.CharField(max_length=30, choices=Type.choices)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest next send; also leases the event to one delivery while it is in flight
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    delivery_id = models.UUIDField(null=True, blank=True, help_text="Batch of the most recent attempt.")
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # Due events of one endpoint, oldest first
+            models.Index(fields=["endpoint", "status", "next_attempt_at"], name="webhook_event_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.type} → {self.endpoint_id} [{self.status}]"
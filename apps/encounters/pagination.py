@@ -0,0 +1,50 @@
+"""
+Admin paginator that avoids exact COUNT(*) on large tables.
+
+The changelist counts its (filtered) queryset on every page load, and on
+PostgreSQL an exact count has to visit every matching row. On PostgreSQL
+EstimatedCountPaginator first asks the planner for its row estimate with
+EXPLAIN, which costs about as much as planning the query. If the estimate is
+above ADMIN_EXACT_COUNT_THRESHOLD, that estimate is used as the count.
+Otherwise the result set is small enough to count exactly. Page links past
+the end of an overestimate just render an empty page.
+
+Other databases (SQLite in development) always count exactly.
+"""
+
+import json
+import logging
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+def planner_estimate(queryset) -> int | None:
+    """Row estimate for the queryset from PostgreSQL's planner, or None elsewhere."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+    except DatabaseError as exc:
+        logger.warning(f"Planner row estimate failed, counting exactly: {exc}")
+        return None
+    if isinstance(plan, str):  # the driver did not decode the json column
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimate = planner_estimate(self.object_list)
+        if estimate is not None and estimate > settings.ADMIN_EXACT_COUNT_THRESHOLD:
+            return estimate
+        return super().count
@@ -0,0 +1,108 @@
+"""
+Fair scheduling of pipeline work across users.
+
+The Redis broker is configured with ten priority steps (0 = most urgent) and
+workers prefetch one task at a time, so a message's priority decides what a
+free worker picks up next. Priorities are assigned at enqueue time:
+
+  • live lane — recordings made in the browser during a consultation always
+    get priority 0 and overtake any backlog.
+  • upload lane — a user's n-th waiting upload gets priority
+    1 + n // PIPELINE_FAIR_SHARE_STEP (capped at 9). Every user's first
+    waiting upload therefore runs before anyone's second, which gives
+    round-robin across users: a clinic importing 200 recordings only
+    delays other clinicians by a handful of jobs, not by the whole batch.
+  • bulk lane — encounters from the bulk upload API are counted the same
+    way but start one level lower (2 + n // step), behind single uploads.
+
+Within one priority level Redis keeps FIFO order. With PIPELINE_RUNNER=async
+nothing is sent to Celery: the priority is only stored on the encounter and
+the asyncio runner claims work from the database in the same order. Queue wait per encounter
+is recorded on QualityMetric.queue_wait_ms and exported per lane as the
+vitalnote_pipeline_queue_wait_seconds histogram to check fairness holds.
+"""
+
+from django.conf import settings
+
+from .models import Encounter
+
+LIVE_PRIORITY = 0
+LOWEST_PRIORITY = 9
+
+# Priority of a user's first waiting encounter in each non-live lane
+_BASE_PRIORITY = {
+    Encounter.Source.UPLOAD: 1,
+    Encounter.Source.BULK: 2,
+}
+
+
+def waiting_uploads(user, before=None) -> int:
+    """
+    Uploads of this user still waiting for their first pipeline attempt,
+    optionally only those created before a given time.
+    """
+    qs = Encounter.objects.filter(
+        user=user,
+        status=Encounter.Status.PENDING,
+        attempt_count=0,
+    ).exclude(source=Encounter.Source.LIVE)
+    if before is not None:
+        qs = qs.filter(created_at__lt=before)
+    return qs.count()
+
+
+def _lane_priority(source: str, backlog: int) -> int:
+    if source == Encounter.Source.LIVE:
+        return LIVE_PRIORITY
+    return min(_BASE_PRIORITY[source] + backlog // settings.PIPELINE_FAIR_SHARE_STEP, LOWEST_PRIORITY)
+
+
+def priority_for(encounter: Encounter) -> int:
+    """Broker priority for a newly queued encounter (0 = most urgent)."""
+    if encounter.source == Encounter.Source.LIVE:
+        return LIVE_PRIORITY
+    backlog = waiting_uploads(encounter.user_id, before=encounter.created_at)
+    return _lane_priority(encounter.source, backlog)
+
+
+def next_priority(user, source: str) -> int:
+    """Priority a new encounter from this user in the given lane would be queued with."""
+    if source == Encounter.Source.LIVE:
+        return LIVE_PRIORITY
+    return _lane_priority(source, waiting_uploads(user))
+
+
+def batch_priorities(user, count: int) -> list[int]:
+    """Priorities for `count` new bulk encounters queued behind the user's backlog."""
+    backlog = waiting_uploads(user)
+    return [_lane_priority(Encounter.Source.BULK, backlog + i) for i in range(count)]
+
+
+def enqueue_encounter(encounter: Encounter, priority: int | None = None):
+    """Queue process_encounter for an encounter with its fair-share priority."""
+    from .tasks import process_encounter
+
+    if priority is None:
+        priority = priority_for(encounter)
+    Encounter.objects.filter(id=encounter.id).update(queue_priority=priority)
+    encounter.queue_priority = priority
+    if settings.PIPELINE_RUNNER == "async":
+        return None
+    return process_encounter.apply_async(args=[str(encounter.id)], priority=priority)
+
+
+def enqueue_batch(encounters):
+    """
+    Queue a bulk import as one Celery group. Each encounter must already
+    carry its queue_priority (see batch_priorities).
+    """
+    from celery import group
+
+    from .tasks import process_encounter
+
+    if settings.PIPELINE_RUNNER == "async":
+        return None
+    return group(
+        process_encounter.signature((str(e.id),), priority=e.queue_priority)
+        for e in encounters
+    ).apply_async()
@@ -1,6 +1,9 @@
+from django.conf import settings
 from rest_framework import serializers
 
-from .models import Encounter, SOAPNote, Transcript
+from .models import Encounter, EncounterBatch, SOAPNote, Transcript, Utterance, WebhookEndpoint
+from .services.storage import object_metadata
+from .services.webhooks import UnsafeWebhookURL, resolve_endpoint_address
 
 ALLOWED_AUDIO_TYPES = {
     "audio/mpeg",
@@ -16,6 +19,26 @@ ALLOWED_AUDIO_TYPES = {
     "video/mp4",
     "video/webm",
 }
+MAX_AUDIO_SIZE = 25 * 1024 * 1024  # 25 MB
+
+
+def validate_audio(value):
+    _check_audio(value.content_type, value.size)
+    return value
+
+
+def _check_audio(content_type: str, size: int):
+    if content_type not in ALLOWED_AUDIO_TYPES:
+        raise serializers.ValidationError(
+            "Unsupported file type. Please upload an MP3, WAV, M4A, or WebM file."
+        )
+    if size > MAX_AUDIO_SIZE:
+        raise serializers.ValidationError("File size must be under 25 MB.")
+
+
+def user_upload_prefix(user) -> str:
+    """Storage prefix a user's direct (pre-signed) uploads must live under."""
+    return f"audio/{user.id}/"
 
 
 class SOAPNoteSerializer(serializers.ModelSerializer):
@@ -30,10 +53,68 @@ class TranscriptSerializer(serializers.ModelSerializer):
         fields = ["raw_text", "redacted_text", "created_at"]
 
 
+class UtteranceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Utterance
+        fields = ["index", "speaker", "start_ms", "end_ms", "raw_text", "redacted_text", "confidence"]
+
+
+class UtteranceQuerySerializer(serializers.Serializer):
+    """Query parameters of the utterance endpoint: keyset page plus optional time window."""
+
+    after = serializers.IntegerField(min_value=-1, required=False, default=-1)
+    limit = serializers.IntegerField(min_value=1, max_value=500, required=False, default=100)
+    from_ms = serializers.IntegerField(min_value=0, required=False)
+    to_ms = serializers.IntegerField(min_value=0, required=False)
+
+
+class WordTimingsQuerySerializer(serializers.Serializer):
+    """Query parameters of the word timings endpoint."""
+
+    threshold = serializers.FloatField(min_value=0.0, max_value=1.0, required=False, default=0.6)
+    min_words = serializers.IntegerField(min_value=1, required=False, default=1)
+    at_ms = serializers.IntegerField(min_value=0, required=False)
+    packed = serializers.BooleanField(required=False, default=False)
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """Query parameters of the search endpoint."""
+
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=100, required=False, default=20)
+    offset = serializers.IntegerField(min_value=0, required=False, default=0)
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """Query parameters of the export endpoint."""
+
+    updated_after = serializers.DateTimeField(required=False, help_text="High-water mark of the previous export.")
+    export_format = serializers.ChoiceField(choices=["ndjson", "csv"], required=False, default="ndjson")
+    metrics = serializers.BooleanField(required=False, default=False, help_text="Include pipeline metrics (staff only).")
+
+
+class EncounterSearchResultSerializer(serializers.ModelSerializer):
+    rank = serializers.FloatField(source="search_rank", read_only=True)
+
+    class Meta:
+        model = Encounter
+        fields = ["id", "status", "original_filename", "patient_name", "created_at", "rank"]
+
+
 class EncounterSerializer(serializers.ModelSerializer):
+    """
+    Pass context={"include_transcript": False} to leave the transcript out —
+    status polling does not need it, and an hour-long one is large.
+    """
+
     soap_note = SOAPNoteSerializer(read_only=True)
     transcript = TranscriptSerializer(read_only=True)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get("include_transcript", True):
+            self.fields.pop("transcript")
+
     class Meta:
         model = Encounter
         fields = [
@@ -56,11 +137,184 @@ class EncounterCreateSerializer(serializers.Serializer):
     patient_age = serializers.IntegerField(min_value=0, max_value=150, required=False, allow_null=True, default=None)
 
     def validate_audio_file(self, value):
-        if value.content_type not in ALLOWED_AUDIO_TYPES:
+        return validate_audio(value)
+
+
+# ── Bulk upload ───────────────────────────────────────────────────────────────
+
+
+class ManifestItemSerializer(serializers.Serializer):
+    """
+    One manifest entry: either `file`, the name of a multipart part uploaded
+    in the same request, or `key`, a storage key returned by the upload-URL
+    endpoint after the client PUT the audio straight to R2.
+    """
+
+    file = serializers.CharField(required=False)
+    key = serializers.CharField(required=False)
+    original_filename = serializers.CharField(max_length=255, required=False)
+    patient_name = serializers.CharField(max_length=200, required=False, allow_blank=True, default="")
+    patient_age = serializers.IntegerField(min_value=0, max_value=150, required=False, allow_null=True, default=None)
+
+    def validate(self, attrs):
+        if ("file" in attrs) == ("key" in attrs):
+            raise serializers.ValidationError("Give exactly one of 'file' or 'key'.")
+        if "key" in attrs:
+            user = self.context["user"]
+            if not attrs["key"].startswith(user_upload_prefix(user)) or ".." in attrs["key"]:
+                raise serializers.ValidationError({"key": "Key is outside your upload area."})
+            # The client PUT the object itself, so apply the upload limits to what is stored
+            metadata = object_metadata(attrs["key"])
+            if metadata is None:
+                raise serializers.ValidationError({"key": "No uploaded object with this key."})
+            size, content_type = metadata
+            try:
+                _check_audio(content_type, size)
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError({"key": exc.detail})
+        return attrs
+
+
+class BulkUploadSerializer(serializers.Serializer):
+    """
+    multipart: `manifest` (JSON list) plus any number of `files` parts;
+    application/json: `manifest` with key-only entries.
+    Validated as a whole — one bad entry rejects the batch.
+    """
+
+    label = serializers.CharField(max_length=200, required=False, allow_blank=True, default="")
+    manifest = serializers.JSONField()
+    files = serializers.ListField(child=serializers.FileField(), required=False, default=list)
+
+    def validate_manifest(self, value):
+        if not isinstance(value, list) or not value:
+            raise serializers.ValidationError("Manifest must be a non-empty list.")
+        if len(value) > settings.BULK_UPLOAD_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"At most {settings.BULK_UPLOAD_MAX_ITEMS} encounters per batch."
+            )
+        items = ManifestItemSerializer(data=value, many=True, context=self.context)
+        items.is_valid(raise_exception=True)
+        return items.validated_data
+
+    def validate_files(self, value):
+        for upload in value:
+            try:
+                validate_audio(upload)
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError({upload.name: exc.detail})
+        return value
+
+    def validate(self, attrs):
+        files = {}
+        for upload in attrs["files"]:
+            if upload.name in files:
+                raise serializers.ValidationError({"files": f"Duplicate file name '{upload.name}'."})
+            files[upload.name] = upload
+
+        # Each storage object backs one encounter: deleting its audio must not break another
+        keys = [item["key"] for item in attrs["manifest"] if "key" in item]
+        taken = set(Encounter.objects.filter(audio_file__in=keys).values_list("audio_file", flat=True))
+
+        referenced = set()
+        keyed = set()
+        errors = {}
+        for index, item in enumerate(attrs["manifest"]):
+            if "key" in item:
+                if item["key"] in taken:
+                    errors[index] = f"Key '{item['key']}' is already used by another encounter."
+                elif item["key"] in keyed:
+                    errors[index] = f"Key '{item['key']}' is referenced twice."
+                keyed.add(item["key"])
+                continue
+            if item["file"] not in files:
+                errors[index] = f"No uploaded file named '{item['file']}'."
+            elif item["file"] in referenced:
+                errors[index] = f"File '{item['file']}' is referenced twice."
+            referenced.add(item["file"])
+        if errors:
+            raise serializers.ValidationError({"manifest": errors})
+        unused = set(files) - referenced
+        if unused:
             raise serializers.ValidationError(
-                "Unsupported file type. Please upload an MP3, WAV, M4A, or WebM file."
+                {"files": f"Not referenced in the manifest: {', '.join(sorted(unused))}."}
             )
-        max_size = 25 * 1024 * 1024  # 25 MB
-        if value.size > max_size:
-            raise serializers.ValidationError("File size must be under 25 MB.")
+        attrs["files"] = files
+        return attrs
+
+
+class UploadURLRequestSerializer(serializers.Serializer):
+    filenames = serializers.ListField(
+        child=serializers.CharField(max_length=255), allow_empty=False,
+    )
+    content_type = serializers.ChoiceField(choices=sorted(ALLOWED_AUDIO_TYPES), default="audio/mpeg")
+
+    def validate_filenames(self, value):
+        if len(value) > settings.BULK_UPLOAD_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"At most {settings.BULK_UPLOAD_MAX_ITEMS} files per request."
+            )
+        return value
+
+
+class EncounterBatchSerializer(serializers.ModelSerializer):
+    """Aggregate progress of a bulk import."""
+
+    counts = serializers.SerializerMethodField()
+    progress = serializers.SerializerMethodField()
+    finished = serializers.SerializerMethodField()
+    encounters = serializers.SerializerMethodField()
+
+    class Meta:
+        model = EncounterBatch
+        fields = ["id", "label", "total", "created_at", "counts", "progress", "finished", "encounters"]
+
+    def _counts(self, obj):
+        if not hasattr(obj, "_status_counts"):
+            obj._status_counts = obj.status_counts()
+        return obj._status_counts
+
+    def get_counts(self, obj):
+        return self._counts(obj)
+
+    def get_progress(self, obj):
+        """Fraction of encounters in a terminal state (COMPLETED or FAILED)."""
+        counts = self._counts(obj)
+        done = counts[Encounter.Status.COMPLETED] + counts[Encounter.Status.FAILED]
+        return round(done / obj.total, 4) if obj.total else 1.0
+
+    def get_finished(self, obj):
+        return self.get_progress(obj) >= 1.0
+
+    def get_encounters(self, obj):
+        return [
+            {"id": str(row["id"]), "status": row["status"], "original_filename": row["original_filename"]}
+            for row in obj.encounters.order_by("created_at", "id").values("id", "status", "original_filename")
+        ]
+
+
+# ── Webhooks ──────────────────────────────────────────────────────────────────
+
+
+class WebhookEndpointSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WebhookEndpoint
+        fields = ["id", "url", "description", "is_active", "created_at"]
+        read_only_fields = ["id", "created_at"]
+
+    def validate_url(self, value):
+        if not value.startswith("https://") and not settings.WEBHOOK_ALLOW_HTTP:
+            raise serializers.ValidationError("Webhook URLs must use https.")
+        try:
+            resolve_endpoint_address(value)
+        except UnsafeWebhookURL as exc:
+            raise serializers.ValidationError(str(exc))
         return value
+
+
+class WebhookEndpointCreatedSerializer(WebhookEndpointSerializer):
+    """Returned on creation only — the one time the signing secret is shown."""
+
+    class Meta(WebhookEndpointSerializer.Meta):
+        fields = [*WebhookEndpointSerializer.Meta.fields, "secret"]
+        read_only_fields = [*WebhookEndpointSerializer.Meta.read_only_fields, "secret"]
@@ -0,0 +1,142 @@
+"""
+Audio content-hash deduplication.
+
+Uploads are hashed while they stream in (see apps.encounters.uploadhandlers);
+audio that reached storage another way — bulk imports by pre-signed key —
+is hashed by streaming it back from storage on the first pipeline attempt.
+
+Duplicates are only matched within one user's encounters:
+  • at upload, an identical file that is still being processed is returned
+    instead of creating a second encounter (double submits, impatient retries);
+    patient details sent with the duplicate fill in the ones it lacks
+  • in the pipeline, an identical file that already COMPLETED has its
+    Transcript, SOAPNote and QualityMetric cloned, so AssemblyAI and Groq are
+    not called again
+"""
+
+import hashlib
+import logging
+
+from django.utils import timezone
+
+from ..models import Encounter, QualityMetric, SOAPNote, Transcript, Utterance
+
+logger = logging.getLogger(__name__)
+
+_IN_PROGRESS = [Encounter.Status.PENDING, Encounter.Status.TRANSCRIBED, Encounter.Status.REDACTED]
+
+# QualityMetric fields describing the output rather than the work done to produce it
+_CLONED_METRICS = [
+    "transcript_confidence", "transcript_word_count", "soap_sections_complete", "groq_model",
+]
+
+
+def upload_sha256(uploaded_file) -> str:
+    """Digest computed by the hashing upload handlers ("" if they were bypassed)."""
+    return getattr(uploaded_file, "sha256", "")
+
+
+def file_sha256(field_file) -> str:
+    """Streaming hash of a stored file."""
+    sha256 = hashlib.sha256()
+    with field_file.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def find_in_progress_duplicate(user, audio_sha256: str) -> Encounter | None:
+    """The user's identical upload that is still queued or running, if any."""
+    if not audio_sha256:
+        return None
+    return (
+        Encounter.objects.filter(user=user, audio_sha256=audio_sha256, status__in=_IN_PROGRESS)
+        .order_by("created_at")
+        .first()
+    )
+
+
+def merge_patient_details(encounter: Encounter, patient_name: str, patient_age: int | None) -> list[str]:
+    """
+    Copy patient details sent with a duplicate upload onto the in-progress
+    `encounter` where it has none. Returns the fields that were sent but
+    ignored because the encounter already has a different value.
+    """
+    ignored = []
+    for field, value, empty in (("patient_name", patient_name, ""), ("patient_age", patient_age, None)):
+        if value in ("", None) or getattr(encounter, field) == value:
+            continue
+        unset = {f"{field}__isnull": True} if empty is None else {field: empty}
+        # Conditional, so concurrent duplicates cannot overwrite each other's details
+        updated = Encounter.objects.filter(id=encounter.id, **unset).update(
+            **{field: value}, updated_at=timezone.now(),
+        )
+        if updated:
+            setattr(encounter, field, value)
+        else:
+            ignored.append(field)
+    return ignored
+
+
+def find_completed_duplicate(encounter: Encounter) -> Encounter | None:
+    return (
+        Encounter.objects.filter(
+            user_id=encounter.user_id,
+            audio_sha256=encounter.audio_sha256,
+            status=Encounter.Status.COMPLETED,
+        )
+        .exclude(id=encounter.id)
+        .select_related("transcript", "soap_note", "quality_metric")
+        .order_by("-created_at")
+        .first()
+    )
+
+
+def clone_outputs(source: Encounter, target: Encounter, metrics: dict):
+    """
+    Copy the source's pipeline outputs onto target. Token counts are recorded
+    as 0 because nothing was spent; stage timings stay empty.
+    """
+    transcript, created = Transcript.objects.update_or_create(
+        encounter=target,
+        defaults={
+            "raw_text": source.transcript.raw_text,
+            "redacted_text": source.transcript.redacted_text,
+            "word_timings": source.transcript.word_timings,
+        },
+    )
+    if not created:
+        transcript.utterances.all().delete()
+    Utterance.objects.bulk_create(
+        [
+            Utterance(
+                transcript=transcript,
+                index=u.index,
+                speaker=u.speaker,
+                start_ms=u.start_ms,
+                end_ms=u.end_ms,
+                raw_text=u.raw_text,
+                redacted_text=u.redacted_text,
+                confidence=u.confidence,
+            )
+            for u in source.transcript.utterances.all()
+        ],
+        batch_size=500,
+    )
+    soap = source.soap_note
+    SOAPNote.objects.update_or_create(
+        encounter=target,
+        defaults={
+            "subjective": soap.subjective,
+            "objective": soap.objective,
+            "assessment": soap.assessment,
+            "plan": soap.plan,
+        },
+    )
+    try:
+        source_metric = source.quality_metric
+    except QualityMetric.DoesNotExist:
+        source_metric = None
+    if source_metric is not None:
+        metrics.update({field: getattr(source_metric, field) for field in _CLONED_METRICS})
+    metrics.update(groq_prompt_tokens=0, groq_completion_tokens=0)
@@ -0,0 +1,123 @@
+"""
+Streaming export of completed encounters with their SOAP notes.
+
+Used by GET /api/encounters/export/ and `manage.py export_encounters` for
+incremental EHR syncs. Rows come from a single values() query read through
+iterator(chunk_size=EXPORT_CHUNK_SIZE) — a server-side cursor on PostgreSQL
+— and are encoded one at a time, so memory stays flat however many
+encounters match:
+
+  ndjson → one JSON object per line, SOAP note and metrics nested
+  csv    → one flat row per encounter, soap_* / metric_* columns
+
+Incremental sync uses a high-water mark on Encounter.updated_at, which
+edits to the SOAP note or transcript also bump. An export covers
+updated_after < updated_at <= high_water_mark, where the mark is "now"
+minus EXPORT_HIGH_WATER_LAG_SECONDS so rows still being committed are not
+skipped; the client stores the mark and passes it as the next
+updated_after. Read from a replica, the mark is also held back to the
+replica's last replayed commit, so replication lag cannot skip rows.
+Pipeline metrics (QualityMetric) are internal and only included on
+request — staff or the management command.
+"""
+
+import csv
+import json
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from config.db_router import replay_time
+
+from ..models import Encounter
+
+FORMATS = ("ndjson", "csv")
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+ENCOUNTER_FIELDS = (
+    "id", "status", "source", "original_filename", "patient_name", "patient_age",
+    "created_at", "updated_at",
+)
+SOAP_FIELDS = ("subjective", "objective", "assessment", "plan", "created_at")
+METRIC_FIELDS = (
+    "transcript_confidence", "transcript_word_count", "soap_sections_complete",
+    "groq_model", "groq_prompt_tokens", "groq_completion_tokens",
+    "queue_wait_ms", "transcription_wall_ms", "redaction_wall_ms", "soap_wall_ms",
+)
+
+
+def high_water_mark(using: str = DEFAULT_DB_ALIAS) -> datetime:
+    """Upper bound of an export read from `using`; on a replica, no later than what it has replayed."""
+    now = timezone.now()
+    replayed = replay_time(using)
+    if replayed is not None:
+        now = min(now, replayed)
+    return now - timedelta(seconds=settings.EXPORT_HIGH_WATER_LAG_SECONDS)
+
+
+def _columns(metrics: bool) -> list[tuple[str, str]]:
+    """(values() key, CSV header) for every exported column."""
+    columns = [(field, field) for field in ENCOUNTER_FIELDS]
+    columns.append(("user__email", "clinician"))
+    columns += [(f"soap_note__{field}", f"soap_{field}") for field in SOAP_FIELDS]
+    if metrics:
+        columns += [(f"quality_metric__{field}", f"metric_{field}") for field in METRIC_FIELDS]
+    return columns
+
+
+def export_queryset(until: datetime, updated_after: datetime | None = None, user=None, metrics: bool = False):
+    """values() rows of completed encounters updated in (updated_after, until], oldest first."""
+    qs = Encounter.objects.filter(status=Encounter.Status.COMPLETED, updated_at__lte=until)
+    if updated_after is not None:
+        qs = qs.filter(updated_at__gt=updated_after)
+    if user is not None:
+        qs = qs.filter(user=user)
+    return qs.order_by("updated_at", "id").values(*(key for key, _ in _columns(metrics)))
+
+
+def _rows(qs) -> Iterator[dict]:
+    return qs.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+def _nested(row: dict, metrics: bool) -> dict:
+    record = {field: row[field] for field in ENCOUNTER_FIELDS}
+    record["clinician"] = row["user__email"]
+    record["soap_note"] = {field: row[f"soap_note__{field}"] for field in SOAP_FIELDS}
+    if metrics:
+        record["metrics"] = {field: row[f"quality_metric__{field}"] for field in METRIC_FIELDS}
+    return record
+
+
+def stream_ndjson(qs, metrics: bool = False) -> Iterator[str]:
+    for row in _rows(qs):
+        yield json.dumps(_nested(row, metrics), cls=DjangoJSONEncoder) + "\n"
+
+
+class _Echo:
+    """csv.writer target that hands each encoded line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(qs, metrics: bool = False) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    columns = _columns(metrics)
+    yield writer.writerow([header for _, header in columns])
+    for row in _rows(qs):
+        yield writer.writerow([_csv_value(row[key]) for key, _ in columns])
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def stream_export(qs, fmt: str, metrics: bool = False) -> Iterator[str]:
+    """Encoded lines of an export_queryset() built with the same `metrics`."""
+    return (stream_csv if fmt == "csv" else stream_ndjson)(qs, metrics)
@@ -0,0 +1,341 @@
+"""
+Monthly range partitioning of encounter storage on PostgreSQL (optional).
+
+With ENCOUNTER_PARTITIONING=True the encounter, transcript, SOAP note and
+quality metric tables are each partitioned by month on their own created_at
+(a child row is never older than its encounter, so it lands in the same or
+a later month):
+
+    encounters_encounter            ← encounters_encounter_p202610, …_p202611, …
+    encounters_transcript           ← encounters_transcript_p202610, …
+    …                                 plus a DEFAULT partition per table as a safety net
+
+Partitions are created ENCOUNTER_PARTITION_PREMAKE_MONTHS ahead by the
+daily maintain_encounter_partitions task, so the DEFAULT partition stays
+empty. Vacuum and index maintenance then work on one month at a time, and
+queries bounded on created_at (the dashboard with DASHBOARD_HISTORY_MONTHS,
+the admin date hierarchy) only scan the matching partitions.
+
+Archival is a detach: partitions older than ENCOUNTER_PARTITION_RETENTION_MONTHS
+(0 = keep everything) are detached into standalone tables with the same name,
+ready for pg_dump and DROP (`manage.py encounter_partitions --drop-detached`).
+Rows outside the partitioned tables that point at the detached encounters —
+utterances, search documents, duplicate_of links, and child rows that
+landed in the next month — are removed alongside. Their audio is archived
+or deleted (ENCOUNTER_PARTITION_AUDIO_ACTION) once the detach has committed,
+and the outcome written to the archived rows; like the audio retention
+policy this is idempotent, so a run that stops halfway is finished later.
+
+PostgreSQL requires the partition key in every unique index, so the primary
+keys become (id, created_at), one-to-one uniqueness is enforced by the
+pipeline rather than the database (it writes those rows under a row lock on
+the encounter, see apps/encounters/tasks.py), and foreign keys *to* these tables are
+dropped (Django performs on_delete itself). Existing tables are converted by
+migration 0020 when the setting is on, or later with
+`manage.py encounter_partitions --convert`.
+"""
+
+import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+
+from ..models import Encounter
+from .retention import archive_object
+from .storage import delete_object
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEY = "created_at"
+ENCOUNTER_TABLE = "encounters_encounter"
+TRANSCRIPT_TABLE = "encounters_transcript"
+# Parent first: children are converted after the table their foreign key points at
+PARTITIONED_TABLES = [ENCOUNTER_TABLE, TRANSCRIPT_TABLE, "encounters_soapnote", "encounters_qualitymetric"]
+CHILD_TABLES = PARTITIONED_TABLES[1:]
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+# ── Months ────────────────────────────────────────────────────────────────────
+
+
+def month_start(moment: datetime | None = None, months: int = 0) -> datetime:
+    """First instant (UTC) of the month `months` away from `moment` (default: now)."""
+    moment = (moment or timezone.now()).astimezone(dt_timezone.utc)
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _month_of(partition: str) -> datetime | None:
+    match = _PARTITION_SUFFIX.search(partition)
+    if match is None:
+        return None  # the DEFAULT partition
+    return datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)
+
+
+# ── Introspection ─────────────────────────────────────────────────────────────
+
+
+def is_partitioned(connection=None) -> bool:
+    """True once the encounter table is partitioned (always False outside PostgreSQL)."""
+    connection = connection or default_connection
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [ENCOUNTER_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def attached_partitions(cursor, table: str) -> list[str]:
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname",
+        [table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def detached_partitions(cursor) -> list[str]:
+    """Former partitions kept as standalone archive tables."""
+    cursor.execute(
+        "SELECT c.relname FROM pg_class c "
+        "WHERE c.relkind = 'r' AND c.relnamespace = current_schema()::regnamespace "
+        "AND c.relname ~ %s AND NOT c.relispartition ORDER BY c.relname",
+        [f"^({'|'.join(PARTITIONED_TABLES)})_p[0-9]{{6}}$"],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+# ── Partition maintenance ─────────────────────────────────────────────────────
+
+
+def _create_partition(cursor, table: str, month: datetime) -> bool:
+    name = partition_name(table, month)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    if cursor.fetchone()[0]:
+        return False
+    cursor.execute(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{month_start(month, 1).isoformat()}')"
+    )
+    return True
+
+
+def ensure_partitions(connection=None, months_ahead: int | None = None, since: datetime | None = None) -> list[str]:
+    """Create missing monthly partitions from `since` (default: this month) to `months_ahead`."""
+    connection = connection or default_connection
+    if months_ahead is None:
+        months_ahead = settings.ENCOUNTER_PARTITION_PREMAKE_MONTHS
+    last = month_start(months=months_ahead)
+    created = []
+    with connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            month = month_start(since)
+            while month <= last:
+                if _create_partition(cursor, table, month):
+                    created.append(partition_name(table, month))
+                month = month_start(month, 1)
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {table}_pdefault PARTITION OF {table} DEFAULT")
+    if created:
+        logger.info(f"Created {len(created)} encounter partitions up to {last:%Y-%m}")
+    return created
+
+
+def detach_partitions(before: datetime, connection=None, drop: bool = False) -> list[str]:
+    """
+    Detach every monthly partition starting before `before` and remove the
+    rows elsewhere that refer to its encounters. The detached tables are kept
+    for archiving unless `drop`.
+    """
+    connection = connection or default_connection
+    detached = {}
+    with connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            for partition in attached_partitions(cursor, table):
+                month = _month_of(partition)
+                if month is not None and month < before:
+                    cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {partition}")
+                    detached.setdefault(table, []).append(partition)
+
+        for encounters in detached.get(ENCOUNTER_TABLE, []):
+            _drop_references(cursor, encounters)
+        for transcripts in detached.get(TRANSCRIPT_TABLE, []):
+            cursor.execute(
+                f"DELETE FROM encounters_utterance WHERE transcript_id IN (SELECT id FROM {transcripts})"
+            )
+
+        names = [name for partitions in detached.values() for name in partitions]
+        if drop:
+            release_detached_audio(connection, detached.get(ENCOUNTER_TABLE, []))  # while the rows exist
+            for name in names:
+                cursor.execute(f"DROP TABLE {name}")
+    if detached.get(ENCOUNTER_TABLE) and not drop:
+        # Storage is not transactional: move audio only once the detach is permanent
+        transaction.on_commit(lambda: release_detached_audio(connection), using=connection.alias)
+    if names:
+        logger.info(f"Detached {len(names)} encounter partitions older than {before:%Y-%m}")
+    return names
+
+
+def _drop_references(cursor, encounters: str):
+    """Remove rows still attached to the encounters in the detached table `encounters`."""
+    detached_ids = f"SELECT id FROM {encounters}"
+    # Transcripts, notes and metrics written in the month after their encounter
+    cursor.execute(
+        f"DELETE FROM encounters_utterance WHERE transcript_id IN "
+        f"(SELECT id FROM {TRANSCRIPT_TABLE} WHERE encounter_id IN ({detached_ids}))"
+    )
+    for child in CHILD_TABLES:
+        cursor.execute(f"DELETE FROM {child} WHERE encounter_id IN ({detached_ids})")
+    cursor.execute(f"DELETE FROM encounters_searchdocument WHERE encounter_id IN ({detached_ids})")
+    cursor.execute(f"UPDATE {ENCOUNTER_TABLE} SET duplicate_of_id = NULL WHERE duplicate_of_id IN ({detached_ids})")
+
+
+def release_detached_audio(connection=None, tables: list[str] | None = None) -> int:
+    """
+    Archive or delete the still-stored audio of encounters in detached tables
+    (`tables`, default: every detached encounter table) and record it on their
+    rows. Returns the number of encounters handled; failures are logged and
+    left for the next run.
+    """
+    action = settings.ENCOUNTER_PARTITION_AUDIO_ACTION
+    if action not in ("archive", "delete"):
+        raise ImproperlyConfigured(
+            f"Unknown ENCOUNTER_PARTITION_AUDIO_ACTION '{action}'. Choose archive or delete."
+        )
+    connection = connection or default_connection
+    handled = 0
+    with connection.cursor() as cursor:
+        if tables is None:
+            tables = [name for name in detached_partitions(cursor) if name.startswith(f"{ENCOUNTER_TABLE}_p")]
+        for table in tables:
+            cursor.execute(
+                f"SELECT id, audio_file FROM {table} WHERE audio_status = %s AND audio_file <> ''",
+                [Encounter.AudioStatus.STORED],
+            )
+            for encounter_id, name in cursor.fetchall():
+                try:
+                    if action == "delete":
+                        delete_object(name)
+                        dest = None
+                    else:
+                        dest = archive_object(name)
+                except Exception as exc:
+                    logger.warning(f"[{encounter_id}] Could not {action} audio of detached encounter: {exc}")
+                    continue
+                audio_status = Encounter.AudioStatus.ARCHIVED if dest else Encounter.AudioStatus.DELETED
+                cursor.execute(
+                    f"UPDATE {table} SET audio_file = %s, audio_status = %s, audio_retention_at = %s WHERE id = %s",
+                    [dest or "", audio_status, timezone.now(), encounter_id],
+                )
+                handled += 1
+    if handled:
+        logger.info(f"Audio of {handled} detached encounters: {action}d")
+    return handled
+
+
+def drop_detached(connection=None) -> list[str]:
+    """DROP the archive tables left by detach_partitions() — after they have been dumped."""
+    connection = connection or default_connection
+    release_detached_audio(connection)  # anything an interrupted run left behind
+    with connection.cursor() as cursor:
+        names = detached_partitions(cursor)
+        for name in names:
+            cursor.execute(f"DROP TABLE {name}")
+    return names
+
+
+def maintain_partitions() -> dict[str, list[str]]:
+    """Periodic (Celery beat): premake partitions and detach the ones past retention."""
+    if not is_partitioned():
+        return {}
+    result = {"created": ensure_partitions()}
+    if settings.ENCOUNTER_PARTITION_RETENTION_MONTHS:
+        result["detached"] = detach_partitions(month_start(months=-settings.ENCOUNTER_PARTITION_RETENTION_MONTHS))
+        release_detached_audio()  # finishes audio an interrupted earlier run left stored
+    return result
+
+
+# ── Conversion ────────────────────────────────────────────────────────────────
+
+
+def convert_tables(connection=None) -> list[str]:
+    """
+    Turn the (unpartitioned) encounter tables into partitioned ones, copying
+    existing rows. Runs inside the caller's transaction; returns the tables
+    converted. A no-op outside PostgreSQL or when already done.
+    """
+    connection = connection or default_connection
+    if connection.vendor != "postgresql":
+        return []
+    converted = []
+    with connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+            if cursor.fetchone() is None:
+                _convert_table(cursor, table)
+                converted.append(table)
+    if converted:
+        logger.info(f"Partitioned {', '.join(converted)} by month on {PARTITION_KEY}")
+    ensure_partitions(connection)
+    return converted
+
+
+def _convert_table(cursor, table: str):
+    old = f"{table}_unpartitioned"
+    cursor.execute(
+        "SELECT pg_get_indexdef(x.indexrelid), x.indisprimary, x.indisunique "
+        "FROM pg_index x WHERE x.indrelid = to_regclass(%s)",
+        [table],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid), confrelid::regclass::text "
+        "FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = [(name, definition) for name, definition, target in cursor.fetchall()
+                    if target not in PARTITIONED_TABLES]
+    cursor.execute(f"SELECT MIN({PARTITION_KEY}) FROM {table}")
+    oldest = cursor.fetchone()[0]
+
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    cursor.execute(
+        f"CREATE TABLE {table} (LIKE {old} INCLUDING ALL EXCLUDING INDEXES) "
+        f"PARTITION BY RANGE ({PARTITION_KEY})"
+    )
+    month, last = month_start(oldest), month_start(months=settings.ENCOUNTER_PARTITION_PREMAKE_MONTHS)
+    while month <= last:
+        _create_partition(cursor, table, month)
+        month = month_start(month, 1)
+    cursor.execute(f"CREATE TABLE {table}_pdefault PARTITION OF {table} DEFAULT")
+
+    cursor.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    # Identity columns get a fresh sequence with the new table (UUID keys have none)
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+    sequence = cursor.fetchone()[0]
+    if sequence:
+        cursor.execute(f"SELECT setval(%s, COALESCE(MAX(id), 0) + 1, false) FROM {table}", [sequence])
+    # CASCADE drops the foreign keys pointing at the old table, which a
+    # partitioned table cannot take over (no unique index on id alone)
+    cursor.execute(f"DROP TABLE {old} CASCADE")
+
+    cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {PARTITION_KEY})")
+    for definition, primary, unique in indexes:
+        if primary:
+            continue
+        if unique:  # unique indexes must include the partition key
+            definition = re.sub(r"\)$", f", {PARTITION_KEY})", definition)
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
@@ -0,0 +1,64 @@
+"""
+Cache of serialized encounter payloads.
+
+A COMPLETED or FAILED encounter's EncounterSerializer output only changes
+when the encounter or its transcript / SOAP note is edited, yet the result
+page and the status API rebuild it — join plus a possibly very large
+transcript — on every request. For those terminal states the serialized
+dict is cached in the default cache (Redis) under a key that includes
+updated_at, so any change produces a new key and stale entries simply
+expire:
+
+    encounter-payload:v1:<id>:<updated_at µs>:<variant>
+
+Encounter writes bump updated_at themselves; saves and deletes of the
+related Transcript and SOAPNote bump it via apps.encounters.signals. A
+cache outage is treated as a miss, never as an error for the request.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.monitoring.metrics import ENCOUNTER_CACHE
+
+from ..models import Encounter
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (Encounter.Status.COMPLETED, Encounter.Status.FAILED)
+
+
+def payload_key(encounter: Encounter, variant: str) -> str:
+    stamp = int(encounter.updated_at.timestamp() * 1_000_000)
+    return f"encounter-payload:v1:{encounter.id}:{stamp}:{variant}"
+
+
+def cached_payload(encounter: Encounter, variant: str, build) -> dict:
+    """
+    Return build()'s payload for `encounter`, from the cache when the
+    encounter is in a terminal state. `encounter` needs id, status and
+    updated_at; `variant` names the serializer options used by build().
+    """
+    if encounter.status not in TERMINAL_STATUSES:
+        return build()
+
+    key = payload_key(encounter, variant)
+    try:
+        data = cache.get(key)
+    except Exception as exc:
+        logger.warning(f"Encounter payload cache unavailable: {exc}")
+        ENCOUNTER_CACHE.labels(outcome="error").inc()
+        return build()
+    if data is not None:
+        ENCOUNTER_CACHE.labels(outcome="hit").inc()
+        return data
+
+    ENCOUNTER_CACHE.labels(outcome="miss").inc()
+    data = dict(build())  # a plain dict — ReturnDict would pickle its serializer
+    try:
+        cache.set(key, data, settings.ENCOUNTER_PAYLOAD_CACHE_SECONDS)
+    except Exception as exc:
+        logger.warning(f"Encounter payload cache unavailable: {exc}")
+    return data
@@ -7,6 +7,10 @@ WeasyPrint requires native system libraries (libpango, libcairo, libgobject).
 The import is intentionally lazy (inside the function) so Django starts up
 correctly on macOS dev machines that don't have those libs installed.
 In Docker / Render, the Dockerfile installs all required libs via apt-get.
+
+The first render's timings are stored on the encounter's QualityMetric
+(pdf_*); later downloads only feed the stage latency histogram, so they stay
+read-only.
 """
 
 import logging
@@ -14,6 +18,9 @@ import logging
 from django.http import HttpResponse
 from django.template.loader import render_to_string
 
+from ..instrumentation import measure_stage
+from ..models import QualityMetric
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,15 +28,21 @@ def generate_pdf_bytes(encounter) -> bytes:
     """Render the SOAP note template and convert to PDF bytes."""
     import weasyprint  # lazy import — requires native libs only available in Docker
 
-    html_string = render_to_string(
-        "encounters/soap_pdf.html",
-        {
-            "encounter": encounter,
-            "soap_note": encounter.soap_note,
-            "transcript": encounter.transcript,
-        },
-    )
-    return weasyprint.HTML(string=html_string).write_pdf()
+    timings: dict = {}
+    with measure_stage(timings, "pdf"):
+        html_string = render_to_string(
+            "encounters/soap_pdf.html",
+            {
+                "encounter": encounter,
+                "soap_note": encounter.soap_note,
+                "transcript": encounter.transcript,
+            },
+        )
+        pdf_bytes = weasyprint.HTML(string=html_string).write_pdf()
+    unrecorded = QualityMetric.objects.filter(encounter=encounter, pdf_wall_ms__isnull=True)
+    if unrecorded.exists():
+        unrecorded.update(**timings)
+    return pdf_bytes
 
 
 def get_pdf_response(encounter) -> HttpResponse:
@@ -16,50 +16,61 @@ Detected entity types and their replacement tags:
 
 import logging
 import threading
+import time
 
-from presidio_anonymizer.entities import OperatorConfig
+from apps.monitoring.metrics import REDACTION_ENGINE_LOAD
 
 logger = logging.getLogger(__name__)
 
-# Heavy objects are lazy-loaded on first use so gunicorn workers boot fast.
+# Heavy objects — and Presidio itself, ~2 s to import — are lazy-loaded on
+# first use so gunicorn workers and management commands boot fast.
 _lock = threading.Lock()
 _analyzer = None
 _anonymizer = None
+_operators = None
 
 # Replacement tags for each entity type
-_OPERATORS: dict[str, OperatorConfig] = {
-    "PERSON": OperatorConfig("replace", {"new_value": "[PERSON]"}),
-    "PHONE_NUMBER": OperatorConfig("replace", {"new_value": "[PHONE]"}),
-    "EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "[EMAIL]"}),
-    "LOCATION": OperatorConfig("replace", {"new_value": "[LOCATION]"}),
-    "DATE_TIME": OperatorConfig("replace", {"new_value": "[DATE]"}),
-    "US_SSN": OperatorConfig("replace", {"new_value": "[SSN]"}),
-    "AU_TFN": OperatorConfig("replace", {"new_value": "[TFN]"}),
-    "MEDICAL_LICENSE": OperatorConfig("replace", {"new_value": "[LICENSE]"}),
-    "URL": OperatorConfig("replace", {"new_value": "[URL]"}),
-    "IP_ADDRESS": OperatorConfig("replace", {"new_value": "[IP]"}),
+_REPLACEMENTS = {
+    "PERSON": "[PERSON]",
+    "PHONE_NUMBER": "[PHONE]",
+    "EMAIL_ADDRESS": "[EMAIL]",
+    "LOCATION": "[LOCATION]",
+    "DATE_TIME": "[DATE]",
+    "US_SSN": "[SSN]",
+    "AU_TFN": "[TFN]",
+    "MEDICAL_LICENSE": "[LICENSE]",
+    "URL": "[URL]",
+    "IP_ADDRESS": "[IP]",
 }
 
 
 def _get_engines():
-    """Return (analyzer, anonymizer), initialising them on first call."""
-    global _analyzer, _anonymizer
+    """Return (analyzer, anonymizer, operators), initialising them on first call."""
+    global _analyzer, _anonymizer, _operators
     if _analyzer is None:
         with _lock:
             if _analyzer is None:  # double-checked locking
                 from presidio_analyzer import AnalyzerEngine
                 from presidio_analyzer.nlp_engine import NlpEngineProvider
                 from presidio_anonymizer import AnonymizerEngine
+                from presidio_anonymizer.entities import OperatorConfig
 
                 logger.info("Initialising Presidio + spaCy (first use)…")
+                start = time.perf_counter()
                 nlp_engine = NlpEngineProvider(nlp_configuration={
                     "nlp_engine_name": "spacy",
                     "models": [{"lang_code": "en", "model_name": "en_core_web_sm"}],
                 }).create_engine()
-                _analyzer = AnalyzerEngine(nlp_engine=nlp_engine)
+                _operators = {
+                    entity: OperatorConfig("replace", {"new_value": tag})
+                    for entity, tag in _REPLACEMENTS.items()
+                }
                 _anonymizer = AnonymizerEngine()
-                logger.info("Presidio + spaCy ready.")
-    return _analyzer, _anonymizer
+                _analyzer = AnalyzerEngine(nlp_engine=nlp_engine)  # set last: it guards the others
+                elapsed = time.perf_counter() - start
+                REDACTION_ENGINE_LOAD.observe(elapsed)
+                logger.info(f"Presidio + spaCy ready in {elapsed:.1f}s.")
+    return _analyzer, _anonymizer, _operators
 
 
 def redact_pii(text: str) -> str:
@@ -70,7 +81,7 @@ def redact_pii(text: str) -> str:
     if not text:
         return text
 
-    analyzer, anonymizer = _get_engines()
+    analyzer, anonymizer, operators = _get_engines()
     results = analyzer.analyze(text=text, language="en")
 
     if not results:
@@ -82,6 +93,23 @@ def redact_pii(text: str) -> str:
     anonymized = anonymizer.anonymize(
         text=text,
         analyzer_results=results,
-        operators=_OPERATORS,
+        operators=operators,
     )
     return anonymized.text
+
+
+def redact_utterances(texts: list[str]) -> list[str]:
+    """
+    Redact a transcript's utterances, returning one redacted text per input.
+
+    The utterances are analysed as a single newline-joined document so spaCy
+    keeps cross-turn context and Presidio runs once; the result is split back
+    on newlines. If an entity ever spans a line break the split no longer
+    lines up, and each utterance is redacted on its own instead.
+    """
+    flattened = [" ".join(text.splitlines()) for text in texts]
+    lines = redact_pii("\n".join(flattened)).split("\n")
+    if len(lines) == len(flattened):
+        return lines
+    logger.warning("Redaction changed the utterance line count — redacting utterances one by one.")
+    return [redact_pii(text) for text in flattened]
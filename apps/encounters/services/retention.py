@@ -0,0 +1,147 @@
+"""
+Audio retention policy.
+
+Nothing reads an encounter's audio once the pipeline has finished with it,
+so after a configurable number of days it is either moved under
+AUDIO_ARCHIVE_PREFIX (on R2 with a cheaper storage class, still usable for
+a reprocess) or deleted. Completed and failed encounters have their own
+policy — failed ones are usually kept longer in case they are reprocessed:
+
+    AUDIO_RETENTION_ACTION / AUDIO_RETENTION_DAYS                  COMPLETED
+    AUDIO_RETENTION_FAILED_ACTION / AUDIO_RETENTION_FAILED_DAYS    FAILED
+
+with "keep", "archive" or "delete" as actions, counted from updated_at.
+
+Work is done in batches of AUDIO_RETENTION_BATCH_SIZE with a pause between
+them, at most AUDIO_RETENTION_MAX_PER_RUN encounters per run. Every step is
+idempotent and the order is copy → delete → database update, so a run that
+crashes halfway is finished by the next one: an encounter is only marked
+once its object is gone from the original key, and an archive whose copy
+already landed is recognised by the source being missing and the archive
+key present. Nothing is ever left orphaned in the bucket.
+"""
+
+import logging
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from apps.monitoring.metrics import AUDIO_RETENTION
+
+from ..models import Encounter
+from .storage import copy_object, delete_object, object_exists
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = ("keep", "archive", "delete")
+
+AudioStatus = Encounter.AudioStatus
+
+
+def _policies() -> list[tuple[str, str, int]]:
+    """(encounter status, action, days) for every policy that does something."""
+    policies = [
+        (Encounter.Status.COMPLETED, settings.AUDIO_RETENTION_ACTION, settings.AUDIO_RETENTION_DAYS),
+        (Encounter.Status.FAILED, settings.AUDIO_RETENTION_FAILED_ACTION, settings.AUDIO_RETENTION_FAILED_DAYS),
+    ]
+    for _status, action, _days in policies:
+        if action not in ACTIONS:
+            raise ImproperlyConfigured(
+                f"Unknown audio retention action '{action}'. Choose one of: {', '.join(ACTIONS)}."
+            )
+    return [policy for policy in policies if policy[1] != "keep"]
+
+
+def archive_key(name: str) -> str:
+    prefix = settings.AUDIO_ARCHIVE_PREFIX
+    return name if name.startswith(prefix) else f"{prefix}{name}"
+
+
+def archive_object(name: str) -> str | None:
+    """Move an audio object under AUDIO_ARCHIVE_PREFIX; returns its archive key, None if both copies are gone."""
+    dest = archive_key(name)
+    if name != dest and object_exists(name):
+        copy_object(name, dest, settings.AUDIO_ARCHIVE_STORAGE_CLASS)
+        delete_object(name)
+    elif not object_exists(dest):
+        return None
+    return dest
+
+
+def _archive(encounter: Encounter) -> str:
+    dest = archive_object(encounter.audio_file.name)
+    if dest is None:
+        # Neither copy exists — the audio was lost; record that honestly
+        logger.warning(f"[{encounter.id}] Audio '{encounter.audio_file.name}' not found; marking it deleted.")
+        return _mark(encounter, AudioStatus.DELETED, "")
+    return _mark(encounter, AudioStatus.ARCHIVED, dest)
+
+
+def _delete(encounter: Encounter) -> str:
+    delete_object(encounter.audio_file.name)
+    return _mark(encounter, AudioStatus.DELETED, "")
+
+
+def _mark(encounter: Encounter, audio_status: str, name: str) -> str:
+    # Conditional, so a concurrent run that got here first is not overwritten;
+    # updated_at is left alone — it is the age the policy is measured from.
+    Encounter.objects.filter(id=encounter.id, audio_status=AudioStatus.STORED).update(
+        audio_file=name, audio_status=audio_status, audio_retention_at=timezone.now(),
+    )
+    return audio_status
+
+
+_HANDLERS = {"archive": _archive, "delete": _delete}
+
+
+def apply_audio_retention(dry_run: bool = False) -> dict:
+    """
+    Run the retention policies once. Returns counts per "<status>:<outcome>",
+    where the outcome is the new audio status, "error" or (dry run) "due".
+    """
+    counts: Counter = Counter()
+    budget = settings.AUDIO_RETENTION_MAX_PER_RUN
+    now = timezone.now()
+
+    for status, action, days in _policies():
+        candidates = (
+            Encounter.objects.filter(
+                status=status,
+                audio_status=AudioStatus.STORED,
+                updated_at__lt=now - timedelta(days=days),
+            )
+            .exclude(audio_file="")
+            .order_by("updated_at")
+            .only("id", "audio_file", "audio_status")
+        )
+        if dry_run:
+            due = min(candidates.count(), budget)
+            counts[f"{status}:due"] += due
+            budget -= due
+            continue
+
+        failed_ids = []  # retried on the next run, not again in this one
+        while budget > 0:
+            batch = list(candidates.exclude(id__in=failed_ids)[: min(settings.AUDIO_RETENTION_BATCH_SIZE, budget)])
+            if not batch:
+                break
+            for encounter in batch:
+                try:
+                    outcome = _HANDLERS[action](encounter)
+                except Exception as exc:
+                    logger.error(f"[{encounter.id}] Audio retention ({action}) failed: {exc}")
+                    failed_ids.append(encounter.id)
+                    outcome = "error"
+                counts[f"{status}:{outcome}"] += 1
+                AUDIO_RETENTION.labels(status=status, outcome=outcome).inc()
+            budget -= len(batch)
+            if budget > 0 and len(batch) == settings.AUDIO_RETENTION_BATCH_SIZE:
+                time.sleep(settings.AUDIO_RETENTION_BATCH_PAUSE_SECONDS)  # throttle storage API calls
+
+    if counts:
+        logger.info(f"Audio retention{' (dry run)' if dry_run else ''}: {dict(counts)}")
+    return dict(counts)
@@ -0,0 +1,118 @@
+"""
+Daily QualityMetric rollups.
+
+Metrics of COMPLETED encounters are grouped by UTC day of
+QualityMetric.created_at and groq_model; a metric row exists from the first
+attempt on, but is only counted once its encounter has finished, so a run in
+the middle of the pipeline never files it under an empty model name.
+
+Each run recomputes, in one transaction, every day from the most recent
+rolled-up day — or QUALITY_ROLLUP_LOOKBACK_DAYS back, whichever is earlier —
+up to today, and deletes the rollup rows of that window that no longer have
+any metrics. Encounters finishing days after their upload (retries,
+reprocessing) are therefore still counted, and the cost of a run stays
+bounded by the window rather than the size of the table. full=True rebuilds
+everything, for encounters finishing later than that.
+"""
+
+import logging
+from datetime import datetime, time, timedelta, timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone as django_timezone
+
+from ..models import Encounter, QualityMetric, QualityRollup
+
+logger = logging.getLogger(__name__)
+
+_AGGREGATES = {
+    "encounter_count": Count("id"),
+    "avg_confidence": Avg("transcript_confidence"),
+    "avg_word_count": Avg("transcript_word_count"),
+    "avg_sections_complete": Avg("soap_sections_complete"),
+    "total_prompt_tokens": Sum("groq_prompt_tokens"),
+    "total_completion_tokens": Sum("groq_completion_tokens"),
+    "avg_queue_wait_ms": Avg("queue_wait_ms"),
+    "avg_transcription_ms": Avg("transcription_wall_ms"),
+    "avg_redaction_ms": Avg("redaction_wall_ms"),
+    "avg_soap_ms": Avg("soap_wall_ms"),
+    "max_transcription_ms": Max("transcription_wall_ms"),
+    "max_redaction_ms": Max("redaction_wall_ms"),
+    "max_soap_ms": Max("soap_wall_ms"),
+}
+
+
+def rollup_quality_metrics(full: bool = False) -> int:
+    """
+    Refresh QualityRollup rows and return how many were written.
+    full=True rebuilds every day from the first QualityMetric.
+    """
+    latest = None if full else QualityRollup.objects.order_by("-day").values_list("day", flat=True).first()
+    if latest is None:
+        first = QualityMetric.objects.order_by("created_at").values_list("created_at", flat=True).first()
+        if first is None:
+            return 0
+        latest = first.astimezone(timezone.utc).date()
+    else:
+        lookback = django_timezone.now().astimezone(timezone.utc).date()
+        latest = min(latest, lookback - timedelta(days=settings.QUALITY_ROLLUP_LOOKBACK_DAYS))
+
+    since = datetime.combine(latest, time.min, tzinfo=timezone.utc)
+    rows = (
+        QualityMetric.objects.filter(created_at__gte=since, encounter__status=Encounter.Status.COMPLETED)
+        .annotate(day=TruncDate("created_at", tzinfo=timezone.utc))
+        .order_by()
+        .values("day", "groq_model")
+        .annotate(**_AGGREGATES)
+    )
+
+    written, kept = 0, []
+    with transaction.atomic():
+        for row in rows:
+            day, model = row.pop("day"), row.pop("groq_model")
+            row["total_prompt_tokens"] = row["total_prompt_tokens"] or 0
+            row["total_completion_tokens"] = row["total_completion_tokens"] or 0
+            rollup, _ = QualityRollup.objects.update_or_create(day=day, groq_model=model, defaults=row)
+            kept.append(rollup.id)
+            written += 1
+        # Groups left without finished metrics, e.g. the encounter was reprocessed under another model
+        QualityRollup.objects.filter(day__gte=latest).exclude(id__in=kept).delete()
+
+    logger.info(f"Quality rollup refreshed {written} day/model row(s) since {latest}.")
+    return written
+
+
+def chart_series(rollups) -> dict:
+    """Collapse per-model rollup rows into per-day series for the admin chart."""
+    days: dict = {}
+    for r in sorted(rollups, key=lambda r: r.day):
+        d = days.setdefault(r.day, {"n": 0, "conf": 0.0, "conf_n": 0, "stages": {}, "tokens": 0})
+        d["n"] += r.encounter_count
+        d["tokens"] += r.total_prompt_tokens + r.total_completion_tokens
+        if r.avg_confidence is not None:
+            d["conf"] += r.avg_confidence * r.encounter_count
+            d["conf_n"] += r.encounter_count
+        for stage in ("queue_wait", "transcription", "redaction", "soap"):
+            value = getattr(r, f"avg_{stage}_ms")
+            if value is not None:
+                total, n = d["stages"].get(stage, (0.0, 0))
+                d["stages"][stage] = (total + value * r.encounter_count, n + r.encounter_count)
+
+    def weighted(total, n):
+        return round(total / n / 1000, 2) if n else None
+
+    return {
+        "labels": [day.isoformat() for day in days],
+        "encounters": [d["n"] for d in days.values()],
+        "tokens": [d["tokens"] for d in days.values()],
+        "confidence": [
+            round(d["conf"] / d["conf_n"] * 100, 1) if d["conf_n"] else None for d in days.values()
+        ],
+        "stages_s": {
+            stage: [weighted(*d["stages"].get(stage, (0.0, 0))) for d in days.values()]
+            for stage in ("queue_wait", "transcription", "redaction", "soap")
+        },
+    }
@@ -0,0 +1,132 @@
+"""
+Full-text search over a user's SOAP notes and redacted transcripts.
+
+One SearchDocument per encounter is (re)built by index_encounter() whenever
+its SOAPNote or Transcript is saved (see apps.encounters.signals):
+
+  PostgreSQL → SearchDocument.vector, a tsvector with the SOAP note at
+               weight A and the redacted transcript at weight B, GIN-indexed;
+               queries use websearch syntax and ts_rank
+  SQLite     → the encounters_search_fts FTS5 table (development), ranked
+               with bm25 — every query word must match
+
+Only the PII-redacted transcript is indexed. Results are always scoped to
+one user; a query costs an index lookup plus ranking that user's matches,
+not a scan of their notes.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, connections, router
+from django.db.models import F, Value
+
+from ..models import Encounter, SearchDocument, SOAPNote, Transcript
+
+FTS_TABLE = "encounters_search_fts"
+_SOAP_FIELDS = ("subjective", "objective", "assessment", "plan")
+# bm25 column weights for (soap, transcript) — the FTS5 counterpart of A / B
+_FTS_WEIGHTS = (2.0, 1.0)
+
+
+def _use_postgres() -> bool:
+    return connection.vendor == "postgresql"
+
+
+# ── Indexing ──────────────────────────────────────────────────────────────────
+
+
+def index_encounter(encounter_id):
+    """Rebuild the search entry for one encounter from its current SOAP note and transcript."""
+    user_id = Encounter.objects.filter(id=encounter_id).values_list("user_id", flat=True).first()
+    if user_id is None:
+        return
+    soap = SOAPNote.objects.filter(encounter_id=encounter_id).values_list(*_SOAP_FIELDS).first()
+    soap_text = "\n".join(soap) if soap else ""
+    transcript_text = (
+        Transcript.objects.filter(encounter_id=encounter_id)
+        .values_list("redacted_text", flat=True)
+        .first()
+    ) or ""
+    if not soap_text and not transcript_text:
+        remove_encounter(encounter_id)  # e.g. reprocessing from transcription
+        return
+
+    SearchDocument.objects.update_or_create(encounter_id=encounter_id, defaults={"user_id": user_id})
+    if _use_postgres():
+        config = settings.SEARCH_TEXT_CONFIG
+        SearchDocument.objects.filter(encounter_id=encounter_id).update(
+            vector=SearchVector(Value(soap_text), weight="A", config=config)
+            + SearchVector(Value(transcript_text), weight="B", config=config),
+        )
+    elif connection.vendor == "sqlite":
+        key = uuid.UUID(str(encounter_id)).hex
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE encounter_id = %s", [key])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (soap, transcript, encounter_id, user_id) VALUES (%s, %s, %s, %s)",
+                [soap_text, transcript_text, key, user_id],
+            )
+
+
+def remove_encounter(encounter_id):
+    # The post_delete signal clears the FTS5 row as well
+    SearchDocument.objects.filter(encounter_id=encounter_id).delete()
+
+
+def remove_fts_entry(encounter_id):
+    """Drop the SQLite FTS5 row — it is not a Django model, so nothing cascades to it."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE encounter_id = %s", [uuid.UUID(str(encounter_id)).hex],
+            )
+
+
+# ── Querying ──────────────────────────────────────────────────────────────────
+
+
+def search_encounters(user, query: str, limit: int = 20, offset: int = 0) -> list[tuple[uuid.UUID, float]]:
+    """
+    Ranked (encounter_id, rank) pairs for `user`'s encounters matching
+    `query`, best first. Higher rank is better on both backends.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    if _use_postgres():
+        search_query = SearchQuery(query, search_type="websearch", config=settings.SEARCH_TEXT_CONFIG)
+        rows = (
+            SearchDocument.objects.filter(user=user, vector=search_query)
+            .annotate(rank=SearchRank(F("vector"), search_query))
+            .order_by("-rank", "-updated_at")
+            .values_list("encounter_id", "rank")[offset : offset + limit]
+        )
+        return list(rows)
+
+    with connections[router.db_for_read(SearchDocument)].cursor() as cursor:
+        cursor.execute(
+            f"SELECT encounter_id, -bm25({FTS_TABLE}, %s, %s) AS rank FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND user_id = %s ORDER BY rank DESC LIMIT %s OFFSET %s",
+            [*_FTS_WEIGHTS, _fts_query(query), user.id, limit, offset],
+        )
+        return [(uuid.UUID(key), rank) for key, rank in cursor.fetchall()]
+
+
+def ranked_encounters(user, query: str, limit: int = 20, offset: int = 0) -> list[Encounter]:
+    """search_encounters() as Encounter objects in rank order, each with a search_rank attribute."""
+    ranked = search_encounters(user, query, limit, offset)
+    encounters = Encounter.objects.filter(user=user).in_bulk([encounter_id for encounter_id, _ in ranked])
+    results = []
+    for encounter_id, rank in ranked:
+        encounter = encounters.get(encounter_id)
+        if encounter is not None:
+            encounter.search_rank = rank
+            results.append(encounter)
+    return results
+
+
+def _fts_query(query: str) -> str:
+    """Quote every word so user input can never be read as FTS5 query syntax."""
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in query.split())
@@ -2,25 +2,48 @@
 SOAP note generation service using Groq API (Llama 3.3 70B — free tier).
 The redacted transcript is sent to the LLM with a strict system prompt that
 enforces a JSON SOAP structure, validated with Pydantic before saving.
+
+settings.SOAP_BACKEND selects the generator: "groq" (default) or "fake",
+a deterministic stand-in with configurable latency for tests, offline runs
+and benchmarks. Both return the same dict shape, from generate_soap_note()
+or its async twin agenerate_soap_note() used by the asyncio runner.
+
+groq and pydantic are imported on first use, so importing this module (as
+the Celery task module does in every process) stays cheap.
 """
 
+import asyncio
+import functools
 import json
 import logging
+import time
+from typing import TYPE_CHECKING
 
 from django.conf import settings
-from groq import Groq
-from pydantic import BaseModel, ValidationError
+from django.core.exceptions import ImproperlyConfigured
+
+from apps.monitoring.metrics import GROQ_TOKENS
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
 # ── Pydantic schema ───────────────────────────────────────────────────────────
 
 
-class SOAPData(BaseModel):
-    subjective: str
-    objective: str
-    assessment: str
-    plan: str
+@functools.cache
+def _soap_schema():
+    """The SOAPData model, defined on first use."""
+    from pydantic import BaseModel
+
+    class SOAPData(BaseModel):
+        subjective: str
+        objective: str
+        assessment: str
+        plan: str
+
+    return SOAPData
 
 
 # ── System prompt ─────────────────────────────────────────────────────────────
@@ -48,36 +71,51 @@ Rules:
 """.strip()
 
 
-# ── Main function ─────────────────────────────────────────────────────────────
-
+# ── Generators ────────────────────────────────────────────────────────────────
 
-def generate_soap_note(redacted_transcript: str) -> dict:
-    """
-    Send the redacted transcript to Groq and return a validated SOAP dict
-    with keys: subjective, objective, assessment, plan.
-    """
-    client = Groq(api_key=settings.GROQ_API_KEY)
-
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
+def _completion_kwargs(redacted_transcript: str) -> dict:
+    return {
+        "model": "llama-3.3-70b-versatile",
+        "messages": [
             {"role": "system", "content": _SYSTEM_PROMPT},
             {
                 "role": "user",
                 "content": f"Consultation transcript:\n\n{redacted_transcript}",
             },
         ],
-        temperature=0.2,
-        max_tokens=1500,
-        response_format={"type": "json_object"},
-    )
+        "temperature": 0.2,
+        "max_tokens": 1500,
+        "response_format": {"type": "json_object"},
+    }
+
+
+def _generate_with_groq(redacted_transcript: str) -> dict:
+    """Send the redacted transcript to Groq and validate the JSON reply."""
+    from groq import Groq
+
+    client = Groq(api_key=settings.GROQ_API_KEY)
+    response = client.chat.completions.create(**_completion_kwargs(redacted_transcript))
+    return _parse_groq_response(response)
+
+
+async def _agenerate_with_groq(redacted_transcript: str, http: "httpx.AsyncClient") -> dict:
+    from groq import AsyncGroq
+
+    client = AsyncGroq(api_key=settings.GROQ_API_KEY, http_client=http)
+    response = await client.chat.completions.create(**_completion_kwargs(redacted_transcript))
+    return _parse_groq_response(response)
+
+
+def _parse_groq_response(response) -> dict:
+    """Validate the JSON reply and collect token usage."""
+    from pydantic import ValidationError
 
     raw_json = response.choices[0].message.content
     logger.debug(f"Groq raw response: {raw_json[:200]}...")
 
     try:
         data = json.loads(raw_json)
-        soap = SOAPData(**data)
+        soap = _soap_schema()(**data)
     except (json.JSONDecodeError, ValidationError) as exc:
         logger.error(f"SOAP validation failed: {exc}. Raw: {raw_json}")
         raise RuntimeError(f"SOAP generation produced invalid output: {exc}") from exc
@@ -90,3 +128,93 @@ def generate_soap_note(redacted_transcript: str) -> dict:
         "completion_tokens": usage.completion_tokens if usage else None,
         "model": response.model or "llama-3.3-70b-versatile",
     }
+
+
+def _generate_fake(redacted_transcript: str) -> dict:
+    """
+    Deterministic SOAP note without any network call.
+    Sleeps FAKE_SOAP_LATENCY seconds to model LLM round-trip time; token
+    counts are rough word-based estimates so metrics stay populated.
+    """
+    latency = settings.FAKE_SOAP_LATENCY
+    if latency:
+        time.sleep(latency)
+    return _fake_result(redacted_transcript)
+
+
+async def _agenerate_fake(redacted_transcript: str, http: "httpx.AsyncClient") -> dict:
+    latency = settings.FAKE_SOAP_LATENCY
+    if latency:
+        await asyncio.sleep(latency)
+    return _fake_result(redacted_transcript)
+
+
+def _fake_result(redacted_transcript: str) -> dict:
+    soap = _soap_schema()(
+        subjective="Dry cough and mild fever for four days; mild exertional breathlessness.",
+        objective="Temperature 38 °C. Chest clear on auscultation.",
+        assessment="Viral upper respiratory tract infection.",
+        plan="Rest, oral fluids and paracetamol. Review if not improving within one week.",
+    )
+    prompt_words = len(_SYSTEM_PROMPT.split()) + len(redacted_transcript.split())
+    completion_words = sum(len(v.split()) for v in soap.model_dump().values())
+    return {
+        "soap": soap.model_dump(),
+        "prompt_tokens": round(prompt_words * 1.3),
+        "completion_tokens": round(completion_words * 1.3),
+        "model": "fake-soap",
+    }
+
+
+_GENERATORS = {
+    "groq": _generate_with_groq,
+    "fake": _generate_fake,
+}
+
+_AGENERATORS = {
+    "groq": _agenerate_with_groq,
+    "fake": _agenerate_fake,
+}
+
+
+def _lookup(registry: dict):
+    name = settings.SOAP_BACKEND
+    try:
+        return registry[name]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Unknown SOAP_BACKEND '{name}'. Choose one of: {', '.join(sorted(registry))}."
+        ) from None
+
+
+def _count_tokens(result: dict):
+    for kind in ("prompt", "completion"):
+        if result[f"{kind}_tokens"]:
+            GROQ_TOKENS.labels(model=result["model"], kind=kind).inc(result[f"{kind}_tokens"])
+
+
+# ── Main function ─────────────────────────────────────────────────────────────
+
+
+def generate_soap_note(redacted_transcript: str) -> dict:
+    """
+    Generate a validated SOAP note with the backend named by SOAP_BACKEND.
+
+    Returns a dict:
+        {
+            "soap":              {subjective, objective, assessment, plan},
+            "prompt_tokens":     int | None,
+            "completion_tokens": int | None,
+            "model":             str,
+        }
+    """
+    result = _lookup(_GENERATORS)(redacted_transcript)
+    _count_tokens(result)
+    return result
+
+
+async def agenerate_soap_note(redacted_transcript: str, http: "httpx.AsyncClient") -> dict:
+    """Async generate_soap_note() for the asyncio runner; same return value."""
+    result = await _lookup(_AGENERATORS)(redacted_transcript, http)
+    _count_tokens(result)
+    return result
@@ -0,0 +1,98 @@
+"""
+Direct access to the Cloudflare R2 bucket (S3 API) for the cases Django's
+storage API does not cover: pre-signed download and upload URLs (only usable
+when settings.USE_R2 is on), and object copy / delete for the audio
+retention policy, which also work on local storage.
+"""
+
+import mimetypes
+import os
+import shutil
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+
+def s3_client():
+    import boto3  # lazy import — ~200 ms, and only needed on R2
+
+    return boto3.client(
+        "s3",
+        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name="auto",
+    )
+
+
+def presigned_download_url(key: str, expiry_seconds: int = 3600) -> str:
+    """Temporary GET URL for an R2 object."""
+    return s3_client().generate_presigned_url(
+        "get_object",
+        Params={"Bucket": settings.AWS_STORAGE_BUCKET_NAME, "Key": key},
+        ExpiresIn=expiry_seconds,
+    )
+
+
+def presigned_upload_url(key: str, content_type: str, expiry_seconds: int = 3600) -> str:
+    """Temporary PUT URL so a client can upload straight to R2."""
+    return s3_client().generate_presigned_url(
+        "put_object",
+        Params={
+            "Bucket": settings.AWS_STORAGE_BUCKET_NAME,
+            "Key": key,
+            "ContentType": content_type,
+        },
+        ExpiresIn=expiry_seconds,
+    )
+
+
+# ── Object lifecycle ──────────────────────────────────────────────────────────
+
+
+def object_exists(key: str) -> bool:
+    return default_storage.exists(key)
+
+
+def object_metadata(key: str) -> tuple[int, str] | None:
+    """
+    (size in bytes, content type) of an object, or None if it does not exist.
+    On R2 this is a HEAD request; locally the type is guessed from the name.
+    """
+    if settings.USE_R2:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = s3_client().head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return head["ContentLength"], head.get("ContentType", "")
+    if not default_storage.exists(key):
+        return None
+    return default_storage.size(key), mimetypes.guess_type(key)[0] or ""
+
+
+def copy_object(source: str, dest: str, storage_class: str = ""):
+    """
+    Copy an object, overwriting dest. On R2 the copy is server-side and can
+    change the storage class (e.g. STANDARD_IA); locally it is a file copy.
+    """
+    if settings.USE_R2:
+        extra = {"StorageClass": storage_class} if storage_class else {}
+        s3_client().copy_object(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=dest,
+            CopySource={"Bucket": settings.AWS_STORAGE_BUCKET_NAME, "Key": source},
+            **extra,
+        )
+        return
+    dest_path = default_storage.path(dest)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    shutil.copyfile(default_storage.path(source), dest_path)
+
+
+def delete_object(key: str):
+    """Delete an object; deleting one that is already gone is not an error."""
+    default_storage.delete(key)
@@ -1,93 +1,440 @@
 """
-AssemblyAI transcription service.
-Supports both local file paths (development) and Cloudflare R2 pre-signed URLs (production).
-Speaker labels are mapped: first speaker → DOCTOR, second → PATIENT.
+Speech-to-text service with pluggable backends.
+
+The backend is selected with settings.TRANSCRIPTION_BACKEND:
+  assemblyai → hosted AssemblyAI API with speaker diarisation (default)
+  whisper    → local CPU inference with faster-whisper (int8), no network calls
+  fake       → deterministic scripted transcript for tests / offline runs
+
+Every backend returns the same contract from transcribe():
+    {
+        "text":       str,           # DOCTOR:/PATIENT: labelled transcript
+        "confidence": float | None,  # average word-level confidence (0.0–1.0)
+        "word_count": int,           # total word count
+        "utterances": [              # speaker turns in order; "text" is derived from these
+            {"speaker": str, "text": str, "start_ms": int | None,
+             "end_ms": int | None, "confidence": float | None},
+        ],
+        "words":      WordTimings | None,  # packed per-word timings, None if unavailable
+    }
+Speaker labels are mapped the same way everywhere: first speaker → DOCTOR,
+second → PATIENT.
+
+Backends also expose `atranscribe()` for the asyncio pipeline runner. The
+AssemblyAI backend talks to the REST API over a shared httpx.AsyncClient so
+one process can wait on many transcripts at once; the others fall back to
+running transcribe() in a thread. It stops polling after
+ASSEMBLYAI_MAX_WAIT_SECONDS with TranscriptionTimeout, which the runner
+retries like any other failure, before the encounter's lease can run out.
+
+Provider SDKs (assemblyai, faster-whisper) are imported on first use.
 """
 
+import asyncio
 import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
 
-import assemblyai as aai
-import boto3
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .storage import presigned_download_url
+from .word_timings import WordTimings
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
 
-def _get_presigned_url(key: str, expiry_seconds: int = 3600) -> str:
-    """Generate a temporary pre-signed URL for an R2 object."""
-    client = boto3.client(
-        "s3",
-        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name="auto",
-    )
-    return client.generate_presigned_url(
-        "get_object",
-        Params={"Bucket": settings.AWS_STORAGE_BUCKET_NAME, "Key": key},
-        ExpiresIn=expiry_seconds,
-    )
+# ── Shared helpers ────────────────────────────────────────────────────────────
+
+
+@contextmanager
+def _local_audio_path(encounter):
+    """
+    Yield a filesystem path for the encounter's audio.
+    Local storage is used in place; R2 objects are streamed to a temp file
+    that is removed afterwards.
+    """
+    if not settings.USE_R2:
+        yield encounter.audio_file.path
+        return
+
+    suffix = os.path.splitext(encounter.audio_file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        with encounter.audio_file.open("rb") as src:
+            shutil.copyfileobj(src, tmp)
+    try:
+        yield tmp.name
+    finally:
+        os.unlink(tmp.name)
+
+
+def _label_speakers(turns) -> list[dict]:
+    """
+    Map speaker keys (A, B, … or any hashable) to DOCTOR / PATIENT on
+    (speaker, text, start_ms, end_ms, confidence) tuples.
+    """
+    speaker_map: dict = {}
+    utterances: list[dict] = []
+    for speaker, text, start_ms, end_ms, confidence in turns:
+        if speaker not in speaker_map:
+            speaker_map[speaker] = "DOCTOR" if not speaker_map else "PATIENT"
+        utterances.append({
+            "speaker": speaker_map[speaker],
+            "text": text,
+            "start_ms": start_ms,
+            "end_ms": end_ms,
+            "confidence": confidence,
+        })
+    return utterances
+
+
+def join_turns(turns) -> str:
+    """Labelled transcript text from (speaker, text) pairs; unlabelled turns stay bare."""
+    return "\n".join(f"{speaker}: {text}" if speaker else text for speaker, text in turns)
+
+
+def _result(utterances: list[dict], confidence: float | None, word_count: int,
+            words: WordTimings | None = None) -> dict:
+    return {
+        "text": join_turns((u["speaker"], u["text"]) for u in utterances),
+        "confidence": confidence,
+        "word_count": word_count,
+        "utterances": utterances,
+        "words": words if words is not None and len(words) else None,
+    }
+
+
+def _unlabelled(text: str, confidence: float | None) -> list[dict]:
+    """Fallback when diarisation produced no utterances: one turn, no speaker."""
+    if not text:
+        return []
+    return [{"speaker": "", "text": text, "start_ms": None, "end_ms": None, "confidence": confidence}]
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _word_stats(confidences: list[float]) -> tuple[float | None, int]:
+    """Return (average confidence, word count) for a list of word confidences."""
+    if not confidences:
+        return None, 0
+    return sum(confidences) / len(confidences), len(confidences)
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+
+
+class TranscriptionTimeout(RuntimeError):
+    """The provider did not finish within the allowed wait; retrying may succeed."""
+
+
+class TranscriptionBackend:
+    """Base class for speech-to-text engines."""
+
+    name = ""
+
+    def transcribe(self, encounter) -> dict:
+        raise NotImplementedError
+
+    async def atranscribe(self, encounter, http: "httpx.AsyncClient") -> dict:
+        """Async variant for the asyncio runner; defaults to a worker thread."""
+        return await asyncio.to_thread(self.transcribe, encounter)
+
+
+class AssemblyAIBackend(TranscriptionBackend):
+    """Hosted AssemblyAI transcription with two-speaker diarisation."""
+
+    name = "assemblyai"
+
+    _API_URL = "https://api.assemblyai.com/v2"
+    _POLL_SECONDS = 3.0
+
+    def transcribe(self, encounter) -> dict:
+        import assemblyai as aai  # lazy import — ~400 ms, unused by the async REST path
+
+        aai.settings.api_key = settings.ASSEMBLYAI_API_KEY
+
+        # Resolve audio source — pre-signed URL for R2, local path otherwise
+        if settings.USE_R2:
+            audio_source = presigned_download_url(encounter.audio_file.name)
+            logger.info(f"[{encounter.id}] Using R2 pre-signed URL for transcription.")
+        else:
+            audio_source = encounter.audio_file.path
+            logger.info(f"[{encounter.id}] Using local file path for transcription.")
+
+        config = aai.TranscriptionConfig(
+            speaker_labels=True,
+            speakers_expected=2,
+            speech_models=["universal-2"],
+        )
+
+        transcriber = aai.Transcriber()
+        transcript = transcriber.transcribe(audio_source, config=config)
+
+        if transcript.status == aai.TranscriptStatus.error:
+            raise RuntimeError(f"AssemblyAI transcription failed: {transcript.error}")
+
+        avg_confidence, word_count = _word_stats([w.confidence for w in transcript.words or []])
+
+        if transcript.utterances:
+            utterances = _label_speakers(
+                (u.speaker, u.text, u.start, u.end, u.confidence) for u in transcript.utterances
+            )
+            words = WordTimings.from_words(
+                (w.start, w.end, index, w.confidence)
+                for index, u in enumerate(transcript.utterances) for w in u.words or []
+            )
+        else:
+            # Fallback: plain transcript if diarization produced no utterances
+            utterances = _unlabelled(transcript.text or "", avg_confidence)
+            words = WordTimings.from_words(
+                (w.start, w.end, 0, w.confidence) for w in transcript.words or []
+            )
+        return _result(utterances, avg_confidence, word_count, words)
+
+    async def atranscribe(self, encounter, http: "httpx.AsyncClient") -> dict:
+        """Same request as transcribe(), made over the REST API with httpx."""
+        headers = {"authorization": settings.ASSEMBLYAI_API_KEY}
+
+        if settings.USE_R2:
+            audio_url = presigned_download_url(encounter.audio_file.name)
+        else:
+            audio = await asyncio.to_thread(_read_file, encounter.audio_file.path)
+            response = await http.post(f"{self._API_URL}/upload", headers=headers, content=audio)
+            response.raise_for_status()
+            audio_url = response.json()["upload_url"]
+
+        response = await http.post(
+            f"{self._API_URL}/transcript",
+            headers=headers,
+            json={
+                "audio_url": audio_url,
+                "speaker_labels": True,
+                "speakers_expected": 2,
+                "speech_models": ["universal-2"],
+            },
+        )
+        response.raise_for_status()
+        transcript_id = response.json()["id"]
+
+        deadline = time.monotonic() + settings.ASSEMBLYAI_MAX_WAIT_SECONDS
+        while True:
+            response = await http.get(f"{self._API_URL}/transcript/{transcript_id}", headers=headers)
+            response.raise_for_status()
+            data = response.json()
+            if data["status"] == "completed":
+                break
+            if data["status"] == "error":
+                raise RuntimeError(f"AssemblyAI transcription failed: {data.get('error')}")
+            if time.monotonic() >= deadline:
+                raise TranscriptionTimeout(
+                    f"AssemblyAI transcript {transcript_id} still {data['status']} "
+                    f"after {settings.ASSEMBLYAI_MAX_WAIT_SECONDS} s"
+                )
+            await asyncio.sleep(self._POLL_SECONDS)
+
+        avg_confidence, word_count = _word_stats([w["confidence"] for w in data.get("words") or []])
+        if data.get("utterances"):
+            utterances = _label_speakers(
+                (u["speaker"], u["text"], u.get("start"), u.get("end"), u.get("confidence"))
+                for u in data["utterances"]
+            )
+            words = WordTimings.from_words(
+                (w["start"], w["end"], index, w.get("confidence"))
+                for index, u in enumerate(data["utterances"]) for w in u.get("words") or []
+            )
+        else:
+            utterances = _unlabelled(data.get("text") or "", avg_confidence)
+            words = WordTimings.from_words(
+                (w["start"], w["end"], 0, w.get("confidence")) for w in data.get("words") or []
+            )
+        return _result(utterances, avg_confidence, word_count, words)
+
+
+class WhisperBackend(TranscriptionBackend):
+    """
+    Local CPU transcription with faster-whisper (CTranslate2, int8 by default).
+
+    Whisper does not diarise, so speaker turns are inferred from pauses:
+    a silence of at least WHISPER_TURN_GAP_SECONDS between segments switches
+    the speaker. That is a heuristic — use AssemblyAI where labels matter.
+    """
+
+    name = "whisper"
+
+    # The model is heavy, so it is loaded once per process on first use.
+    _lock = threading.Lock()
+    _model = None
+
+    @classmethod
+    def _get_model(cls):
+        if cls._model is None:
+            with cls._lock:
+                if cls._model is None:  # double-checked locking
+                    from faster_whisper import WhisperModel  # optional dependency
+
+                    logger.info(
+                        f"Loading faster-whisper model '{settings.WHISPER_MODEL}' "
+                        f"({settings.WHISPER_COMPUTE_TYPE}, CPU)…"
+                    )
+                    cls._model = WhisperModel(
+                        settings.WHISPER_MODEL,
+                        device="cpu",
+                        compute_type=settings.WHISPER_COMPUTE_TYPE,
+                        cpu_threads=settings.WHISPER_CPU_THREADS,
+                    )
+                    logger.info("faster-whisper ready.")
+        return cls._model
+
+    def transcribe(self, encounter) -> dict:
+        model = self._get_model()
+        gap = settings.WHISPER_TURN_GAP_SECONDS
+
+        confidences: list[float] = []
+        # (start_ms, end_ms, turn index, probability) per word, for WordTimings
+        word_rows: list[tuple] = []
+        # Turns as [speaker, text, start_ms, end_ms, word probabilities]
+        turns: list[list] = []
+        speaker = 0
+        last_end = None
+
+        with _local_audio_path(encounter) as path:
+            logger.info(f"[{encounter.id}] Transcribing locally with faster-whisper.")
+            segments, _info = model.transcribe(path, word_timestamps=True, vad_filter=True)
+            for segment in segments:  # generator — decoding happens while iterating
+                text = segment.text.strip()
+                if not text:
+                    continue
+                probabilities = [w.probability for w in segment.words or []]
+                confidences.extend(probabilities)
+                if last_end is not None and segment.start - last_end >= gap:
+                    speaker = 1 - speaker
+                last_end = segment.end
+                # Merge consecutive segments from the same speaker into one turn
+                if turns and turns[-1][0] == speaker:
+                    turns[-1][1] = f"{turns[-1][1]} {text}"
+                    turns[-1][3] = round(segment.end * 1000)
+                    turns[-1][4].extend(probabilities)
+                else:
+                    turns.append([
+                        speaker, text, round(segment.start * 1000), round(segment.end * 1000), probabilities,
+                    ])
+                word_rows.extend(
+                    (w.start * 1000, w.end * 1000, len(turns) - 1, w.probability) for w in segment.words or []
+                )
+
+        avg_confidence, word_count = _word_stats(confidences)
+        utterances = _label_speakers(
+            (speaker, text, start_ms, end_ms, _word_stats(probs)[0])
+            for speaker, text, start_ms, end_ms, probs in turns
+        )
+        return _result(utterances, avg_confidence, word_count, WordTimings.from_words(word_rows, len(word_rows)))
+
+
+class FakeBackend(TranscriptionBackend):
+    """
+    Deterministic transcript for tests and offline environments.
+    Cycles a scripted consultation until FAKE_TRANSCRIPTION_WORDS words are
+    produced, after sleeping FAKE_TRANSCRIPTION_LATENCY seconds to model
+    provider round-trip time.
+    """
+
+    name = "fake"
+    confidence = 0.95
+    ms_per_word = 350
+
+    _SCRIPT = [
+        ("A", "Good morning, what brings you in today?"),
+        ("B", "I have had a dry cough and a mild fever for about four days."),
+        ("A", "Any shortness of breath or chest pain?"),
+        ("B", "A little breathless on the stairs, no chest pain."),
+        ("A", "Your temperature is thirty eight degrees and your chest sounds clear."),
+        ("A", "This looks like a viral upper respiratory infection."),
+        ("A", "Rest, fluids and paracetamol, and come back if it is not better in a week."),
+        ("B", "Thank you, doctor."),
+    ]
+
+    def transcribe(self, encounter) -> dict:
+        latency = settings.FAKE_TRANSCRIPTION_LATENCY
+        if latency:
+            time.sleep(latency)
+        return self._result()
+
+    async def atranscribe(self, encounter, http: "httpx.AsyncClient") -> dict:
+        latency = settings.FAKE_TRANSCRIPTION_LATENCY
+        if latency:
+            await asyncio.sleep(latency)
+        return self._result()
+
+    def _result(self) -> dict:
+        target = settings.FAKE_TRANSCRIPTION_WORDS
+        turns: list[tuple] = []
+        word_count = 0
+        i = 0
+        while word_count < target:
+            speaker, line = self._SCRIPT[i % len(self._SCRIPT)]
+            words = line.split()[: target - word_count]
+            start_ms = word_count * self.ms_per_word
+            turns.append((
+                speaker, " ".join(words), start_ms, start_ms + len(words) * self.ms_per_word, self.confidence,
+            ))
+            word_count += len(words)
+            i += 1
+
+        words = WordTimings.from_words(
+            (i * self.ms_per_word, (i + 1) * self.ms_per_word, index, self.confidence)
+            for index, turn in enumerate(turns)
+            for i in range(turn[2] // self.ms_per_word, turn[3] // self.ms_per_word)
+        )
+        return _result(_label_speakers(turns), self.confidence if word_count else None, word_count, words)
+
+
+_BACKENDS: dict[str, type[TranscriptionBackend]] = {
+    backend.name: backend for backend in (AssemblyAIBackend, WhisperBackend, FakeBackend)
+}
+
+
+def get_backend() -> TranscriptionBackend:
+    """Return an instance of the backend named by settings.TRANSCRIPTION_BACKEND."""
+    name = settings.TRANSCRIPTION_BACKEND
+    try:
+        return _BACKENDS[name]()
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Unknown TRANSCRIPTION_BACKEND '{name}'. "
+            f"Choose one of: {', '.join(sorted(_BACKENDS))}."
+        ) from None
+
+
+# ── Main function ─────────────────────────────────────────────────────────────
 
 
 def transcribe_audio(encounter) -> dict:
     """
-    Transcribe the encounter's audio file using AssemblyAI.
+    Transcribe the encounter's audio file with the configured backend.
 
     Returns a dict:
         {
-            "text":       str,    # DOCTOR:/PATIENT: labelled transcript
-            "confidence": float,  # average word-level confidence (0.0–1.0)
-            "word_count": int,    # total word count
+            "text":       str,         # DOCTOR:/PATIENT: labelled transcript
+            "confidence": float,       # average word-level confidence (0.0–1.0)
+            "word_count": int,         # total word count
+            "utterances": list[dict],  # speaker turns with timings (see module docstring)
+            "words":      WordTimings | None,  # per-word timings and confidence
         }
     """
-    aai.settings.api_key = settings.ASSEMBLYAI_API_KEY
-
-    # Resolve audio source — pre-signed URL for R2, local path otherwise
-    if settings.USE_R2:
-        audio_source = _get_presigned_url(encounter.audio_file.name)
-        logger.info(f"[{encounter.id}] Using R2 pre-signed URL for transcription.")
-    else:
-        audio_source = encounter.audio_file.path
-        logger.info(f"[{encounter.id}] Using local file path for transcription.")
-
-    config = aai.TranscriptionConfig(
-        speaker_labels=True,
-        speakers_expected=2,
-        speech_models=["universal-2"],
-    )
-
-    transcriber = aai.Transcriber()
-    transcript = transcriber.transcribe(audio_source, config=config)
-
-    if transcript.status == aai.TranscriptStatus.error:
-        raise RuntimeError(f"AssemblyAI transcription failed: {transcript.error}")
-
-    # ── Compute word-level confidence metrics ─────────────────────────────────
-    words = transcript.words or []
-    if words:
-        avg_confidence = sum(w.confidence for w in words) / len(words)
-        word_count = len(words)
-    else:
-        avg_confidence = None
-        word_count = 0
+    return get_backend().transcribe(encounter)
 
-    # ── Map speaker letters (A, B, …) to DOCTOR / PATIENT ───────────────────
-    speaker_map: dict[str, str] = {}
-    lines: list[str] = []
-
-    if transcript.utterances:
-        for utterance in transcript.utterances:
-            if utterance.speaker not in speaker_map:
-                label = "DOCTOR" if not speaker_map else "PATIENT"
-                speaker_map[utterance.speaker] = label
-            lines.append(f"{speaker_map[utterance.speaker]}: {utterance.text}")
-        text = "\n".join(lines)
-    else:
-        # Fallback: plain transcript if diarization produced no utterances
-        text = transcript.text or ""
 
-    return {
-        "text": text,
-        "confidence": avg_confidence,
-        "word_count": word_count,
-    }
+async def atranscribe_audio(encounter, http: "httpx.AsyncClient") -> dict:
+    """Async transcribe_audio() for the asyncio runner; same return value."""
+    return await get_backend().atranscribe(encounter, http)
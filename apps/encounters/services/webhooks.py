@@ -0,0 +1,306 @@
+"""
+Outbound webhooks for finished encounters.
+
+When an encounter reaches COMPLETED, or FAILED on its last attempt, one
+WebhookEvent per active endpoint of its owner is written (the outbox) and,
+once that commits, a deliver_webhooks task is scheduled for each endpoint on
+the "webhooks" queue:
+
+  • coalescing — the task is delayed by WEBHOOK_BATCH_WINDOW_SECONDS and at
+    most one is scheduled per endpoint per window (a cache.add() marker), so
+    a burst of completions goes out as a few requests of up to
+    WEBHOOK_MAX_BATCH_SIZE events instead of one request per encounter
+  • leasing — due events are claimed by setting a fresh delivery_id and
+    pushing next_attempt_at past the request timeout, so two tasks never
+    send the same event at once
+  • retries — a failed request (non-2xx, timeout, connection error) backs
+    off exponentially per event up to WEBHOOK_MAX_ATTEMPTS; the periodic
+    dispatch_webhooks sweep also re-schedules anything due whose task was
+    lost, e.g. while Redis was unavailable
+
+Requests are a JSON body {"delivery_id": …, "events": [...]} signed with the
+endpoint's secret:
+
+    X-VitalNote-Timestamp: <unix seconds>
+    X-VitalNote-Signature: v1=<hex HMAC-SHA256 of "<timestamp>.<body>">
+
+Events carry ids and status only; receivers fetch the note through the API.
+Delivery is at-least-once, so receivers should de-duplicate on event id.
+
+Endpoint hosts must resolve to public addresses only, so a URL cannot point
+the workers at internal services. The check runs when the endpoint is saved
+and again before every request, which then connects to the address just
+checked (a DNS change in between cannot redirect it). WEBHOOK_ALLOW_PRIVATE_HOSTS
+lifts the check for local development.
+"""
+
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import random
+import socket
+import time
+import uuid
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from apps.monitoring.metrics import WEBHOOK_DELIVERIES, WEBHOOK_EVENTS
+
+from ..models import Encounter, WebhookEndpoint, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-VitalNote-Signature"
+TIMESTAMP_HEADER = "X-VitalNote-Timestamp"
+DELIVERY_HEADER = "X-VitalNote-Delivery"
+
+EventStatus = WebhookEvent.Status
+
+
+# ── Signing ───────────────────────────────────────────────────────────────────
+
+
+def sign(secret: str, timestamp: int, body: bytes) -> str:
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"v1={digest}"
+
+
+def verify_signature(secret: str, timestamp: str, body: bytes, signature: str, tolerance: int = 300) -> bool:
+    """Receiver-side check: valid HMAC and a timestamp within `tolerance` seconds (replays)."""
+    try:
+        sent_at = int(timestamp)
+    except (TypeError, ValueError):
+        return False
+    if abs(time.time() - sent_at) > tolerance:
+        return False
+    return hmac.compare_digest(sign(secret, sent_at, body), signature or "")
+
+
+# ── Endpoint addresses ────────────────────────────────────────────────────────
+
+
+class UnsafeWebhookURL(ValueError):
+    """The endpoint's host is not a public address."""
+
+
+def resolve_endpoint_address(url: str) -> str | None:
+    """
+    Resolve the URL's host and return the address to connect to, or None
+    under WEBHOOK_ALLOW_PRIVATE_HOSTS. Raises UnsafeWebhookURL if the host
+    cannot be resolved or any of its addresses is private, loopback,
+    link-local, reserved or multicast.
+    """
+    if settings.WEBHOOK_ALLOW_PRIVATE_HOSTS:
+        return None
+    parts = urlsplit(url)
+    if not parts.hostname:
+        raise UnsafeWebhookURL("The URL has no host.")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError, ValueError) as exc:
+        raise UnsafeWebhookURL(f"Cannot resolve {parts.hostname}.") from exc
+    addresses = [ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos]
+    for address in addresses:
+        mapped = getattr(address, "ipv4_mapped", None) or address
+        if not mapped.is_global or mapped.is_multicast:
+            raise UnsafeWebhookURL(f"{parts.hostname} resolves to a non-public address.")
+    return str(addresses[0])
+
+
+# ── Outbox ────────────────────────────────────────────────────────────────────
+
+
+def record_encounter_event(encounter: Encounter, status: str, stage: str | None = None):
+    """
+    Queue a notification of the encounter's final status to each of its
+    owner's endpoints. FAILED events name the failed stage as a fixed code
+    ("transcription_failed", …); the exception text never leaves the app.
+    """
+    endpoint_ids = list(
+        WebhookEndpoint.objects.filter(user_id=encounter.user_id, is_active=True).values_list("id", flat=True)
+    )
+    if not endpoint_ids:
+        return
+    completed = status == Encounter.Status.COMPLETED
+    event_type = WebhookEvent.Type.COMPLETED if completed else WebhookEvent.Type.FAILED
+    error_code = "" if completed else f"{stage or 'pipeline'}_failed"
+    now = timezone.now()
+    events = []
+    for endpoint_id in endpoint_ids:
+        event_id = uuid.uuid4()
+        events.append(WebhookEvent(
+            id=event_id,
+            endpoint_id=endpoint_id,
+            type=event_type,
+            next_attempt_at=now,
+            payload={
+                "id": str(event_id),
+                "type": event_type,
+                "created_at": now.isoformat(),
+                "data": {
+                    "encounter_id": str(encounter.id),
+                    "status": status,
+                    "error_code": error_code,
+                },
+            },
+        ))
+    WebhookEvent.objects.bulk_create(events)
+    transaction.on_commit(lambda: schedule_deliveries(endpoint_ids), robust=True)
+
+
+def schedule_deliveries(endpoint_ids):
+    """Schedule one delayed delivery per endpoint unless one is already pending in this window."""
+    from ..tasks import deliver_webhooks
+
+    window = settings.WEBHOOK_BATCH_WINDOW_SECONDS
+    for endpoint_id in endpoint_ids:
+        try:
+            first = cache.add(_pending_key(endpoint_id), 1, timeout=int(window) + 30)
+        except Exception as exc:  # no coalescing without the cache — still deliver
+            logger.warning(f"Webhook coalescing cache unavailable: {exc}")
+            first = True
+        if not first:
+            continue
+        try:
+            deliver_webhooks.apply_async(args=[str(endpoint_id)], countdown=window)
+        except Exception as exc:  # the dispatch_webhooks sweep picks the events up later
+            logger.warning(f"Could not schedule webhook delivery for endpoint {endpoint_id}: {exc}")
+            cache.delete(_pending_key(endpoint_id))
+
+
+def _pending_key(endpoint_id) -> str:
+    return f"webhook-scheduled:{endpoint_id}"
+
+
+# ── Delivery ──────────────────────────────────────────────────────────────────
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retry number `attempts` (1-based), with ±10 % jitter."""
+    delay = min(
+        settings.WEBHOOK_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), settings.WEBHOOK_BACKOFF_MAX_SECONDS,
+    )
+    return delay * random.uniform(0.9, 1.1)
+
+
+def _claim(endpoint: WebhookEndpoint) -> tuple[uuid.UUID, list[WebhookEvent]]:
+    now = timezone.now()
+    due = WebhookEvent.objects.filter(endpoint=endpoint, status=EventStatus.PENDING, next_attempt_at__lte=now)
+    ids = list(due.order_by("created_at").values_list("id", flat=True)[: settings.WEBHOOK_MAX_BATCH_SIZE])
+    delivery_id = uuid.uuid4()
+    if ids:
+        # The lease outlives the request; a crashed worker's events become due again after it
+        due.filter(id__in=ids).update(
+            delivery_id=delivery_id,
+            next_attempt_at=now + timedelta(seconds=settings.WEBHOOK_TIMEOUT_SECONDS * 3),
+        )
+    events = list(WebhookEvent.objects.filter(delivery_id=delivery_id).order_by("created_at"))
+    return delivery_id, events
+
+
+def _send(endpoint: WebhookEndpoint, delivery_id: uuid.UUID, events: list[WebhookEvent]) -> str:
+    """POST one batch; returns "" on a 2xx response, otherwise the error."""
+    import httpx
+
+    body = json.dumps(
+        {"delivery_id": str(delivery_id), "events": [event.payload for event in events]},
+        separators=(",", ":"),
+    ).encode()
+    timestamp = int(time.time())
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": "VitalNote-Webhooks/1.0",
+        TIMESTAMP_HEADER: str(timestamp),
+        SIGNATURE_HEADER: sign(endpoint.secret, timestamp, body),
+        DELIVERY_HEADER: str(delivery_id),
+    }
+    try:
+        address = resolve_endpoint_address(endpoint.url)
+    except UnsafeWebhookURL as exc:
+        return f"Blocked: {exc}"
+    url, extensions = httpx.URL(endpoint.url), {}
+    if address is not None:
+        # Connect to the checked address; Host and TLS (SNI, certificate) keep the name
+        headers["Host"] = url.netloc.decode()
+        extensions["sni_hostname"] = url.host
+        url = url.copy_with(host=address)
+    try:
+        with httpx.Client(timeout=settings.WEBHOOK_TIMEOUT_SECONDS, follow_redirects=False) as client:
+            response = client.post(url, content=body, headers=headers, extensions=extensions)
+    except httpx.HTTPError as exc:
+        return f"{type(exc).__name__}: {exc}"
+    if response.is_success:
+        return ""
+    return f"HTTP {response.status_code}"  # not the body: it is the receiver's, shown back in the admin
+
+
+def deliver_endpoint(endpoint_id) -> int:
+    """Send the endpoint's due events in batches until none are left. Returns the number delivered."""
+    from ..tasks import deliver_webhooks
+
+    try:
+        cache.delete(_pending_key(endpoint_id))  # events recorded from now on schedule a new task
+    except Exception:
+        pass
+    endpoint = WebhookEndpoint.objects.filter(id=endpoint_id, is_active=True).first()
+    if endpoint is None:
+        return 0
+
+    delivered = 0
+    while True:
+        delivery_id, events = _claim(endpoint)
+        if not events:
+            return delivered
+        error = _send(endpoint, delivery_id, events)
+        batch = WebhookEvent.objects.filter(delivery_id=delivery_id, status=EventStatus.PENDING)
+        if not error:
+            batch.update(
+                status=EventStatus.DELIVERED, delivered_at=timezone.now(),
+                attempts=F("attempts") + 1, last_error="",
+            )
+            WEBHOOK_DELIVERIES.labels(outcome="delivered").inc()
+            WEBHOOK_EVENTS.labels(outcome="delivered").inc(len(events))
+            delivered += len(events)
+            continue
+
+        logger.warning(f"Webhook delivery {delivery_id} to {endpoint.url} failed: {error}")
+        batch.update(attempts=F("attempts") + 1, last_error=error)
+        given_up = batch.filter(attempts__gte=settings.WEBHOOK_MAX_ATTEMPTS).update(status=EventStatus.FAILED)
+        retrying = len(events) - given_up
+        WEBHOOK_DELIVERIES.labels(outcome="retry" if retrying else "failed").inc()
+        WEBHOOK_EVENTS.labels(outcome="failed").inc(given_up)
+        if retrying:
+            attempts = batch.aggregate(n=Max("attempts"))["n"]
+            delay = backoff_seconds(attempts)
+            batch.update(next_attempt_at=timezone.now() + timedelta(seconds=delay))
+            WEBHOOK_EVENTS.labels(outcome="retry").inc(retrying)
+            deliver_webhooks.apply_async(args=[str(endpoint.id)], countdown=delay)
+        return delivered
+
+
+def dispatch_due() -> int:
+    """
+    Periodic sweep: schedule endpoints with due events (lost or retried
+    tasks) and drop delivered events past WEBHOOK_EVENT_RETENTION_DAYS.
+    Returns the number of endpoints scheduled.
+    """
+    endpoint_ids = list(
+        WebhookEvent.objects.filter(
+            status=EventStatus.PENDING, next_attempt_at__lte=timezone.now(), endpoint__is_active=True,
+        ).order_by().values_list("endpoint_id", flat=True).distinct()
+    )
+    schedule_deliveries(endpoint_ids)
+    WebhookEvent.objects.filter(
+        status=EventStatus.DELIVERED,
+        delivered_at__lt=timezone.now() - timedelta(days=settings.WEBHOOK_EVENT_RETENTION_DAYS),
+    ).delete()
+    return len(endpoint_ids)
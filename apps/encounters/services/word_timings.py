@@ -0,0 +1,126 @@
+"""
+Compact word-level timings and confidence for a transcript.
+
+One row per word would turn an hour-long consultation into ~9 000 rows, so
+the words are stored as a single packed blob on Transcript.word_timings:
+
+    header      "VNW1" + uint32 word count                       (8 bytes)
+    start_ms    uint32[count]   word start offset
+    end_ms      uint32[count]   word end offset
+    utterance   uint16[count]   Utterance.index the word belongs to
+    confidence  uint8[count]    round(confidence × 254), 255 = unknown
+
+11 bytes per word, little-endian. Unpacking is zero-copy (np.frombuffer),
+and the query helpers — low-confidence spans, time → word — are vectorised,
+so no Python object is ever built per word.
+"""
+
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+MAGIC = b"VNW1"
+_HEADER = struct.Struct("<4sI")
+_CONFIDENCE_SCALE = 254
+CONFIDENCE_UNKNOWN = 255
+
+_START = np.dtype("<u4")
+_END = np.dtype("<u4")
+_UTTERANCE = np.dtype("<u2")
+_CONFIDENCE = np.dtype("u1")
+
+
+@dataclass(frozen=True)
+class WordTimings:
+    start_ms: np.ndarray
+    end_ms: np.ndarray
+    utterance: np.ndarray
+    confidence_q: np.ndarray
+
+    # ── Construction ──────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_words(cls, words, count: int = -1) -> "WordTimings":
+        """
+        Build from an iterable of (start_ms, end_ms, utterance_index, confidence)
+        tuples; confidence may be None. Pass count when known to preallocate.
+        """
+        rows = np.fromiter(
+            ((s, e, u, np.nan if c is None else c) for s, e, u, c in words),
+            dtype=np.dtype([("s", "f8"), ("e", "f8"), ("u", "f8"), ("c", "f8")]),
+            count=count,
+        )
+        return cls(
+            start_ms=rows["s"].astype(_START),
+            end_ms=rows["e"].astype(_END),
+            utterance=rows["u"].astype(_UTTERANCE),
+            confidence_q=_quantise(rows["c"]),
+        )
+
+    def pack(self) -> bytes:
+        return b"".join((
+            _HEADER.pack(MAGIC, len(self)),
+            self.start_ms.astype(_START, copy=False).tobytes(),
+            self.end_ms.astype(_END, copy=False).tobytes(),
+            self.utterance.astype(_UTTERANCE, copy=False).tobytes(),
+            self.confidence_q.astype(_CONFIDENCE, copy=False).tobytes(),
+        ))
+
+    @classmethod
+    def unpack(cls, data) -> "WordTimings":
+        """Read a packed blob (bytes or memoryview) without copying the arrays."""
+        buf = memoryview(data)
+        magic, count = _HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise ValueError("Not a packed word timings blob.")
+        arrays = []
+        offset = _HEADER.size
+        for dtype in (_START, _END, _UTTERANCE, _CONFIDENCE):
+            arrays.append(np.frombuffer(buf, dtype=dtype, count=count, offset=offset))
+            offset += count * dtype.itemsize
+        return cls(*arrays)
+
+    def __len__(self):
+        return len(self.start_ms)
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    @property
+    def confidence(self) -> np.ndarray:
+        """Confidence as float32, NaN where unknown."""
+        conf = self.confidence_q.astype(np.float32) / _CONFIDENCE_SCALE
+        conf[self.confidence_q == CONFIDENCE_UNKNOWN] = np.nan
+        return conf
+
+    def words_at(self, offsets_ms) -> np.ndarray:
+        """
+        Index of the word being spoken at each offset: the last word starting
+        at or before it (so pauses map to the preceding word), -1 before the
+        first word. Assumes words are in time order, as providers return them.
+        """
+        return np.searchsorted(self.start_ms, np.asarray(offsets_ms), side="right") - 1
+
+    def word_at(self, offset_ms: int) -> int | None:
+        index = int(self.words_at(offset_ms))
+        return index if index >= 0 else None
+
+    def low_confidence_spans(self, threshold: float = 0.6, min_words: int = 1) -> np.ndarray:
+        """
+        Runs of consecutive words with known confidence below `threshold`, as
+        an (n, 2) array of [first_word, end_word) index pairs.
+        """
+        q_threshold = int(np.ceil(threshold * _CONFIDENCE_SCALE))
+        low = (self.confidence_q < q_threshold).view(np.int8)
+        edges = np.diff(np.concatenate(([0], low, [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        keep = (ends - starts) >= min_words
+        return np.column_stack((starts[keep], ends[keep]))
+
+
+def _quantise(confidence: np.ndarray) -> np.ndarray:
+    known = ~np.isnan(confidence)
+    q = np.full(confidence.shape, CONFIDENCE_UNKNOWN, dtype=_CONFIDENCE)
+    q[known] = np.rint(np.clip(confidence[known], 0.0, 1.0) * _CONFIDENCE_SCALE)
+    return q
@@ -0,0 +1,45 @@
+"""
+Model signal handlers for the encounters app, connected in EncountersConfig.ready().
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Encounter, SearchDocument, SOAPNote, Transcript
+from .services.search import index_encounter, remove_fts_entry
+
+
+# ── Search index ──────────────────────────────────────────────────────────────
+
+
+@receiver(post_save, sender=SOAPNote)
+@receiver(post_save, sender=Transcript)
+def reindex_encounter(sender, instance, **kwargs):
+    # After commit, so the index never holds text from a rolled-back write;
+    # robust=True keeps an indexing error from failing the pipeline stage.
+    encounter_id = instance.encounter_id
+    transaction.on_commit(lambda: index_encounter(encounter_id), robust=True)
+
+
+@receiver(post_delete, sender=SearchDocument)
+def drop_fts_entry(sender, instance, **kwargs):
+    remove_fts_entry(instance.encounter_id)
+
+
+# ── Payload cache ─────────────────────────────────────────────────────────────
+
+
+@receiver(post_save, sender=SOAPNote)
+@receiver(post_save, sender=Transcript)
+@receiver(post_delete, sender=SOAPNote)
+@receiver(post_delete, sender=Transcript)
+def touch_encounter(sender, instance, raw=False, **kwargs):
+    """
+    Bump Encounter.updated_at so cached payloads (services/payload_cache.py),
+    which are keyed on it, are not served once the transcript or note changes.
+    """
+    if raw:  # loaddata
+        return
+    Encounter.objects.filter(id=instance.encounter_id).update(updated_at=timezone.now())
@@ -6,26 +6,250 @@ Chain:  PENDING → [transcribe] → TRANSCRIBED
                 → [SOAP gen]   → COMPLETED
                                 (FAILED on any unrecoverable error)
 
-Each step checks the current status before running so that retries are idempotent.
+Each completed step is checkpointed on the Encounter (last_completed_stage)
+together with its output and metrics, so a Celery retry or an admin
+"reprocess from stage" resumes right after the last successful step — a
+redaction or Groq failure never triggers another transcription.
+Every step is wrapped in measure_stage() so its wall time, CPU time and peak
+RSS land on the encounter's QualityMetric alongside the queue wait.
+
+The stage bookkeeping helpers below are shared with the asyncio runner
+(apps/encounters/async_runner.py), which drives the same stages when
+PIPELINE_RUNNER=async. They write an encounter's Transcript, SOAPNote and
+QualityMetric under a row lock on the encounter, because with
+ENCOUNTER_PARTITIONING the database no longer keeps those one-to-one.
 """
 
 import logging
+from contextlib import contextmanager
 
 from celery import shared_task
+from django.db import transaction
+from django.utils import timezone
+
+from apps.monitoring.metrics import DEDUP_HITS, QUEUE_WAIT
 
-from .models import Encounter, QualityMetric, SOAPNote, Transcript
-from .services.redaction import redact_pii
+from .admission import admit_deferred
+from .instrumentation import measure_stage
+from .models import Encounter, QualityMetric, SOAPNote, Transcript, Utterance
+from .services.dedup import clone_outputs, file_sha256, find_completed_duplicate
+from .services.partitions import maintain_partitions
+from .services.redaction import redact_utterances
+from .services.retention import apply_audio_retention as _apply_audio_retention
+from .services.rollup import rollup_quality_metrics as _rollup_quality_metrics
 from .services.soap import generate_soap_note
-from .services.transcription import transcribe_audio
+from .services.transcription import join_turns, transcribe_audio
+from .services.webhooks import deliver_endpoint, dispatch_due, record_encounter_event
 
 logger = logging.getLogger(__name__)
 
+Stage = Encounter.Stage
+
+
+MAX_ATTEMPTS = 3  # first run + process_encounter's max_retries
+
+_NOT_DOCUMENTED = "Not documented in this consultation."
+
+
+# ── Stage bookkeeping (shared with the asyncio runner) ────────────────────────
+
+
+@contextmanager
+def _encounter_lock(encounter: Encounter):
+    """
+    Transaction holding the encounter's row lock, so update_or_create() of
+    its one-to-one rows cannot race another attempt (retry and admin
+    reprocess) into inserting a second row.
+    """
+    with transaction.atomic():
+        list(Encounter.objects.select_for_update().filter(id=encounter.id).values_list("id", flat=True))
+        yield
+
+
+def _checkpoint(encounter: Encounter, stage: str, metrics: dict):
+    """Record a completed stage, its status and metrics in one step."""
+    encounter.last_completed_stage = stage
+    encounter.status = encounter.resume_status()
+    encounter.stage_errors.pop(stage, None)
+    encounter.save(update_fields=["last_completed_stage", "status", "stage_errors", "updated_at"])
+    if metrics:
+        with _encounter_lock(encounter):
+            QualityMetric.objects.update_or_create(encounter=encounter, defaults=metrics)
+        metrics.clear()
+    if encounter.status == Encounter.Status.COMPLETED:
+        record_encounter_event(encounter, Encounter.Status.COMPLETED)
+
+
+def begin_attempt(encounter: Encounter) -> dict:
+    """
+    Start a pipeline attempt: record queue wait on the first one, undo a
+    FAILED status left by the previous attempt and resume from the checkpoint.
+    Returns the metrics dict flushed to QualityMetric at each checkpoint.
+    Reprocessing resets attempt_count too, but keeps the original queue wait.
+    """
+    if encounter.attempt_count == 0:
+        queue_wait = (timezone.now() - encounter.created_at).total_seconds()
+        # Saved now rather than at the first checkpoint, which a failing attempt never reaches
+        with _encounter_lock(encounter):
+            _, created = QualityMetric.objects.get_or_create(
+                encounter=encounter, defaults={"queue_wait_ms": queue_wait * 1000},
+            )
+        if created:
+            QUEUE_WAIT.labels(lane=encounter.source).observe(queue_wait)
+
+    encounter.attempt_count += 1
+    encounter.status = encounter.resume_status()
+    encounter.error_message = ""
+    encounter.save(update_fields=["attempt_count", "status", "error_message", "updated_at"])
+    if encounter.last_completed_stage:
+        logger.info(f"[{encounter.id}] Attempt {encounter.attempt_count}: resuming after "
+                    f"{encounter.last_completed_stage}.")
+    return {}
+
+
+def clone_from_duplicate(encounter: Encounter, metrics: dict) -> bool:
+    """
+    On the first attempt, complete the encounter from an earlier COMPLETED
+    upload of the same audio instead of running the pipeline. Returns True
+    if it did. Reprocessing and retries always run the stages for real.
+    """
+    if encounter.attempt_count != 1 or encounter.last_completed_stage:
+        return False
+    # Reprocessing from transcription also starts at attempt 1, with the old transcript still in place
+    if Transcript.objects.filter(encounter=encounter).exists():
+        return False
+    if not encounter.audio_sha256:
+        encounter.audio_sha256 = file_sha256(encounter.audio_file)
+        encounter.save(update_fields=["audio_sha256"])
+    source = find_completed_duplicate(encounter)
+    if source is None:
+        return False
+
+    with _encounter_lock(encounter):
+        clone_outputs(source, encounter, metrics)
+        encounter.duplicate_of = source
+        encounter.save(update_fields=["duplicate_of"])
+        _checkpoint(encounter, Stage.SOAP, metrics)
+    DEDUP_HITS.inc()
+    logger.info(f"[{encounter.id}] Identical audio already processed as {source.id} — outputs cloned.")
+    return True
+
+
+def save_transcription(encounter: Encounter, result: dict, metrics: dict):
+    metrics["transcript_confidence"] = result["confidence"]
+    metrics["transcript_word_count"] = result["word_count"]
+    with _encounter_lock(encounter):
+        # update_or_create: a reprocess from transcription replaces the old text
+        words = result.get("words")
+        transcript, created = Transcript.objects.update_or_create(
+            encounter=encounter,
+            defaults={
+                "raw_text": result["text"],
+                "redacted_text": "",
+                "word_timings": words.pack() if words is not None else None,
+            },
+        )
+        if not created:
+            transcript.utterances.all().delete()
+        Utterance.objects.bulk_create(
+            [
+                Utterance(
+                    transcript=transcript,
+                    index=index,
+                    speaker=u["speaker"],
+                    start_ms=u["start_ms"],
+                    end_ms=u["end_ms"],
+                    raw_text=u["text"],
+                    confidence=u["confidence"],
+                )
+                for index, u in enumerate(result["utterances"])
+            ],
+            batch_size=500,
+        )
+        _checkpoint(encounter, Stage.TRANSCRIPTION, metrics)
+    logger.info(f"[{encounter.id}] Transcription complete. "
+                f"Confidence: {result['confidence']}, Words: {result['word_count']}")
+
+
+def save_redaction(encounter: Encounter, redacted_texts: list[str], metrics: dict):
+    """Store per-utterance redactions and the derived transcript-level text."""
+    transcript = Transcript.objects.get(encounter=encounter)
+    utterances = list(transcript.utterances.only("id", "index", "speaker"))
+    with transaction.atomic():
+        if utterances:
+            for utterance, redacted in zip(utterances, redacted_texts):
+                utterance.redacted_text = redacted
+            Utterance.objects.bulk_update(utterances, ["redacted_text"], batch_size=500)
+            transcript.redacted_text = join_turns((u.speaker, u.redacted_text) for u in utterances)
+        else:  # transcribed before utterances were stored: one text per line
+            transcript.redacted_text = "\n".join(redacted_texts)
+        transcript.save(update_fields=["redacted_text"])
+        _checkpoint(encounter, Stage.REDACTION, metrics)
+    logger.info(f"[{encounter.id}] Redaction complete.")
+
+
+def save_soap(encounter: Encounter, result: dict, metrics: dict):
+    soap_data = result["soap"]
+    metrics["groq_prompt_tokens"] = result["prompt_tokens"]
+    metrics["groq_completion_tokens"] = result["completion_tokens"]
+    metrics["groq_model"] = result["model"]
+
+    # Count how many sections have substantive content
+    sections_complete = sum(1 for v in soap_data.values() if v.strip() != _NOT_DOCUMENTED)
+    metrics["soap_sections_complete"] = sections_complete
 
-@shared_task(bind=True, max_retries=2, default_retry_delay=60)
+    with _encounter_lock(encounter):
+        SOAPNote.objects.update_or_create(encounter=encounter, defaults=soap_data)
+        _checkpoint(encounter, Stage.SOAP, metrics)
+    logger.info(
+        f"[{encounter.id}] Processing complete ✓ | "
+        f"SOAP sections: {sections_complete}/4 | "
+        f"Tokens: {result['prompt_tokens']}→{result['completion_tokens']}"
+    )
+
+
+def record_failure(encounter: Encounter, stage: str | None, exc: Exception, **extra):
+    """Persist the error so the UI can display it; the checkpoint is left untouched."""
+    logger.error(f"[{encounter.id}] Pipeline failed during {stage}: {exc}", exc_info=exc)
+    stage_errors = {**encounter.stage_errors, str(stage): str(exc)}
+    Encounter.objects.filter(id=encounter.id).update(
+        status=Encounter.Status.FAILED,
+        error_message=str(exc),
+        stage_errors=stage_errors,
+        updated_at=timezone.now(),
+        **extra,
+    )
+    if encounter.attempt_count >= MAX_ATTEMPTS:  # no retry follows
+        record_encounter_event(encounter, Encounter.Status.FAILED, stage)
+
+
+def redaction_input(encounter: Encounter) -> list[str]:
+    """Utterance texts to redact, in order (raw_text's lines for pre-utterance transcripts)."""
+    texts = list(
+        Utterance.objects.filter(transcript__encounter=encounter)
+        .order_by("index")
+        .values_list("raw_text", flat=True)
+    )
+    if texts:
+        return texts
+    # One turn per line, so redact_utterances keeps them apart instead of flattening the transcript
+    raw_text = Transcript.objects.values_list("raw_text", flat=True).get(encounter=encounter)
+    return raw_text.splitlines() or [raw_text]
+
+
+def soap_input(encounter: Encounter) -> str:
+    return Transcript.objects.values_list("redacted_text", flat=True).get(encounter=encounter)
+
+
+# ── Tasks ─────────────────────────────────────────────────────────────────────
+
+
+@shared_task(bind=True, max_retries=MAX_ATTEMPTS - 1, default_retry_delay=60)
 def process_encounter(self, encounter_id: str):
     """
     Main Celery task — runs the full transcription → redaction → SOAP pipeline.
-    Called immediately after an Encounter is created by the upload API view.
+    Called immediately after an Encounter is created by the upload API view,
+    and again by retries / admin reprocessing, which resume from the checkpoint.
     """
     try:
         encounter = Encounter.objects.get(id=encounter_id)
@@ -33,74 +257,79 @@ def process_encounter(self, encounter_id: str):
         logger.error(f"[{encounter_id}] Encounter not found — task aborted.")
         return
 
-    # Accumulate quality metrics across steps
-    _metrics: dict = {}
+    if not encounter.needs_stage(Stage.SOAP):
+        logger.info(f"[{encounter_id}] Already completed — nothing to do.")
+        return
+
+    _metrics = begin_attempt(encounter)
 
+    stage = None
     try:
+        if clone_from_duplicate(encounter, _metrics):
+            return
+
         # ── Step 1: Transcription ─────────────────────────────────────────────
-        if encounter.status == Encounter.Status.PENDING:
+        if encounter.needs_stage(Stage.TRANSCRIPTION):
+            stage = Stage.TRANSCRIPTION
             logger.info(f"[{encounter_id}] Starting transcription…")
-            result = transcribe_audio(encounter)
-            _metrics["transcript_confidence"] = result["confidence"]
-            _metrics["transcript_word_count"] = result["word_count"]
-            Transcript.objects.get_or_create(
-                encounter=encounter,
-                defaults={"raw_text": result["text"]},
-            )
-            encounter.status = Encounter.Status.TRANSCRIBED
-            encounter.save(update_fields=["status", "updated_at"])
-            logger.info(f"[{encounter_id}] Transcription complete. "
-                        f"Confidence: {result['confidence']}, Words: {result['word_count']}")
+            with measure_stage(_metrics, "transcription"):
+                result = transcribe_audio(encounter)
+            save_transcription(encounter, result, _metrics)
 
         # ── Step 2: PII Redaction ─────────────────────────────────────────────
-        if encounter.status == Encounter.Status.TRANSCRIBED:
+        if encounter.needs_stage(Stage.REDACTION):
+            stage = Stage.REDACTION
             logger.info(f"[{encounter_id}] Redacting PII…")
-            transcript = encounter.transcript
-            redacted_text = redact_pii(transcript.raw_text)
-            transcript.redacted_text = redacted_text
-            transcript.save(update_fields=["redacted_text"])
-            encounter.status = Encounter.Status.REDACTED
-            encounter.save(update_fields=["status", "updated_at"])
-            logger.info(f"[{encounter_id}] Redaction complete.")
+            texts = redaction_input(encounter)
+            with measure_stage(_metrics, "redaction"):
+                redacted_texts = redact_utterances(texts)
+            save_redaction(encounter, redacted_texts, _metrics)
 
         # ── Step 3: SOAP Generation ───────────────────────────────────────────
-        if encounter.status == Encounter.Status.REDACTED:
+        if encounter.needs_stage(Stage.SOAP):
+            stage = Stage.SOAP
             logger.info(f"[{encounter_id}] Generating SOAP note…")
-            result = generate_soap_note(encounter.transcript.redacted_text)
-            soap_data = result["soap"]
-            _metrics["groq_prompt_tokens"] = result["prompt_tokens"]
-            _metrics["groq_completion_tokens"] = result["completion_tokens"]
-            _metrics["groq_model"] = result["model"]
-
-            # Count how many sections have substantive content
-            _not_doc = "Not documented in this consultation."
-            _metrics["soap_sections_complete"] = sum(
-                1 for v in soap_data.values() if v.strip() != _not_doc
-            )
-
-            SOAPNote.objects.get_or_create(
-                encounter=encounter,
-                defaults=soap_data,
-            )
-            encounter.status = Encounter.Status.COMPLETED
-            encounter.save(update_fields=["status", "updated_at"])
-
-            # ── Save quality metrics (admin-only) ─────────────────────────────
-            QualityMetric.objects.update_or_create(
-                encounter=encounter,
-                defaults=_metrics,
-            )
-            logger.info(
-                f"[{encounter_id}] Processing complete ✓ | "
-                f"SOAP sections: {_metrics.get('soap_sections_complete')}/4 | "
-                f"Tokens: {result['prompt_tokens']}→{result['completion_tokens']}"
-            )
+            redacted_text = soap_input(encounter)
+            with measure_stage(_metrics, "soap"):
+                result = generate_soap_note(redacted_text)
+            save_soap(encounter, result, _metrics)
 
     except Exception as exc:
-        logger.error(f"[{encounter_id}] Pipeline failed: {exc}", exc_info=True)
-        # Persist error so the UI can display it
-        Encounter.objects.filter(id=encounter_id).update(
-            status=Encounter.Status.FAILED,
-            error_message=str(exc),
-        )
+        record_failure(encounter, stage, exc)
         raise self.retry(exc=exc)
+
+
+@shared_task
+def rollup_quality_metrics(full: bool = False):
+    """Periodic (Celery beat) refresh of the daily QualityRollup table."""
+    return _rollup_quality_metrics(full=full)
+
+
+@shared_task
+def apply_audio_retention(dry_run: bool = False):
+    """Periodic (Celery beat) archive / deletion of audio past its retention period."""
+    return _apply_audio_retention(dry_run=dry_run)
+
+
+@shared_task
+def maintain_encounter_partitions():
+    """Periodic (Celery beat) creation of upcoming partitions and detach of expired ones."""
+    return maintain_partitions()
+
+
+@shared_task
+def admit_deferred_uploads():
+    """Periodic (Celery beat) queueing of uploads deferred by admission control."""
+    return admit_deferred()
+
+
+@shared_task
+def deliver_webhooks(endpoint_id: str):
+    """Send one endpoint's due webhook events in batches (routed to the "webhooks" queue)."""
+    return deliver_endpoint(endpoint_id)
+
+
+@shared_task
+def dispatch_webhooks():
+    """Periodic (Celery beat) sweep for webhook events whose delivery task was lost or is due again."""
+    return dispatch_due()
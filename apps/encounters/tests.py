@@ -0,0 +1,158 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Encounter, QualityMetric, QualityRollup, Transcript
+from .serializers import BulkUploadSerializer
+from .services.rollup import rollup_quality_metrics
+from .services.redaction import redact_utterances
+from .tasks import MAX_ATTEMPTS, begin_attempt, clone_from_duplicate, redaction_input, save_redaction
+
+
+class QualityRollupTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(email="clinician@example.com")
+
+    def _encounter(self, created_days_ago: int = 0) -> tuple[Encounter, QualityMetric]:
+        encounter = Encounter.objects.create(user=self.user)
+        # Created at the first attempt, before SOAP has filled in the model
+        metric = QualityMetric.objects.create(encounter=encounter, queue_wait_ms=100.0)
+        if created_days_ago:
+            QualityMetric.objects.filter(id=metric.id).update(
+                created_at=timezone.now() - timedelta(days=created_days_ago),
+            )
+        return encounter, metric
+
+    def _finish(self, encounter: Encounter, metric: QualityMetric, model: str = "llama"):
+        QualityMetric.objects.filter(id=metric.id).update(groq_model=model, groq_prompt_tokens=10)
+        Encounter.objects.filter(id=encounter.id).update(status=Encounter.Status.COMPLETED)
+
+    def test_metric_rolled_up_mid_pipeline_is_counted_once(self):
+        encounter, metric = self._encounter()
+        rollup_quality_metrics()  # runs while the encounter is still in the pipeline
+        self.assertFalse(QualityRollup.objects.exists())
+
+        self._finish(encounter, metric)
+        rollup_quality_metrics()
+
+        rollup = QualityRollup.objects.get()
+        self.assertEqual((rollup.groq_model, rollup.encounter_count), ("llama", 1))
+
+    def test_metric_finishing_after_a_later_day_was_rolled_up(self):
+        late, late_metric = self._encounter(created_days_ago=2)
+        today, today_metric = self._encounter()
+        self._finish(today, today_metric)
+        rollup_quality_metrics()  # the latest rolled-up day is now today
+
+        self._finish(late, late_metric)
+        rollup_quality_metrics()
+
+        counts = QualityRollup.objects.order_by("day").values_list("groq_model", "encounter_count")
+        self.assertEqual(list(counts), [("llama", 1), ("llama", 1)])
+
+    def test_groups_without_finished_metrics_are_removed(self):
+        encounter, metric = self._encounter()
+        QualityRollup.objects.create(day=timezone.now().date(), groq_model="", encounter_count=1)
+        self._finish(encounter, metric)
+        rollup_quality_metrics()
+
+        self.assertEqual(list(QualityRollup.objects.values_list("groq_model", "encounter_count")), [("llama", 1)])
+
+
+class ReprocessTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create(email="clinician@example.com")
+        self.encounter = Encounter.objects.create(
+            user=user, status=Encounter.Status.FAILED, attempt_count=MAX_ATTEMPTS,
+            last_completed_stage=Encounter.Stage.SOAP, stage_errors={"transcription": "timeout"},
+        )
+        QualityMetric.objects.create(encounter=self.encounter, queue_wait_ms=100.0)
+        Transcript.objects.create(encounter=self.encounter, raw_text="Hello.")
+
+    def test_rewind_resets_the_attempt_budget(self):
+        self.encounter.rewind_to(Encounter.Stage.TRANSCRIPTION)
+
+        self.assertEqual((self.encounter.attempt_count, self.encounter.stage_errors), (0, {}))
+
+    def test_reprocess_keeps_queue_wait_and_skips_dedup(self):
+        self.encounter.rewind_to(Encounter.Stage.TRANSCRIPTION)
+        self.encounter.save()
+
+        begin_attempt(self.encounter)
+
+        self.assertEqual(self.encounter.attempt_count, 1)
+        self.assertEqual(QualityMetric.objects.get(encounter=self.encounter).queue_wait_ms, 100.0)
+        self.assertFalse(clone_from_duplicate(self.encounter, {}))
+
+
+@mock.patch("apps.encounters.serializers.object_metadata", return_value=(1000, "audio/mpeg"))
+class BulkManifestKeyTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(email="clinician@example.com")
+        self.key = f"audio/{self.user.id}/visit.mp3"
+
+    def _errors(self, manifest: list) -> dict:
+        serializer = BulkUploadSerializer(data={"manifest": manifest}, context={"user": self.user})
+        self.assertFalse(serializer.is_valid())
+        return serializer.errors["manifest"]
+
+    def test_rejects_a_key_repeated_in_the_manifest(self, _):
+        errors = self._errors([{"key": self.key}, {"key": self.key}])
+        self.assertEqual(list(errors), [1])
+
+    def test_rejects_a_key_already_used_by_an_encounter(self, _):
+        Encounter.objects.create(user=self.user, audio_file=self.key)
+        errors = self._errors([{"key": self.key}])
+        self.assertEqual(list(errors), [0])
+
+
+@override_settings(ADMISSION_MAX_IN_FLIGHT_PER_USER=1)
+@mock.patch("apps.encounters.serializers.object_metadata", return_value=(1000, "audio/mpeg"))
+class BulkUploadAdmissionTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create(email="clinician@example.com")
+        Encounter.objects.create(user=user)  # already at the in-flight limit
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.manifest = [{"key": f"audio/{user.id}/a.mp3"}, {"key": f"audio/{user.id}/b.mp3"}]
+
+    def _post(self):
+        return self.client.post(reverse("api-batch-create"), {"manifest": self.manifest}, format="json")
+
+    @override_settings(ADMISSION_OVERFLOW="reject")
+    def test_batch_over_the_limit_is_rejected(self, _):
+        response = self._post()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(Encounter.objects.count(), 1)
+
+    @override_settings(ADMISSION_OVERFLOW="defer")
+    @mock.patch("apps.encounters.views.enqueue_batch")
+    def test_batch_over_the_limit_is_stored_deferred(self, enqueue_batch, _):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._post()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Encounter.objects.filter(deferred_at__isnull=False).count(), 2)
+        enqueue_batch.assert_not_called()
+
+
+@mock.patch("apps.encounters.services.redaction.redact_pii", side_effect=lambda text: text.replace("Ann", "[PERSON]"))
+class LegacyRedactionTests(TestCase):
+    def test_pre_utterance_transcript_keeps_its_turns(self, _):
+        user = get_user_model().objects.create(email="clinician@example.com")
+        encounter = Encounter.objects.create(user=user)
+        Transcript.objects.create(encounter=encounter, raw_text="A: Hi Ann.\nB: Hello.\nA: Any pain?")
+
+        save_redaction(encounter, redact_utterances(redaction_input(encounter)), {})
+
+        self.assertEqual(
+            Transcript.objects.get(encounter=encounter).redacted_text,
+            "A: Hi [PERSON].\nB: Hello.\nA: Any pain?",
+        )
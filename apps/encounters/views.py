@@ -1,59 +1,115 @@
+import math
+import uuid
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
+from django.utils import timezone
+from django.utils.text import get_valid_filename
 from django.views import View
-from drf_spectacular.utils import OpenApiResponse, extend_schema
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from rest_framework import status
-from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import PermissionDenied, Throttled
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Encounter
-from .serializers import EncounterCreateSerializer, EncounterSerializer
+from apps.monitoring.profiling import section
+from config.db_router import ReplicaReadsAPIMixin, ReplicaReadsMixin, read_database
+
+from .admission import admit_upload, check_upload, defer, estimated_wait
+from .models import Encounter, EncounterBatch, Transcript, Utterance, WebhookEndpoint
+from .scheduling import LOWEST_PRIORITY, batch_priorities, enqueue_batch, enqueue_encounter
+from .serializers import (
+    BulkUploadSerializer,
+    EncounterBatchSerializer,
+    EncounterCreateSerializer,
+    EncounterSearchResultSerializer,
+    EncounterSerializer,
+    ExportQuerySerializer,
+    SearchQuerySerializer,
+    UploadURLRequestSerializer,
+    UtteranceQuerySerializer,
+    UtteranceSerializer,
+    WebhookEndpointCreatedSerializer,
+    WebhookEndpointSerializer,
+    WordTimingsQuerySerializer,
+    user_upload_prefix,
+)
+from .services.dedup import find_in_progress_duplicate, merge_patient_details, upload_sha256
+from .services.export import CONTENT_TYPES, export_queryset, high_water_mark, stream_export
+from .services.partitions import month_start
+from .services.payload_cache import cached_payload
 from .services.pdf import get_pdf_response
-from .tasks import process_encounter
+from .services.search import ranked_encounters
+from .services.storage import presigned_upload_url
 
 
 # ── Template Views (session-auth, rendered HTML) ──────────────────────────────
 
 
-class DashboardView(LoginRequiredMixin, View):
-    """User's encounter history with pagination."""
+class DashboardView(LoginRequiredMixin, ReplicaReadsMixin, View):
+    """User's encounter history with pagination, or ranked search results with ?q=."""
 
     def get(self, request):
-        qs = Encounter.objects.filter(user=request.user).select_related(
-            "transcript", "soap_note"
-        )
+        query = request.GET.get("q", "").strip()[:200]
+        if query:
+            with section("search"):
+                qs = ranked_encounters(request.user, query, limit=settings.SEARCH_DASHBOARD_LIMIT)
+        else:
+            qs = Encounter.objects.filter(user=request.user).select_related(
+                "transcript", "soap_note"
+            ).defer("transcript__word_timings")
+            if settings.DASHBOARD_HISTORY_MONTHS:
+                # A bound on the partition key: older monthly partitions are never scanned
+                qs = qs.filter(created_at__gte=month_start(months=1 - settings.DASHBOARD_HISTORY_MONTHS))
         paginator = Paginator(qs, 10)
         page_obj = paginator.get_page(request.GET.get("page", 1))
-        return render(request, "encounters/dashboard.html", {"page_obj": page_obj})
+        with section("render"):
+            return render(request, "encounters/dashboard.html", {
+                "page_obj": page_obj,
+                "query": query,
+                "history_months": settings.DASHBOARD_HISTORY_MONTHS,
+            })
 
 
 class UploadView(LoginRequiredMixin, View):
-    """Upload form page."""
+    """Upload form page, with the current wait before a new upload is processed."""
 
     def get(self, request):
-        return render(request, "encounters/upload.html")
+        admission = check_upload(request.user, Encounter.Source.UPLOAD)
+        wait = admission.retry_after if admission.outcome != "admitted" else estimated_wait(request.user)
+        return render(request, "encounters/upload.html", {
+            "admission": admission,
+            "estimated_wait_minutes": math.ceil(wait / 60),
+        })
 
 
 class EncounterDetailView(LoginRequiredMixin, View):
     """Result / polling page for a single encounter."""
 
     def get(self, request, pk):
-        encounter = get_object_or_404(
-            Encounter.objects.select_related("transcript", "soap_note"),
-            pk=pk,
-            user=request.user,
-        )
-        serializer = EncounterSerializer(encounter)
-        return render(
-            request,
-            "encounters/result.html",
-            # Pass the dict directly so {{ encounter_json|json_script }} encodes it exactly once.
-            # (Pre-encoding to a string then using json_script would double-encode it.)
-            {"encounter": encounter, "encounter_json": serializer.data},
-        )
+        # No join here: for finished encounters the payload usually comes from the cache
+        encounter = get_object_or_404(Encounter, pk=pk, user=request.user)
+        with section("serialize"):
+            # The page only shows status and the SOAP note
+            encounter_json = cached_payload(
+                encounter, "summary",
+                lambda: EncounterSerializer(encounter, context={"include_transcript": False}).data,
+            )
+        with section("render"):
+            return render(
+                request,
+                "encounters/result.html",
+                # Pass the dict directly so {{ encounter_json|json_script }} encodes it exactly once.
+                # (Pre-encoding to a string then using json_script would double-encode it.)
+                {"encounter": encounter, "encounter_json": encounter_json},
+            )
 
 
 # ── API Views (DRF, session + JWT auth) ──────────────────────────────────────
@@ -64,10 +120,19 @@ class EncounterCreateAPIView(APIView):
 
     parser_classes = [MultiPartParser, FormParser]
     permission_classes = [IsAuthenticated]
+    source = Encounter.Source.UPLOAD  # scheduling lane, set by the endpoint
 
     @extend_schema(
         request=EncounterCreateSerializer,
-        responses={201: OpenApiResponse(description="Encounter created, processing queued.")},
+        responses={
+            201: OpenApiResponse(description="Encounter created, processing queued."),
+            200: OpenApiResponse(description=(
+                "Identical audio is already being processed; its id is returned. Patient details it lacks "
+                "are filled in from this request, conflicting ones are listed in `ignored_fields`."
+            )),
+            202: OpenApiResponse(description="Over the admission limits: stored, processing deferred."),
+            429: OpenApiResponse(description="Over the admission limits; retry after Retry-After seconds."),
+        },
         summary="Upload audio and start AI processing pipeline",
     )
     def post(self, request):
@@ -76,33 +141,242 @@ class EncounterCreateAPIView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         audio_file = serializer.validated_data["audio_file"]
+        audio_sha256 = upload_sha256(audio_file)
+        in_progress = find_in_progress_duplicate(request.user, audio_sha256)
+        if in_progress is not None:
+            # Double submit or impatient re-upload: follow the existing encounter
+            ignored = merge_patient_details(
+                in_progress,
+                serializer.validated_data.get("patient_name", ""),
+                serializer.validated_data.get("patient_age"),
+            )
+            data = {"id": str(in_progress.id), "duplicate": True}
+            if ignored:
+                data["ignored_fields"] = ignored
+            return Response(data, status=status.HTTP_200_OK)
+
+        admission = admit_upload(request.user, self.source)
+        if admission.outcome == "rejected":
+            raise Throttled(wait=admission.retry_after, detail=admission.detail)
+
         encounter = Encounter.objects.create(
             user=request.user,
             audio_file=audio_file,
+            audio_sha256=audio_sha256,
             original_filename=audio_file.name,
             patient_name=serializer.validated_data.get("patient_name", ""),
             patient_age=serializer.validated_data.get("patient_age"),
+            source=self.source,
         )
-        process_encounter.delay(str(encounter.id))
+        if admission.outcome == "deferred":
+            defer(encounter)
+            return Response(
+                {"id": str(encounter.id), "deferred": True, "estimated_wait_seconds": admission.retry_after},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        enqueue_encounter(encounter)
         return Response({"id": str(encounter.id)}, status=status.HTTP_201_CREATED)
 
 
-class EncounterStatusAPIView(APIView):
+class LiveEncounterCreateAPIView(EncounterCreateAPIView):
+    """
+    POST /api/encounters/live/ — a recording just made in the browser. Same
+    as an upload, but scheduled in the live lane ahead of the backlog, so it
+    only takes the web app's session (with CSRF), not API tokens.
+    """
+
+    authentication_classes = [SessionAuthentication]
+    source = Encounter.Source.LIVE
+
+
+class EncounterStatusAPIView(ReplicaReadsAPIMixin, APIView):
     """GET /api/encounters/<id>/ — poll status and retrieve results."""
 
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
+        parameters=[OpenApiParameter(
+            "transcript", bool, default=True,
+            description="Include the full transcript text. Pollers should pass false.",
+        )],
         responses={200: EncounterSerializer},
         summary="Poll encounter status and retrieve SOAP note when complete",
     )
     def get(self, request, pk):
-        encounter = get_object_or_404(
-            Encounter.objects.select_related("transcript", "soap_note"),
-            pk=pk,
-            user=request.user,
+        include_transcript = request.query_params.get("transcript", "true").lower() not in ("0", "false")
+        head = get_object_or_404(
+            Encounter.objects.only("id", "status", "updated_at"), pk=pk, user=request.user,
+        )
+
+        def build():
+            qs = Encounter.objects.select_related("soap_note")
+            if include_transcript:
+                qs = qs.select_related("transcript").defer("transcript__word_timings")
+            encounter = qs.get(pk=head.pk)
+            return EncounterSerializer(encounter, context={"include_transcript": include_transcript}).data
+
+        with section("serialize"):
+            data = cached_payload(head, "full" if include_transcript else "summary", build)
+        return Response(data)
+
+
+class EncounterUtterancesAPIView(ReplicaReadsAPIMixin, APIView):
+    """GET /api/encounters/<id>/utterances/ — transcript speaker turns, a page at a time."""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[UtteranceQuerySerializer],
+        responses={200: UtteranceSerializer(many=True)},
+        summary="Page through transcript utterances (keyset on index, optional time window)",
+    )
+    def get(self, request, pk):
+        params = UtteranceQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        after, limit = params.validated_data["after"], params.validated_data["limit"]
+
+        encounter = get_object_or_404(Encounter.objects.only("id"), pk=pk, user=request.user)
+        qs = Utterance.objects.filter(transcript__encounter=encounter, index__gt=after).order_by("index")
+        # Utterances overlapping [from_ms, to_ms]
+        if "from_ms" in params.validated_data:
+            qs = qs.filter(end_ms__gte=params.validated_data["from_ms"])
+        if "to_ms" in params.validated_data:
+            qs = qs.filter(start_ms__lte=params.validated_data["to_ms"])
+
+        rows = list(qs[: limit + 1])
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            query = request.query_params.copy()
+            query["after"] = rows[-1].index
+            next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+        with section("serialize"):
+            data = UtteranceSerializer(rows, many=True).data
+        return Response({"results": data, "next": next_url})
+
+
+class EncounterSearchAPIView(ReplicaReadsAPIMixin, APIView):
+    """GET /api/encounters/search/?q=… — ranked full-text search over the user's notes."""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[SearchQuerySerializer],
+        responses={200: EncounterSearchResultSerializer(many=True)},
+        summary="Search SOAP notes and redacted transcripts, best match first",
+    )
+    def get(self, request):
+        params = SearchQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        query, limit, offset = (params.validated_data[k] for k in ("q", "limit", "offset"))
+
+        with section("search"):
+            results = ranked_encounters(request.user, query, limit + 1, offset)
+        next_url = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_params = request.query_params.copy()
+            next_params["offset"] = offset + limit
+            next_url = request.build_absolute_uri(f"{request.path}?{next_params.urlencode()}")
+        with section("serialize"):
+            data = EncounterSearchResultSerializer(results, many=True).data
+        return Response({"results": data, "next": next_url})
+
+
+class EncounterExportAPIView(ReplicaReadsAPIMixin, APIView):
+    """
+    GET /api/encounters/export/ — stream the user's completed encounters with
+    their SOAP notes as NDJSON or CSV, for incremental EHR syncs.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[ExportQuerySerializer],
+        responses={200: OpenApiResponse(
+            description="NDJSON lines or CSV rows, oldest update first. Store the "
+                        "X-Export-High-Water-Mark header and pass it as updated_after next time.",
+        )},
+        summary="Stream completed encounters updated since the last export",
+    )
+    def get(self, request):
+        params = ExportQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        fmt, metrics = params.validated_data["export_format"], params.validated_data["metrics"]
+        if metrics and not request.user.is_staff:
+            raise PermissionDenied("Pipeline metrics are only exported for staff.")
+
+        # Streamed after the view returns, so bind the database now
+        database = read_database()
+        until = high_water_mark(database)
+        qs = export_queryset(until, params.validated_data.get("updated_after"), request.user, metrics)
+        qs = qs.using(database)
+        response = StreamingHttpResponse(stream_export(qs, fmt, metrics), content_type=CONTENT_TYPES[fmt])
+        response["Content-Disposition"] = f'attachment; filename="encounters-{until:%Y%m%dT%H%M%S}.{fmt}"'
+        response["X-Export-High-Water-Mark"] = until.isoformat()
+        return response
+
+
+class EncounterWordsAPIView(APIView):
+    """GET /api/encounters/<id>/words/ — low-confidence spans and time → word lookup."""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[WordTimingsQuerySerializer],
+        responses={200: OpenApiResponse(description=(
+            "Low-confidence word spans (and the word at at_ms, if given). With packed=true, "
+            "the raw packed blob (application/octet-stream) for client-side typed arrays."
+        ))},
+        summary="Query per-word timings and confidence",
+    )
+    def get(self, request, pk):
+        from .services.word_timings import WordTimings  # lazy import — numpy is only needed here
+
+        params = WordTimingsQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        encounter = get_object_or_404(Encounter.objects.only("id"), pk=pk, user=request.user)
+        blob = (
+            Transcript.objects.filter(encounter=encounter)
+            .values_list("word_timings", flat=True)
+            .first()
+        )
+        if blob is None:
+            return Response(
+                {"error": "No word timings for this encounter."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if params.validated_data["packed"]:
+            return HttpResponse(bytes(blob), content_type="application/octet-stream")
+
+        words = WordTimings.unpack(blob)
+        spans = words.low_confidence_spans(
+            params.validated_data["threshold"], params.validated_data["min_words"],
         )
-        return Response(EncounterSerializer(encounter).data)
+        first, end = spans[:, 0], spans[:, 1]
+        data = {
+            "word_count": len(words),
+            "low_confidence_spans": [
+                {"first_word": f, "end_word": e, "utterance": u, "start_ms": s, "end_ms": t}
+                for f, e, u, s, t in zip(
+                    first.tolist(), end.tolist(), words.utterance[first].tolist(),
+                    words.start_ms[first].tolist(), words.end_ms[end - 1].tolist(),
+                )
+            ],
+        }
+        if "at_ms" in params.validated_data:
+            index = words.word_at(params.validated_data["at_ms"])
+            data["word_at"] = None if index is None else {
+                "word": index,
+                "utterance": int(words.utterance[index]),
+                "start_ms": int(words.start_ms[index]),
+                "end_ms": int(words.end_ms[index]),
+            }
+        return Response(data)
 
 
 class EncounterPDFAPIView(APIView):
@@ -116,7 +390,7 @@ class EncounterPDFAPIView(APIView):
     )
     def get(self, request, pk):
         encounter = get_object_or_404(
-            Encounter.objects.select_related("transcript", "soap_note"),
+            Encounter.objects.select_related("transcript", "soap_note").defer("transcript__word_timings"),
             pk=pk,
             user=request.user,
         )
@@ -126,3 +400,187 @@ class EncounterPDFAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         return get_pdf_response(encounter)
+
+
+# ── Bulk upload API ───────────────────────────────────────────────────────────
+
+
+class BulkUploadAPIView(APIView):
+    """POST /api/encounters/batches/ — import many recordings in one request."""
+
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=BulkUploadSerializer,
+        responses={
+            201: OpenApiResponse(description="Batch created, processing queued."),
+            202: OpenApiResponse(description="Over the admission limits: batch stored, processing deferred."),
+            429: OpenApiResponse(description="Over the admission limits; retry after Retry-After seconds."),
+        },
+        summary="Bulk-import recordings from a manifest",
+    )
+    def post(self, request):
+        serializer = BulkUploadSerializer(data=request.data, context={"user": request.user})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # One decision for the whole batch, taken before anything is stored
+        admission = admit_upload(request.user, Encounter.Source.BULK)
+        if admission.outcome == "rejected":
+            raise Throttled(wait=admission.retry_after, detail=admission.detail)
+        deferred = admission.outcome == "deferred"
+
+        manifest = serializer.validated_data["manifest"]
+        files = serializer.validated_data["files"]
+        if deferred:
+            priorities = [LOWEST_PRIORITY] * len(manifest)
+        else:
+            priorities = batch_priorities(request.user, len(manifest))
+
+        with transaction.atomic():
+            batch = EncounterBatch.objects.create(
+                user=request.user,
+                label=serializer.validated_data["label"],
+                total=len(manifest),
+            )
+            encounters = []
+            for item, priority in zip(manifest, priorities):
+                if "file" in item:
+                    audio, default_name = files[item["file"]], item["file"]
+                    audio_sha256 = upload_sha256(audio)
+                else:
+                    # Hashed by the pipeline on its first attempt
+                    audio, default_name = item["key"], item["key"].rsplit("/", 1)[-1]
+                    audio_sha256 = ""
+                encounters.append(Encounter(
+                    user=request.user,
+                    batch=batch,
+                    source=Encounter.Source.BULK,
+                    queue_priority=priority,
+                    audio_file=audio,
+                    audio_sha256=audio_sha256,
+                    original_filename=item.get("original_filename") or default_name,
+                    patient_name=item["patient_name"],
+                    patient_age=item["patient_age"],
+                    # Held back like defer() does; admit_deferred() queues them as room frees up
+                    deferred_at=timezone.now() if deferred else None,
+                ))
+            # FileField.pre_save runs per row, so multipart parts are stored here
+            Encounter.objects.bulk_create(encounters)
+            if not deferred:
+                transaction.on_commit(lambda: enqueue_batch(encounters))
+
+        data = {"batch_id": str(batch.id), "encounter_ids": [str(e.id) for e in encounters]}
+        if deferred:
+            data.update(deferred=True, estimated_wait_seconds=admission.retry_after)
+            return Response(data, status=status.HTTP_202_ACCEPTED)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class UploadURLAPIView(APIView):
+    """POST /api/encounters/batches/upload-urls/ — pre-signed PUT URLs for direct R2 uploads."""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=UploadURLRequestSerializer,
+        responses={200: OpenApiResponse(description="List of {filename, key, url}.")},
+        summary="Get pre-signed upload URLs for a bulk import",
+    )
+    def post(self, request):
+        if not settings.USE_R2:
+            return Response(
+                {"error": "Direct uploads need R2 storage; send the files as multipart instead."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = UploadURLRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type = serializer.validated_data["content_type"]
+        uploads = []
+        for filename in serializer.validated_data["filenames"]:
+            # Same layout as audio_upload_path, so stored keys look alike
+            key = f"{user_upload_prefix(request.user)}{uuid.uuid4()}/{get_valid_filename(filename)}"
+            uploads.append({
+                "filename": filename,
+                "key": key,
+                "url": presigned_upload_url(key, content_type),
+            })
+        return Response({"uploads": uploads})
+
+
+class EncounterBatchAPIView(ReplicaReadsAPIMixin, APIView):
+    """GET /api/encounters/batches/<id>/ — aggregate progress of a bulk import."""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        responses={200: EncounterBatchSerializer},
+        summary="Poll bulk import progress",
+    )
+    def get(self, request, pk):
+        batch = get_object_or_404(EncounterBatch, pk=pk, user=request.user)
+        return Response(EncounterBatchSerializer(batch).data)
+
+
+# ── Webhook endpoints ─────────────────────────────────────────────────────────
+
+
+class WebhookEndpointListAPIView(APIView):
+    """GET / POST /api/webhooks/ — the user's completion webhook endpoints."""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        responses={200: WebhookEndpointSerializer(many=True)},
+        summary="List webhook endpoints",
+        tags=["webhooks"],
+    )
+    def get(self, request):
+        endpoints = WebhookEndpoint.objects.filter(user=request.user)
+        return Response(WebhookEndpointSerializer(endpoints, many=True).data)
+
+    @extend_schema(
+        request=WebhookEndpointSerializer,
+        responses={201: WebhookEndpointCreatedSerializer},
+        summary="Register a URL notified when encounters complete or fail (secret shown once)",
+        tags=["webhooks"],
+    )
+    def post(self, request):
+        serializer = WebhookEndpointSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        endpoint = serializer.save(user=request.user)
+        return Response(WebhookEndpointCreatedSerializer(endpoint).data, status=status.HTTP_201_CREATED)
+
+
+class WebhookEndpointDetailAPIView(APIView):
+    """GET / PATCH / DELETE /api/webhooks/<id>/"""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(responses={200: WebhookEndpointSerializer}, summary="Get a webhook endpoint", tags=["webhooks"])
+    def get(self, request, pk):
+        endpoint = get_object_or_404(WebhookEndpoint, pk=pk, user=request.user)
+        return Response(WebhookEndpointSerializer(endpoint).data)
+
+    @extend_schema(
+        request=WebhookEndpointSerializer,
+        responses={200: WebhookEndpointSerializer},
+        summary="Update a webhook endpoint (e.g. is_active=false to pause it)",
+        tags=["webhooks"],
+    )
+    def patch(self, request, pk):
+        endpoint = get_object_or_404(WebhookEndpoint, pk=pk, user=request.user)
+        serializer = WebhookEndpointSerializer(endpoint, data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        return Response(serializer.data)
+
+    @extend_schema(responses={204: None}, summary="Delete a webhook endpoint", tags=["webhooks"])
+    def delete(self, request, pk):
+        get_object_or_404(WebhookEndpoint, pk=pk, user=request.user).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,164 @@
+"""
+Prometheus metrics for the web tier and the processing pipeline.
+
+Counters and histograms are module-level and updated in-process. When the
+PROMETHEUS_MULTIPROC_DIR environment variable is set (gunicorn workers and
+Celery prefork children share one directory), prometheus_client writes each
+process's samples to mmap files there and render_metrics() aggregates them.
+The directory must be emptied on deploy/boot (docker/entrypoint.sh and the
+Procfile's web process do this) and dead processes are marked via the
+gunicorn / Celery shutdown hooks. Procfile workers run apart from the web
+process, so their stage samples are not scraped there.
+
+Gauges that describe shared state — Celery queue depth and in-flight
+encounters — are not stored per process; PipelineCollector computes them at
+scrape time instead, so they are never double-counted.
+"""
+
+import logging
+import os
+
+from django.db.models import Count
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from .queues import monitored_queue_depths
+
+logger = logging.getLogger(__name__)
+
+# ── Web tier ──────────────────────────────────────────────────────────────────
+
+REQUEST_LATENCY = Histogram(
+    "vitalnote_http_request_duration_seconds",
+    "HTTP request latency by resolved view.",
+    ["view", "method", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+# ── Pipeline ──────────────────────────────────────────────────────────────────
+
+STAGE_LATENCY = Histogram(
+    "vitalnote_pipeline_stage_duration_seconds",
+    "Wall time of each pipeline stage.",
+    ["stage"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600),
+)
+
+QUEUE_WAIT = Histogram(
+    "vitalnote_pipeline_queue_wait_seconds",
+    "Time from upload until a worker picked the encounter up, by scheduling lane.",
+    ["lane"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200),
+)
+
+UPLOAD_ADMISSION = Counter(
+    "vitalnote_upload_admission_total",
+    "Upload admission decisions (see apps.encounters.admission).",
+    ["outcome", "reason"],  # admitted / deferred / rejected; queue / user / ""
+)
+
+DEDUP_HITS = Counter(
+    "vitalnote_pipeline_dedup_hits_total",
+    "Encounters completed by cloning an identical, already processed upload.",
+)
+
+ENCOUNTER_CACHE = Counter(
+    "vitalnote_encounter_payload_cache_total",
+    "Serialized encounter payload cache lookups (terminal-state encounters only).",
+    ["outcome"],  # hit / miss / error
+)
+
+AUDIO_RETENTION = Counter(
+    "vitalnote_audio_retention_total",
+    "Encounters processed by the audio retention policy.",
+    ["status", "outcome"],  # encounter status; archived / deleted / error
+)
+
+WEBHOOK_DELIVERIES = Counter(
+    "vitalnote_webhook_deliveries_total",
+    "Batched webhook requests by outcome.",
+    ["outcome"],  # delivered / retry / failed
+)
+
+WEBHOOK_EVENTS = Counter(
+    "vitalnote_webhook_events_total",
+    "Webhook events by outcome (sum over deliveries of their batch sizes).",
+    ["outcome"],  # delivered / retry / failed
+)
+
+DB_READ_ROUTING = Counter(
+    "vitalnote_db_read_routing_total",
+    "Replica-eligible requests by the database their reads went to (see config.db_router).",
+    ["target"],  # replica / primary_pinned
+)
+
+GROQ_TOKENS = Counter(
+    "vitalnote_groq_tokens_total",
+    "Tokens exchanged with the SOAP generation model (rate() for throughput).",
+    ["model", "kind"],
+)
+
+REDACTION_ENGINE_LOAD = Histogram(
+    "vitalnote_redaction_engine_load_seconds",
+    "Time to initialise Presidio + spaCy in a process (once per process).",
+    buckets=(0.5, 1, 2, 5, 10, 20, 40, 80),
+)
+
+
+# ── Scrape-time collectors ────────────────────────────────────────────────────
+
+
+class PipelineCollector:
+    """Live gauges read from the broker and the database on every scrape."""
+
+    def collect(self):
+        from apps.encounters.models import Encounter  # apps must be loaded first
+
+        depth = GaugeMetricFamily(
+            "vitalnote_celery_queue_depth",
+            "Messages waiting in each Celery queue.",
+            labels=["queue"],
+        )
+        for queue, size in monitored_queue_depths().items():
+            if size is not None:
+                depth.add_metric([queue], size)
+        yield depth
+
+        terminal = [Encounter.Status.COMPLETED, Encounter.Status.FAILED]
+        counts = dict(
+            Encounter.objects.exclude(status__in=terminal)
+            .order_by()
+            .values("status")
+            .annotate(n=Count("id"))
+            .values_list("status", "n")
+        )
+        in_flight = GaugeMetricFamily(
+            "vitalnote_encounters_in_flight",
+            "Encounters not yet COMPLETED or FAILED, by status.",
+            labels=["status"],
+        )
+        for status in Encounter.Status.values:
+            if status not in terminal:
+                in_flight.add_metric([status], counts.get(status, 0))
+        yield in_flight
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Return (exposition body, content type) for the /metrics endpoint."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    live = CollectorRegistry()
+    live.register(PipelineCollector())
+    return generate_latest(registry) + generate_latest(live), CONTENT_TYPE_LATEST
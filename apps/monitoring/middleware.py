@@ -0,0 +1,67 @@
+"""
+Operational middleware for the web tier.
+
+PrometheusMiddleware — observes request latency per resolved view name.
+
+QueryCountMiddleware — adds X-DB-Queries / X-DB-Time-Ms response headers so
+load tests can report database work per request without DEBUG query logging.
+Enabled with settings.QUERY_COUNT_HEADER (on in development only).
+"""
+
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import REQUEST_LATENCY
+
+
+class PrometheusMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        REQUEST_LATENCY.labels(
+            view=match.view_name if match else "<unresolved>",
+            method=request.method,
+            status=str(response.status_code),
+        ).observe(time.perf_counter() - start)
+        return response
+
+
+class _QueryCounter:
+    """connection.execute_wrapper hook that counts queries and their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class QueryCountMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERY_COUNT_HEADER:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = _QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        response["X-DB-Queries"] = str(counter.count)
+        response["X-DB-Time-Ms"] = f"{counter.seconds * 1000:.2f}"
+        return response
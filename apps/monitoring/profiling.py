@@ -0,0 +1,213 @@
+"""
+On-demand request profiling for staff users.
+
+A request is profiled when the logged-in user is staff and it carries either
+an `X-Profile: 1` header or a `_profile` query parameter. The middleware then
+captures:
+  • a cProfile profile of the whole view (top functions + a .prof download)
+  • every SQL query with its duration, flagging exact duplicates (same SQL and
+    params) and similar queries (same SQL, different params — usually N+1).
+    Parameter values can be patient data, so only a hash of them is kept,
+    keyed per request so it cannot be matched against guessed values
+  • named sections timed by the view itself, e.g. serialisation or template
+    rendering, via `with section("serialize"): …`
+
+Each profile is written to settings.PROFILING_DIR as <id>.json (+ <id>.prof).
+The store keeps the newest PROFILING_MAX_ENTRIES profiles and deletes older
+ones. Staff browse it at /admin/profiles/.
+"""
+
+import cProfile
+import hashlib
+import io
+import json
+import logging
+import pstats
+import secrets
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_active: ContextVar[dict | None] = ContextVar("vitalnote_profile", default=None)
+
+
+@contextmanager
+def section(name: str):
+    """Time a named block of the current request when it is being profiled."""
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        sections = profile["sections"]
+        sections[name] = sections.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+
+class ProfileStore:
+    """Bounded directory of profile summaries (.json) and raw stats (.prof)."""
+
+    def __init__(self, directory=None, max_entries=None):
+        self.directory = Path(directory or settings.PROFILING_DIR)
+        self.max_entries = max_entries or settings.PROFILING_MAX_ENTRIES
+
+    def save(self, summary: dict, profiler: cProfile.Profile | None):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if profiler is not None:
+            profiler.dump_stats(self.directory / f"{summary['id']}.prof")
+        (self.directory / f"{summary['id']}.json").write_text(json.dumps(summary))
+        self._prune()
+
+    def _prune(self):
+        entries = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for stale in entries[: max(len(entries) - self.max_entries, 0)]:
+            stale.unlink(missing_ok=True)
+            stale.with_suffix(".prof").unlink(missing_ok=True)
+
+    def list(self) -> list[dict]:
+        """Summaries newest first, without the heavy query / function lists."""
+        summaries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # pruned or half-written by a concurrent request
+            data.pop("queries", None)
+            data.pop("top_functions", None)
+            summaries.append(data)
+        return sorted(summaries, key=lambda s: s["started_at"], reverse=True)
+
+    def _path(self, profile_id: str, suffix: str) -> Path | None:
+        try:
+            profile_id = str(uuid.UUID(profile_id))  # never let ids escape the directory
+        except ValueError:
+            return None
+        path = self.directory / f"{profile_id}{suffix}"
+        return path if path.exists() else None
+
+    def get(self, profile_id: str) -> dict | None:
+        path = self._path(profile_id, ".json")
+        return json.loads(path.read_text()) if path else None
+
+    def prof_path(self, profile_id: str) -> Path | None:
+        return self._path(profile_id, ".prof")
+
+
+# ── Middleware ────────────────────────────────────────────────────────────────
+
+
+class _QueryRecorder:
+    """connection.execute_wrapper hook that keeps every query with its duration (never its params)."""
+
+    def __init__(self):
+        self.queries: list[dict] = []
+        self._key = secrets.token_bytes(16)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                "sql": sql,
+                "params_hash": hashlib.blake2b(repr(params).encode(), key=self._key, digest_size=8).hexdigest(),
+                "ms": (time.perf_counter() - start) * 1000,
+                "db": context["connection"].alias,
+            })
+
+
+def _summarize_queries(queries: list[dict]) -> dict:
+    exact = Counter((q["sql"], q["params_hash"]) for q in queries)
+    similar = Counter(q["sql"] for q in queries)
+    return {
+        "query_count": len(queries),
+        "query_ms": sum(q["ms"] for q in queries),
+        "duplicate_queries": sum(n - 1 for n in exact.values() if n > 1),
+        "similar_queries": [
+            {"sql": sql, "count": n} for sql, n in similar.most_common() if n > 1
+        ],
+    }
+
+
+def _top_functions(profiler: cProfile.Profile, limit: int = 40) -> str:
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """Must sit after AuthenticationMiddleware so request.user is available."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.store = ProfileStore()
+
+    @staticmethod
+    def _wants_profile(request) -> bool:
+        if request.headers.get("X-Profile") != "1" and "_profile" not in request.GET:
+            return False
+        user = getattr(request, "user", None)
+        return bool(user and user.is_authenticated and user.is_staff)
+
+    def __call__(self, request):
+        if not self._wants_profile(request):
+            return self.get_response(request)
+
+        profile = {"sections": {}}
+        token = _active.set(profile)
+        recorder = _QueryRecorder()
+        profiler = cProfile.Profile()
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler (e.g. a concurrent request) holds the hook
+            profiler = None
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            _active.reset(token)
+
+        summary = {
+            "id": str(uuid.uuid4()),
+            "started_at": started_at.isoformat(),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "view": request.resolver_match.view_name if request.resolver_match else "",
+            "status": response.status_code,
+            "user": str(request.user),
+            "total_ms": (time.perf_counter() - start) * 1000,
+            "sections_ms": profile["sections"],
+            **_summarize_queries(recorder.queries),
+            "queries": recorder.queries,
+            "top_functions": _top_functions(profiler) if profiler is not None else "",
+        }
+        try:
+            self.store.save(summary, profiler)
+        except OSError as exc:
+            logger.warning(f"Could not store request profile: {exc}")
+        else:
+            response["X-Profile-Id"] = summary["id"]
+        return response
@@ -0,0 +1,31 @@
+"""
+Celery broker introspection shared by metrics and admission control.
+"""
+
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def queue_depth(queue: str) -> int | None:
+    """
+    Number of messages waiting in a Celery queue, or None if the broker
+    cannot be reached. Uses a passive declare, which the Redis transport
+    answers with the summed length of all priority sub-queues.
+    """
+    from config.celery import app
+
+    try:
+        with app.connection_for_read() as conn:
+            conn.ensure_connection(max_retries=0)  # fail fast — callers are on the request path
+            return conn.default_channel.queue_declare(queue=queue, passive=True).message_count
+    except Exception as exc:  # broker down or queue never declared
+        logger.warning(f"Could not read depth of Celery queue '{queue}': {exc}")
+        return None
+
+
+def monitored_queue_depths() -> dict[str, int | None]:
+    """Depth of every queue listed in settings.CELERY_MONITORED_QUEUES."""
+    return {queue: queue_depth(queue) for queue in settings.CELERY_MONITORED_QUEUES}
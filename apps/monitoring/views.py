@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
+from django.views import View
+
+from .metrics import render_metrics
+from .profiling import ProfileStore
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint.
+    When settings.METRICS_TOKEN is set, scrapers must send it as a bearer token.
+    """
+
+    def get(self, request):
+        token = settings.METRICS_TOKEN
+        if token and not constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        ):
+            return HttpResponse(status=401)
+        body, content_type = render_metrics()
+        return HttpResponse(body, content_type=content_type)
+
+
+# ── Request profiles (staff-only, rendered inside the admin) ──────────────────
+
+
+@method_decorator(staff_member_required, name="dispatch")
+class ProfileListView(View):
+    """Newest request profiles captured by ProfilingMiddleware."""
+
+    def get(self, request):
+        return render(request, "admin/monitoring/profile_list.html", {
+            **admin.site.each_context(request),
+            "title": "Request profiles",
+            "profiles": ProfileStore().list(),
+        })
+
+
+@method_decorator(staff_member_required, name="dispatch")
+class ProfileDetailView(View):
+    """SQL, section timings and top functions for one profiled request."""
+
+    def get(self, request, profile_id):
+        store = ProfileStore()
+        profile = store.get(str(profile_id))
+        if profile is None:
+            raise Http404("Profile not found — it may have been pruned.")
+        return render(request, "admin/monitoring/profile_detail.html", {
+            **admin.site.each_context(request),
+            "title": f"{profile['method']} {profile['path']}",
+            "profile": profile,
+            "has_prof": store.prof_path(str(profile_id)) is not None,
+        })
+
+
+@method_decorator(staff_member_required, name="dispatch")
+class ProfileDownloadView(View):
+    """Raw cProfile stats for snakeviz / pstats."""
+
+    def get(self, request, profile_id):
+        path = ProfileStore().prof_path(str(profile_id))
+        if path is None:
+            raise Http404("Profile not found — it may have been pruned.")
+        return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:08
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def create_trigram_index(apps, schema_editor):
+    """pg_trgm GIN index for the admin's user__email icontains search. PostgreSQL only."""
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX users_email_trgm_idx ON users_user "
+            "USING gin ((UPPER(email::text)) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS users_email_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),  # no-op outside PostgreSQL
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -1,6 +1,8 @@
 import os
 
 from celery import Celery
+from celery.signals import task_postrun, task_prerun, worker_process_shutdown
+from django.db import close_old_connections
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
 
@@ -11,3 +13,25 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 # Auto-discover tasks in all installed apps
 app.autodiscover_tasks()
+
+
+@worker_process_shutdown.connect
+def _mark_prometheus_process_dead(pid=None, **kwargs):
+    """Let the multi-process collector drop live gauges of exited pool children."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+@task_prerun.connect
+@task_postrun.connect
+def _db_connection_hygiene(sender=None, **kwargs):
+    """
+    Per-task counterpart of Django's request_started / request_finished:
+    drop connections past DB_CONN_MAX_AGE or broken by the last task, and
+    return pooled ones to the pool. Connections inherited across the
+    prefork fork are discarded by Celery's own Django fixup.
+    """
+    if not getattr(getattr(sender, "request", None), "is_eager", False):
+        close_old_connections()
@@ -0,0 +1,157 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+With DATABASE_REPLICA_URLS set, the replicas sit next to "default" (the
+primary) in DATABASES as replica1, replica2, … and ReplicaRouter picks a
+database per query:
+
+  • writes always go to the primary
+  • reads go to the primary, except during GET / HEAD requests to views that
+    use ReplicaReadsMixin / ReplicaReadsAPIMixin (dashboard, status polls,
+    list, search and export endpoints), which read from one replica picked
+    at random per request
+  • read-your-writes — once a request writes, its remaining reads go to the
+    primary, and DatabaseRoutingMiddleware pins the user's reads to the
+    primary for READ_YOUR_WRITES_SECONDS afterwards. The pin is a cache key,
+    so it holds across gunicorn workers and for JWT clients: an upload shows
+    up on the dashboard straight away however far the replicas lag
+
+Celery tasks, management commands and the admin never read from a replica.
+Locally, point DATABASE_REPLICA_URLS at a second SQLite file
+(`sqlite:////tmp/replica.sqlite3`) and `migrate --database replica1`.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from apps.monitoring.metrics import DB_READ_ROUTING
+
+SAFE_METHODS = ("GET", "HEAD")
+
+_routing = ContextVar("db_routing", default=None)
+
+
+class _RequestRouting:
+    """Where the current request reads from."""
+
+    __slots__ = ("replica", "wrote")
+
+    def __init__(self):
+        self.replica = None  # alias picked by read_from_replica(), if any
+        self.wrote = False
+
+
+def replica_aliases() -> list[str]:
+    return [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+
+def _pin_key(user_id) -> str:
+    return f"db-primary-pin:{user_id}"
+
+
+def is_pinned(user) -> bool:
+    """True while `user`'s own recent write may not have reached the replicas."""
+    try:
+        return cache.get(_pin_key(user.pk)) is not None
+    except Exception:  # without the cache we cannot tell — stay on the primary
+        return True
+
+
+def pin_to_primary(user):
+    try:
+        cache.set(_pin_key(user.pk), 1, timeout=settings.READ_YOUR_WRITES_SECONDS)
+    except Exception:
+        pass  # reads may briefly miss the write on a lagging replica
+
+
+def read_from_replica(request):
+    """Route the rest of this request's reads to a replica, unless that could hide the user's writes."""
+    routing = _routing.get()
+    aliases = replica_aliases()
+    if routing is None or not aliases or request.method not in SAFE_METHODS or routing.wrote:
+        return
+    if request.user.is_authenticated and is_pinned(request.user):
+        DB_READ_ROUTING.labels(target="primary_pinned").inc()
+        return
+    routing.replica = random.choice(aliases)
+    DB_READ_ROUTING.labels(target="replica").inc()
+
+
+def read_database() -> str:
+    """Alias reads go to right now — for querysets evaluated after the response returns (streaming)."""
+    routing = _routing.get()
+    if routing is not None and routing.replica and not routing.wrote:
+        return routing.replica
+    return DEFAULT_DB_ALIAS
+
+
+def replay_time(alias: str):
+    """Commit time of the last transaction a PostgreSQL replica has applied (None elsewhere)."""
+    connection = connections[alias]
+    if alias == DEFAULT_DB_ALIAS or connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_last_xact_replay_timestamp()")
+        return cursor.fetchone()[0]
+
+
+# ── Router ────────────────────────────────────────────────────────────────────
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_database()
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # replicas hold the same rows as the primary
+
+
+# ── Views ─────────────────────────────────────────────────────────────────────
+
+
+class DatabaseRoutingMiddleware:
+    """Tracks routing per request and pins a user to the primary after their writes."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routing = _RequestRouting()
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        # request.user is the DRF-authenticated user too (DRF sets it on the HttpRequest)
+        user = getattr(request, "user", None)
+        if routing.wrote and user is not None and user.is_authenticated:
+            pin_to_primary(user)
+        if settings.QUERY_COUNT_HEADER:
+            response["X-DB-Read"] = routing.replica if routing.replica and not routing.wrote else DEFAULT_DB_ALIAS
+        return response
+
+
+class ReplicaReadsMixin:
+    """Django class-based views: GET / HEAD may read from a replica (after LoginRequiredMixin)."""
+
+    def dispatch(self, request, *args, **kwargs):
+        read_from_replica(request)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaReadsAPIMixin:
+    """DRF views: as ReplicaReadsMixin, once authentication has identified the user."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        read_from_replica(request)
@@ -0,0 +1,14 @@
+"""
+Gunicorn configuration shared by Procfile and supervisord.
+Command-line flags (--bind, --workers, --timeout) still take precedence.
+"""
+
+import os
+
+
+def child_exit(server, worker):
+    """Tell prometheus_client a worker died so its samples are merged correctly."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
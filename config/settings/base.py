@@ -6,8 +6,10 @@ Environment-specific settings live in development.py and production.py.
 import os
 import ssl
 from pathlib import Path
+from urllib.parse import urlsplit
 
 import environ
+from django.core.exceptions import ImproperlyConfigured
 
 # ── Paths ─────────────────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -37,15 +39,20 @@ INSTALLED_APPS = [
     # Local
     "apps.users",
     "apps.encounters",
+    "apps.monitoring",
 ]
 
 MIDDLEWARE = [
+    "apps.monitoring.middleware.PrometheusMiddleware",
+    "apps.monitoring.middleware.QueryCountMiddleware",  # outermost: sees session/auth queries too
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "config.db_router.DatabaseRoutingMiddleware",
+    "apps.monitoring.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -70,6 +77,88 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+# Bearer token required by /metrics when set (mandatory in production; blank = open, for local use)
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
+# On-demand staff request profiling (?_profile=1 or X-Profile: 1) — off unless enabled
+PROFILING_ENABLED = env.bool("PROFILING_ENABLED", default=False)
+PROFILING_DIR = env("PROFILING_DIR", default=str(BASE_DIR / "var" / "profiles"))
+PROFILING_MAX_ENTRIES = env.int("PROFILING_MAX_ENTRIES", default=200)
+
+# Expose X-DB-Queries / X-DB-Time-Ms response headers (load testing only)
+QUERY_COUNT_HEADER = env.bool("QUERY_COUNT_HEADER", default=False)
+
+# Cold-start budget for booting config.wsgi (`manage.py check_import_budget`)
+IMPORT_BUDGET_MS = env.float("IMPORT_BUDGET_MS", default=1000)
+
+# ── Database connections ──────────────────────────────────────────────────────
+# How each process holds its connections to the database (`manage.py bench_db`
+# compares the modes):
+#   "persistent" — one connection per process / thread, reused for
+#                  DB_CONN_MAX_AGE seconds and health-checked before reuse
+#   "pool"       — Django's psycopg 3 connection pool (PostgreSQL only),
+#                  DB_POOL_MIN_SIZE–DB_POOL_MAX_SIZE connections per process
+#   "off"        — a fresh connection for every request / task
+DB_CONNECTION_MODE = env("DB_CONNECTION_MODE", default="persistent")
+DB_CONN_MAX_AGE = env.int("DB_CONN_MAX_AGE", default=600)
+
+# web (gunicorn) · worker (Celery) · runner (`manage.py run_pipeline`) — set by
+# Procfile / supervisord; picks the default pool size for this process.
+PROCESS_TYPE = env("PROCESS_TYPE", default="web")
+_DB_POOL_SIZES = {"web": (1, 4), "worker": (1, 2), "runner": (1, 2)}  # (min, max) per process
+if PROCESS_TYPE not in _DB_POOL_SIZES:
+    raise ImproperlyConfigured(
+        f"Unknown PROCESS_TYPE '{PROCESS_TYPE}'. Choose one of: {', '.join(_DB_POOL_SIZES)}."
+    )
+DB_POOL_MIN_SIZE = env.int("DB_POOL_MIN_SIZE", default=_DB_POOL_SIZES[PROCESS_TYPE][0])
+DB_POOL_MAX_SIZE = env.int("DB_POOL_MAX_SIZE", default=_DB_POOL_SIZES[PROCESS_TYPE][1])
+DB_POOL_TIMEOUT = env.float("DB_POOL_TIMEOUT", default=10.0)  # seconds to wait for a free connection
+
+
+def database_config(config: dict) -> dict:
+    """Apply DB_CONNECTION_MODE to one DATABASES entry (e.g. env.db(...))."""
+    config = {**config, "OPTIONS": dict(config.get("OPTIONS", {}))}
+    if DB_CONNECTION_MODE == "pool":
+        if "postgresql" not in config["ENGINE"]:
+            raise ImproperlyConfigured("DB_CONNECTION_MODE=pool needs PostgreSQL (psycopg 3).")
+        from psycopg_pool import ConnectionPool
+
+        config["CONN_MAX_AGE"] = 0  # the pool decides how long connections live
+        config["OPTIONS"]["pool"] = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
+            "max_idle": DB_CONN_MAX_AGE,
+            "check": ConnectionPool.check_connection,  # ping before handing one out
+        }
+    elif DB_CONNECTION_MODE == "persistent":
+        config["CONN_MAX_AGE"] = DB_CONN_MAX_AGE
+        config["CONN_HEALTH_CHECKS"] = True
+    elif DB_CONNECTION_MODE == "off":
+        config["CONN_MAX_AGE"] = 0
+    else:
+        raise ImproperlyConfigured(
+            f"Unknown DB_CONNECTION_MODE '{DB_CONNECTION_MODE}'. Choose one of: persistent, pool, off."
+        )
+    return config
+
+
+# Read replicas (config/db_router.py), added to DATABASES as replica1, replica2, …
+# Read-only views read from them; after a user's own write their reads stay on
+# the primary for READ_YOUR_WRITES_SECONDS, longer than the replicas lag.
+DATABASE_REPLICA_URLS = env.list("DATABASE_REPLICA_URLS", default=[])
+READ_YOUR_WRITES_SECONDS = env.int("READ_YOUR_WRITES_SECONDS", default=10)
+DATABASE_ROUTERS = ["config.db_router.ReplicaRouter"]
+
+
+def replica_databases() -> dict:
+    """DATABASES entries for DATABASE_REPLICA_URLS; test runs read the primary instead."""
+    return {
+        f"replica{number}": {**database_config(env.db_url_config(url)), "TEST": {"MIRROR": "default"}}
+        for number, url in enumerate(DATABASE_REPLICA_URLS, start=1)
+    }
+
+
 # ── Password validation ───────────────────────────────────────────────────────
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -115,6 +204,15 @@ MEDIA_ROOT = BASE_DIR / "media"
 # ── File upload limits ────────────────────────────────────────────────────────
 DATA_UPLOAD_MAX_MEMORY_SIZE = 26_214_400   # 25 MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 26_214_400   # 25 MB
+# Django's default handlers, plus a streaming SHA-256 of each file (dedup)
+FILE_UPLOAD_HANDLERS = [
+    "apps.encounters.uploadhandlers.HashingMemoryFileUploadHandler",
+    "apps.encounters.uploadhandlers.HashingTemporaryFileUploadHandler",
+]
+
+# Bulk upload API — encounters per batch (also caps multipart file parts)
+BULK_UPLOAD_MAX_ITEMS = env.int("BULK_UPLOAD_MAX_ITEMS", default=100)
+DATA_UPLOAD_MAX_NUMBER_FILES = BULK_UPLOAD_MAX_ITEMS
 
 # ── Django REST Framework ─────────────────────────────────────────────────────
 REST_FRAMEWORK = {
@@ -140,6 +238,58 @@ SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True,
 }
 
+# ── Cache ─────────────────────────────────────────────────────────────────────
+# Redis by default; holds serialized payloads of finished encounters
+# (apps/encounters/services/payload_cache.py). "locmemcache://" for per-process memory.
+# Without CACHE_URL it is database 1 of the REDIS_URL server, so cache keys and
+# their eviction never touch the Celery broker's queues in database 0. Hosts
+# with a single database (Upstash) need CACHE_URL pointing at another instance.
+def redis_database(url: str, db: int) -> str:
+    return urlsplit(url)._replace(path=f"/{db}").geturl()
+
+
+CACHES = {
+    "default": {
+        **env.cache(
+            "CACHE_URL", default=redis_database(env("REDIS_URL", default="redis://localhost:6379/0"), 1),
+        ),
+        "KEY_PREFIX": "vitalnote",
+    },
+}
+ENCOUNTER_PAYLOAD_CACHE_SECONDS = env.int("ENCOUNTER_PAYLOAD_CACHE_SECONDS", default=24 * 60 * 60)
+
+# ── Full-text search ──────────────────────────────────────────────────────────
+# PostgreSQL text search configuration (stemming / stop words) for SOAP notes
+SEARCH_TEXT_CONFIG = env("SEARCH_TEXT_CONFIG", default="english")
+# Ranked matches shown by the dashboard search box
+SEARCH_DASHBOARD_LIMIT = env.int("SEARCH_DASHBOARD_LIMIT", default=100)
+
+# ── Admin ─────────────────────────────────────────────────────────────────────
+# Changelists above this many (estimated) rows show the PostgreSQL planner's
+# estimate instead of an exact COUNT(*) (apps/encounters/pagination.py)
+ADMIN_EXACT_COUNT_THRESHOLD = env.int("ADMIN_EXACT_COUNT_THRESHOLD", default=10_000)
+
+# ── Partitioning (PostgreSQL) ─────────────────────────────────────────────────
+# Monthly range partitions on created_at for encounters, transcripts, SOAP notes
+# and metrics (apps/encounters/services/partitions.py). Applied by migration
+# 0020, or `manage.py encounter_partitions --convert` when enabled later.
+ENCOUNTER_PARTITIONING = env.bool("ENCOUNTER_PARTITIONING", default=False)
+ENCOUNTER_PARTITION_PREMAKE_MONTHS = env.int("ENCOUNTER_PARTITION_PREMAKE_MONTHS", default=3)
+# Detach partitions older than this many months for archiving (0 = keep all)
+ENCOUNTER_PARTITION_RETENTION_MONTHS = env.int("ENCOUNTER_PARTITION_RETENTION_MONTHS", default=0)
+# What happens to the audio of detached encounters: "archive" (moved under
+# AUDIO_ARCHIVE_PREFIX, like the retention policy) or "delete"
+ENCOUNTER_PARTITION_AUDIO_ACTION = env("ENCOUNTER_PARTITION_AUDIO_ACTION", default="archive")
+# Dashboard history shown without a search (0 = everything); bounding it lets
+# PostgreSQL skip older partitions
+DASHBOARD_HISTORY_MONTHS = env.int("DASHBOARD_HISTORY_MONTHS", default=0)
+
+# ── Export (EHR sync) ─────────────────────────────────────────────────────────
+# Rows fetched per server-side cursor round trip (apps/encounters/services/export.py)
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=500)
+# The high-water mark trails "now" so rows still being committed are not skipped
+EXPORT_HIGH_WATER_LAG_SECONDS = env.int("EXPORT_HIGH_WATER_LAG_SECONDS", default=5)
+
 # ── Celery ────────────────────────────────────────────────────────────────────
 CELERY_BROKER_URL = env("REDIS_URL", default="redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = env("REDIS_URL", default="redis://localhost:6379/0")
@@ -149,6 +299,77 @@ CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
 CELERY_TASK_TRACK_STARTED = True
 CELERY_WORKER_CANCEL_LONG_RUNNING_TASKS_ON_CONNECTION_LOSS = True
+# Celery's Django fixup closes every DB connection around every task unless
+# this is set; it then closes them only every N tasks, and config/celery.py
+# applies DB_CONNECTION_MODE (max age, health checks) around each task instead.
+CELERY_DB_REUSE_MAX = env.int("CELERY_DB_REUSE_MAX", default=1000)
+
+# Fair scheduling — ten broker priority steps, one prefetched task per worker
+# process so priorities decide what runs next (see apps/encounters/scheduling.py).
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "priority_steps": list(range(10)),
+    "queue_order_strategy": "priority",
+}
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Waiting uploads per user that share one priority level (1 = strict round-robin)
+PIPELINE_FAIR_SHARE_STEP = env.int("PIPELINE_FAIR_SHARE_STEP", default=1)
+
+# "celery" (one encounter per prefork process) or "async" — `manage.py
+# run_pipeline` multiplexes many encounters per process with asyncio.
+PIPELINE_RUNNER = env("PIPELINE_RUNNER", default="celery")
+PIPELINE_ASYNC_CONCURRENCY = env.int("PIPELINE_ASYNC_CONCURRENCY", default=32)       # encounters in flight
+PIPELINE_ASYNC_SOAP_CONCURRENCY = env.int("PIPELINE_ASYNC_SOAP_CONCURRENCY", default=8)  # Groq calls at once
+PIPELINE_REDACTION_THREADS = env.int("PIPELINE_REDACTION_THREADS", default=1)
+PIPELINE_LEASE_SECONDS = env.int("PIPELINE_LEASE_SECONDS", default=15 * 60)
+
+# Days of quality rollups recomputed on every run, so encounters that finish
+# after their upload day (retries, reprocessing) are still counted
+QUALITY_ROLLUP_LOOKBACK_DAYS = env.int("QUALITY_ROLLUP_LOOKBACK_DAYS", default=7)
+
+# Periodic tasks — run by `celery beat` (or a worker started with -B)
+CELERY_BEAT_SCHEDULE = {
+    "rollup-quality-metrics": {
+        "task": "apps.encounters.tasks.rollup_quality_metrics",
+        "schedule": env.int("QUALITY_ROLLUP_INTERVAL_SECONDS", default=15 * 60),
+    },
+    "apply-audio-retention": {
+        "task": "apps.encounters.tasks.apply_audio_retention",
+        "schedule": env.int("AUDIO_RETENTION_INTERVAL_SECONDS", default=60 * 60),
+    },
+    "admit-deferred-uploads": {
+        "task": "apps.encounters.tasks.admit_deferred_uploads",
+        "schedule": env.int("ADMISSION_INTERVAL_SECONDS", default=30),
+    },
+    "dispatch-webhooks": {
+        "task": "apps.encounters.tasks.dispatch_webhooks",
+        "schedule": env.int("WEBHOOK_SWEEP_INTERVAL_SECONDS", default=60),
+    },
+    "maintain-encounter-partitions": {
+        "task": "apps.encounters.tasks.maintain_encounter_partitions",
+        "schedule": 24 * 60 * 60,
+    },
+}
+
+# Webhook deliveries run on their own queue so a slow receiver never holds up
+# the pipeline — start a worker with `-Q webhooks` (or `-Q celery,webhooks`).
+CELERY_TASK_ROUTES = {
+    "apps.encounters.tasks.deliver_webhooks": {"queue": "webhooks"},
+    "apps.encounters.tasks.dispatch_webhooks": {"queue": "webhooks"},
+}
+
+# Admission control for uploads and bulk imports (apps/encounters/admission.py).
+# Over either limit an upload gets 429 + Retry-After ("reject") or is stored
+# and held back until there is capacity ("defer"). 0 disables a limit.
+ADMISSION_MAX_QUEUE_DEPTH = env.int("ADMISSION_MAX_QUEUE_DEPTH", default=500)           # waiting pipeline runs
+ADMISSION_MAX_IN_FLIGHT_PER_USER = env.int("ADMISSION_MAX_IN_FLIGHT_PER_USER", default=25)  # unfinished encounters
+ADMISSION_OVERFLOW = env("ADMISSION_OVERFLOW", default="reject")                        # reject · defer
+# Drain rate for Retry-After / estimated waits: pipeline runs started in this window
+ADMISSION_THROUGHPUT_WINDOW_SECONDS = env.int("ADMISSION_THROUGHPUT_WINDOW_SECONDS", default=10 * 60)
+ADMISSION_FALLBACK_THROUGHPUT_PER_MINUTE = env.float("ADMISSION_FALLBACK_THROUGHPUT_PER_MINUTE", default=2.0)
+ADMISSION_RETRY_AFTER_MAX_SECONDS = env.int("ADMISSION_RETRY_AFTER_MAX_SECONDS", default=15 * 60)
+
+# Queues whose depth is exported on /metrics
+CELERY_MONITORED_QUEUES = env.list("CELERY_MONITORED_QUEUES", default=["celery", "webhooks"])
 
 # Upstash uses TLS (rediss://): tell Celery to accept the managed certificate.
 if CELERY_BROKER_URL.startswith("rediss://"):
@@ -156,10 +377,67 @@ if CELERY_BROKER_URL.startswith("rediss://"):
     CELERY_BROKER_USE_SSL = _ssl_opts
     CELERY_REDIS_BACKEND_USE_SSL = _ssl_opts
 
+# ── Webhooks ──────────────────────────────────────────────────────────────────
+# Completion notifications (apps/encounters/services/webhooks.py). Events of one
+# endpoint arriving within the batch window are sent as one signed request.
+WEBHOOK_BATCH_WINDOW_SECONDS = env.float("WEBHOOK_BATCH_WINDOW_SECONDS", default=2.0)
+WEBHOOK_MAX_BATCH_SIZE = env.int("WEBHOOK_MAX_BATCH_SIZE", default=50)
+WEBHOOK_TIMEOUT_SECONDS = env.float("WEBHOOK_TIMEOUT_SECONDS", default=10.0)
+# Retries back off exponentially: base · 2^(attempt − 1), capped
+WEBHOOK_MAX_ATTEMPTS = env.int("WEBHOOK_MAX_ATTEMPTS", default=8)
+WEBHOOK_BACKOFF_BASE_SECONDS = env.float("WEBHOOK_BACKOFF_BASE_SECONDS", default=10.0)
+WEBHOOK_BACKOFF_MAX_SECONDS = env.float("WEBHOOK_BACKOFF_MAX_SECONDS", default=60 * 60)
+WEBHOOK_EVENT_RETENTION_DAYS = env.int("WEBHOOK_EVENT_RETENTION_DAYS", default=7)  # delivered events
+# Plain-http endpoint URLs (e.g. `manage.py webhook_receiver`) — development only
+WEBHOOK_ALLOW_HTTP = env.bool("WEBHOOK_ALLOW_HTTP", default=DEBUG)
+# Endpoints on private / loopback addresses (the local receiver) — development only
+WEBHOOK_ALLOW_PRIVATE_HOSTS = env.bool("WEBHOOK_ALLOW_PRIVATE_HOSTS", default=DEBUG)
+
+# ── Audio retention ───────────────────────────────────────────────────────────
+# What happens to audio once an encounter is finished, per final status:
+# "keep", "archive" (moved under AUDIO_ARCHIVE_PREFIX) or "delete".
+# See apps/encounters/services/retention.py.
+AUDIO_RETENTION_ACTION = env("AUDIO_RETENTION_ACTION", default="keep")              # COMPLETED
+AUDIO_RETENTION_DAYS = env.int("AUDIO_RETENTION_DAYS", default=30)
+AUDIO_RETENTION_FAILED_ACTION = env("AUDIO_RETENTION_FAILED_ACTION", default="keep")  # FAILED
+AUDIO_RETENTION_FAILED_DAYS = env.int("AUDIO_RETENTION_FAILED_DAYS", default=90)
+AUDIO_ARCHIVE_PREFIX = env("AUDIO_ARCHIVE_PREFIX", default="archive/")
+AUDIO_ARCHIVE_STORAGE_CLASS = env("AUDIO_ARCHIVE_STORAGE_CLASS", default="STANDARD_IA")  # R2 only
+# Throttling: encounters per batch, pause between batches, cap per run
+AUDIO_RETENTION_BATCH_SIZE = env.int("AUDIO_RETENTION_BATCH_SIZE", default=100)
+AUDIO_RETENTION_BATCH_PAUSE_SECONDS = env.float("AUDIO_RETENTION_BATCH_PAUSE_SECONDS", default=1.0)
+AUDIO_RETENTION_MAX_PER_RUN = env.int("AUDIO_RETENTION_MAX_PER_RUN", default=5000)
+
 # ── External API keys ─────────────────────────────────────────────────────────
 ASSEMBLYAI_API_KEY = env("ASSEMBLYAI_API_KEY", default="")
+# Longest the async runner polls one AssemblyAI transcript before failing the
+# attempt (retried); kept below PIPELINE_LEASE_SECONDS so no other runner
+# claims the encounter while it is still waiting
+ASSEMBLYAI_MAX_WAIT_SECONDS = env.int("ASSEMBLYAI_MAX_WAIT_SECONDS", default=10 * 60)
+if ASSEMBLYAI_MAX_WAIT_SECONDS >= PIPELINE_LEASE_SECONDS:
+    raise ImproperlyConfigured("ASSEMBLYAI_MAX_WAIT_SECONDS must be below PIPELINE_LEASE_SECONDS.")
 GROQ_API_KEY = env("GROQ_API_KEY", default="")
 
+# ── Transcription backend ─────────────────────────────────────────────────────
+# "assemblyai" (hosted), "whisper" (local CPU via faster-whisper) or "fake"
+# (deterministic, no network — tests and offline environments).
+TRANSCRIPTION_BACKEND = env("TRANSCRIPTION_BACKEND", default="assemblyai")
+
+# faster-whisper — only read when TRANSCRIPTION_BACKEND=whisper
+WHISPER_MODEL = env("WHISPER_MODEL", default="base.en")
+WHISPER_COMPUTE_TYPE = env("WHISPER_COMPUTE_TYPE", default="int8")
+WHISPER_CPU_THREADS = env.int("WHISPER_CPU_THREADS", default=0)  # 0 = library default
+WHISPER_TURN_GAP_SECONDS = env.float("WHISPER_TURN_GAP_SECONDS", default=1.0)
+
+# Fake backend — only read when TRANSCRIPTION_BACKEND=fake
+FAKE_TRANSCRIPTION_LATENCY = env.float("FAKE_TRANSCRIPTION_LATENCY", default=0.0)  # seconds
+FAKE_TRANSCRIPTION_WORDS = env.int("FAKE_TRANSCRIPTION_WORDS", default=120)
+
+# ── SOAP generation backend ───────────────────────────────────────────────────
+# "groq" (Llama 3.3 70B) or "fake" (deterministic, no network).
+SOAP_BACKEND = env("SOAP_BACKEND", default="groq")
+FAKE_SOAP_LATENCY = env.float("FAKE_SOAP_LATENCY", default=0.0)  # seconds
+
 # ── Cloudflare R2 (S3-compatible storage) ────────────────────────────────────
 USE_R2 = env.bool("USE_R2", default=False)
 
@@ -10,10 +10,17 @@ ALLOWED_HOSTS = ["*"]
 # Disable template caching so on-disk edits appear immediately
 TEMPLATES[0]["OPTIONS"]["debug"] = True  # noqa: F405
 
+# Per-request DB query headers for `manage.py loadtest`
+QUERY_COUNT_HEADER = env.bool("QUERY_COUNT_HEADER", default=True)  # noqa: F405
+
 # ── Database (SQLite for zero-setup local dev) ────────────────────────────────
 DATABASES = {
-    "default": {
+    "default": database_config({  # noqa: F405
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",  # noqa: F405
-    }
+    }),
+    **replica_databases(),  # noqa: F405 — e.g. DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3
 }
+
+# ── Cache (per-process memory unless CACHE_URL points at Redis) ───────────────
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}  # noqa: F405
@@ -2,13 +2,18 @@
 Production settings — PostgreSQL (Supabase), Cloudflare R2, security hardening.
 """
 
+from django.core.exceptions import ImproperlyConfigured
+
 from .base import *  # noqa: F401, F403
 
 DEBUG = False
 
 # ── Database (PostgreSQL via Supabase) ────────────────────────────────────────
+# Persistent connections or a psycopg pool, see DB_CONNECTION_MODE in base.py;
+# replicas from DATABASE_REPLICA_URLS serve read-only views (config/db_router.py)
 DATABASES = {
-    "default": env.db("DATABASE_URL")  # noqa: F405
+    "default": database_config(env.db("DATABASE_URL")),  # noqa: F405
+    **replica_databases(),  # noqa: F405
 }
 
 # ── Security hardening ────────────────────────────────────────────────────────
@@ -20,3 +25,8 @@ SECURE_HSTS_SECONDS = 31536000
 SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
+
+# ── Monitoring ────────────────────────────────────────────────────────────────
+# /metrics is reachable from the internet here, so it never runs without a token
+if not METRICS_TOKEN:  # noqa: F405
+    raise ImproperlyConfigured("Set METRICS_TOKEN: production serves /metrics only to authenticated scrapers.")
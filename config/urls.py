@@ -10,6 +10,13 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.monitoring.views import (
+    MetricsView,
+    ProfileDetailView,
+    ProfileDownloadView,
+    ProfileListView,
+)
+
 
 class HomeView(View):
     """Public landing page. Authenticated users go straight to the dashboard."""
@@ -40,11 +47,23 @@ class HealthCheckView(APIView):
 
 urlpatterns = [
     # ── Admin ────────────────────────────────────────────────────────────────
+    # Request profiles are staff-only pages rendered inside the admin chrome;
+    # they must come before admin.site.urls, which would otherwise 404 them.
+    path("admin/profiles/", ProfileListView.as_view(), name="admin-profile-list"),
+    path("admin/profiles/<uuid:profile_id>/", ProfileDetailView.as_view(), name="admin-profile-detail"),
+    path(
+        "admin/profiles/<uuid:profile_id>/download/",
+        ProfileDownloadView.as_view(),
+        name="admin-profile-download",
+    ),
     path("admin/", admin.site.urls),
 
     # ── Health check (cron-job.org keep-alive) ───────────────────────────────
     path("health/", HealthCheckView.as_view(), name="health"),
 
+    # ── Prometheus scrape endpoint ───────────────────────────────────────────
+    path("metrics", MetricsView.as_view(), name="metrics"),
+
     # ── Root → landing page (authenticated → dashboard) ─────────────────────
     path("", HomeView.as_view(), name="home"),
 
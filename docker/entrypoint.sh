@@ -7,5 +7,8 @@ python manage.py migrate --noinput
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
+echo "Resetting Prometheus multi-process metrics..."
+rm -rf /tmp/prometheus && mkdir -p /tmp/prometheus
+
 echo "Starting supervisord (gunicorn + celery)..."
 exec /usr/bin/supervisord -c /etc/supervisor/conf.d/vitalnote.conf
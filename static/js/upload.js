@@ -279,6 +279,8 @@
     submitBtn.textContent = "Uploading…";
 
     var formData = new FormData();
+    // Recordings made here go to the live endpoint, which schedules them in the priority lane
+    var endpoint = hasBlob ? "/api/encounters/live/" : "/api/encounters/";
     if (hasBlob) {
       var ext = recordedBlob.type.includes("ogg") ? ".ogg" : ".webm";
       formData.append("audio_file", recordedBlob, "recording-" + Date.now() + ext);
@@ -289,7 +291,7 @@
     if (patientAge  && patientAge.value.trim())  formData.append("patient_age",  patientAge.value.trim());
 
     try {
-      var response = await fetch("/api/encounters/", {
+      var response = await fetch(endpoint, {
         method: "POST",
         body: formData,
         headers: { "X-CSRFToken": getCookie("csrftoken") },